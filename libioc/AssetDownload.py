@@ -0,0 +1,248 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# Copyright (c) 2014-2018, iocage
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""ioc module for parallel and resumable downloads of release assets."""
+import typing
+import concurrent.futures
+import hashlib
+import os
+import queue
+import urllib.error
+import urllib.request
+from timeit import default_timer as timer
+
+import libioc.errors
+import libioc.helpers_object
+
+DEFAULT_MAX_WORKERS = 4
+
+# Bytes read from the HTTP response at once
+_CHUNK_SIZE = 65536
+
+# Minimum seconds between two progress reports of a download
+_PROGRESS_INTERVAL = 1.0
+
+
+class AssetDownload:
+    """
+    Download of a single file that resumes partially downloaded files.
+
+    The file is written to `<path>.part` until the download has finished.
+    When such partial file exists, only the remaining bytes are requested
+    with a HTTP Range header. The SHA-256 hash of the file is computed while
+    the data is written, so that verifying the file needs no extra pass.
+    """
+
+    url: str
+    path: str
+    bytes_received: int
+    bytes_resumed: int
+    total_bytes: typing.Optional[int]
+    sha256: typing.Optional[str]
+    done: bool
+    error: typing.Optional[BaseException]
+    _started_at: typing.Optional[float]
+    _stopped_at: typing.Optional[float]
+
+    def __init__(
+        self,
+        url: str,
+        path: str,
+        logger: typing.Optional['libioc.Logger.Logger']=None
+    ) -> None:
+        self.logger = libioc.helpers_object.init_logger(self, logger)
+        self.url = url
+        self.path = path
+        self.bytes_received = 0
+        self.bytes_resumed = 0
+        self.total_bytes = None
+        self.sha256 = None
+        self.done = False
+        self.error = None
+        self._started_at = None
+        self._stopped_at = None
+
+    @property
+    def partial_path(self) -> str:
+        """Return the path of the file while it is downloaded."""
+        return f"{self.path}.part"
+
+    @property
+    def duration(self) -> typing.Optional[float]:
+        """Return the seconds the download is running or took."""
+        if self._started_at is None:
+            return None
+        if self._stopped_at is None:
+            return timer() - self._started_at
+        return self._stopped_at - self._started_at
+
+    @property
+    def throughput(self) -> typing.Optional[float]:
+        """Return the average number of bytes downloaded per second."""
+        duration = self.duration
+        if (duration is None) or (duration <= 0):
+            return None
+        return self.bytes_received / duration
+
+    def run(
+        self,
+        progress: typing.Optional[typing.Callable[[], None]]=None
+    ) -> None:
+        """
+        Download the file.
+
+        Args:
+
+            progress (callable): (optional)
+                Called periodically while data is received.
+        """
+        self._started_at = timer()
+        try:
+            self._download(progress)
+        finally:
+            self._stopped_at = timer()
+
+    def _download(
+        self,
+        progress: typing.Optional[typing.Callable[[], None]]
+    ) -> None:
+        sha256 = hashlib.sha256()
+        offset = self._hash_partial_file(sha256)
+
+        request = urllib.request.Request(self.url)
+        if offset > 0:
+            request.add_header("Range", f"bytes={offset}-")
+            self.logger.debug(f"Resuming download of {self.url} at {offset}")
+        else:
+            self.logger.debug(f"Starting download of {self.url}")
+
+        try:
+            response = urllib.request.urlopen(request)  # nosec: validated
+        except urllib.error.HTTPError as http_error:
+            if (http_error.code == 416) and (offset > 0):
+                # the partial file already has the full length
+                self._finish(sha256)
+                return
+            raise libioc.errors.DownloadFailed(
+                url=self.url,
+                code=http_error.code,
+                logger=self.logger
+            )
+
+        with response:
+            if (offset > 0) and (response.status != 206):
+                self.logger.debug(f"{self.url} cannot be resumed")
+                sha256 = hashlib.sha256()
+                offset = 0
+            self.bytes_resumed = offset
+
+            content_length = response.headers.get("Content-Length")
+            if content_length is not None:
+                self.total_bytes = offset + int(content_length)
+
+            last_progress = timer()
+            with open(self.partial_path, "ab" if offset > 0 else "wb") as f:
+                while True:
+                    chunk = response.read(_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    sha256.update(chunk)
+                    self.bytes_received += len(chunk)
+                    if progress is None:
+                        continue
+                    now = timer()
+                    if (now - last_progress) >= _PROGRESS_INTERVAL:
+                        last_progress = now
+                        progress()
+
+        self._finish(sha256)
+
+    def _hash_partial_file(self, sha256: typing.Any) -> int:
+        offset = 0
+        try:
+            with open(self.partial_path, "rb") as f:
+                for block in iter(lambda: f.read(_CHUNK_SIZE), b''):
+                    sha256.update(block)
+                    offset += len(block)
+        except FileNotFoundError:
+            pass
+        return offset
+
+    def _finish(self, sha256: typing.Any) -> None:
+        os.rename(self.partial_path, self.path)
+        self.sha256 = sha256.hexdigest()
+        self.logger.verbose(f"{self.url} was saved to {self.path}")
+
+
+def download(
+    downloads: typing.List[AssetDownload],
+    max_workers: int=DEFAULT_MAX_WORKERS
+) -> typing.Generator[typing.Tuple[AssetDownload, bool], None, None]:
+    """
+    Run downloads in parallel.
+
+    Yields a download together with a flag whether it has finished whenever
+    it made progress or has finished. Finished downloads are either done or
+    have an error.
+
+    Args:
+
+        downloads (list of libioc.AssetDownload.AssetDownload):
+            The downloads to run.
+
+        max_workers (int): (default=4)
+            The maximum number of simultaneous downloads.
+    """
+    updates: queue.Queue = queue.Queue()
+
+    def _run(asset_download: AssetDownload) -> None:
+        try:
+            asset_download.run(
+                progress=lambda: updates.put((asset_download, False))
+            )
+            asset_download.done = True
+        except BaseException as e:
+            asset_download.error = e
+        updates.put((asset_download, True))
+
+    pending = len(downloads)
+    if pending == 0:
+        return
+
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, pending))
+    )
+    futures = [executor.submit(_run, x) for x in downloads]
+    try:
+        while pending > 0:
+            asset_download, finished = updates.get()
+            if finished is True:
+                pending -= 1
+            yield (asset_download, finished)
+    finally:
+        # downloads that did not start yet are not needed anymore
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
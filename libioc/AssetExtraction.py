@@ -0,0 +1,217 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# Copyright (c) 2014-2018, iocage
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""ioc module for the parallel extraction of release assets."""
+import typing
+import concurrent.futures
+import multiprocessing
+import os
+import queue
+from timeit import default_timer as timer
+
+import libioc.SecureTarfile
+
+# Minimum seconds between two progress reports of an extraction
+_PROGRESS_INTERVAL = 1.0
+
+# Progress queue of the current extraction worker process
+_progress_queue: typing.Optional[typing.Any] = None
+
+
+class AssetExtraction:
+    """
+    Extraction of a single release asset archive.
+
+    The progress is measured in bytes read from the compressed archive file,
+    so that it can be compared with the size of the archive.
+    """
+
+    file: str
+    destination: str
+    compression_format: typing.Optional[str]
+    bytes_read: int
+    total_bytes: int
+    done: bool
+    error: typing.Optional[BaseException]
+    _started_at: typing.Optional[float]
+    _stopped_at: typing.Optional[float]
+
+    def __init__(
+        self,
+        file: str,
+        destination: str,
+        compression_format: typing.Optional[str]=None
+    ) -> None:
+        self.file = file
+        self.destination = destination
+        self.compression_format = compression_format
+        self.bytes_read = 0
+        self.total_bytes = os.path.getsize(file)
+        self.done = False
+        self.error = None
+        self._started_at = None
+        self._stopped_at = None
+
+    @property
+    def duration(self) -> typing.Optional[float]:
+        """Return the seconds the extraction is running or took."""
+        if self._started_at is None:
+            return None
+        if self._stopped_at is None:
+            return timer() - self._started_at
+        return self._stopped_at - self._started_at
+
+    @property
+    def throughput(self) -> typing.Optional[float]:
+        """Return the average number of archive bytes read per second."""
+        duration = self.duration
+        if (duration is None) or (duration <= 0):
+            return None
+        return self.bytes_read / duration
+
+
+def _init_worker(progress_queue: typing.Any) -> None:
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def _extract(
+    index: int,
+    file: str,
+    destination: str,
+    compression_format: typing.Optional[str]
+) -> None:
+    progress_queue = _progress_queue
+    if progress_queue is None:
+        raise RuntimeError("The extraction worker was not initialized")
+    progress_queue.put((index, 0))
+    last_progress = timer()
+
+    def _progress(bytes_read: int) -> None:
+        nonlocal last_progress
+        now = timer()
+        if (now - last_progress) >= _PROGRESS_INTERVAL:
+            last_progress = now
+            progress_queue.put((index, bytes_read))
+
+    libioc.SecureTarfile.extract(
+        file=file,
+        destination=destination,
+        compression_format=compression_format,
+        progress=_progress
+    )
+
+
+def extract(
+    extractions: typing.List[AssetExtraction],
+    max_workers: typing.Optional[int]=None
+) -> typing.Generator[typing.Tuple[AssetExtraction, bool], None, None]:
+    """
+    Extract multiple archives in parallel worker processes.
+
+    Decompressing the archives is CPU bound, so that every archive is
+    extracted in its own process. The archives must not contain the same
+    files, because the order in which they are written is not defined.
+
+    Yields tuples of the extraction and whether it has finished. Failed
+    extractions have finished with an error. Remaining extractions are
+    cancelled when the generator is closed.
+
+    Args:
+
+        extractions (list):
+            The AssetExtraction instances to process.
+
+        max_workers (int): (optional)
+            The maximum number of simultaneous extractions. Defaults to the
+            number of CPUs.
+    """
+    pending = len(extractions)
+    if pending == 0:
+        return
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    progress_queue = multiprocessing.Queue()
+    executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers=max(1, min(max_workers, pending)),
+        initializer=_init_worker,
+        initargs=(progress_queue,)
+    )
+    futures = dict([(
+        executor.submit(
+            _extract,
+            index,
+            extraction.file,
+            extraction.destination,
+            extraction.compression_format
+        ),
+        extraction
+    ) for index, extraction in enumerate(extractions)])
+    not_done = set(futures.keys())
+    try:
+        while len(not_done) > 0:
+            done, not_done = concurrent.futures.wait(
+                not_done,
+                timeout=_PROGRESS_INTERVAL,
+                return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            yield from _read_progress(progress_queue, extractions)
+            for future in done:
+                extraction = futures[future]
+                extraction._stopped_at = timer()
+                if extraction._started_at is None:
+                    extraction._started_at = extraction._stopped_at
+                error = future.exception()
+                if error is None:
+                    extraction.bytes_read = extraction.total_bytes
+                    extraction.done = True
+                else:
+                    extraction.error = error
+                yield (extraction, True)
+    finally:
+        # extractions that did not start yet are not needed anymore
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+        progress_queue.close()
+
+
+def _read_progress(
+    progress_queue: typing.Any,
+    extractions: typing.List[AssetExtraction]
+) -> typing.Generator[typing.Tuple[AssetExtraction, bool], None, None]:
+    while True:
+        try:
+            index, bytes_read = progress_queue.get_nowait()
+        except queue.Empty:
+            return
+        extraction = extractions[index]
+        if extraction._started_at is None:
+            extraction._started_at = timer()
+        if (extraction.done is True) or (extraction.error is not None):
+            continue
+        extraction.bytes_read = bytes_read
+        yield (extraction, False)
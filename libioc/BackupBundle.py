@@ -0,0 +1,532 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# Copyright (c) 2014-2018, iocage
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""ioc streaming writer of compressed backup archives."""
+import typing
+import collections
+import concurrent.futures
+import io
+import os
+import shutil
+import struct
+import subprocess  # nosec: B404
+import tarfile
+import time
+import zlib
+from timeit import default_timer as timer
+
+import libioc.errors
+import libioc.helpers_object
+
+# Bytes of a ZFS send stream that are stored in one archive member
+SEND_STREAM_PART_SIZE = 64 * 1024 * 1024
+
+# Bytes of uncompressed data that are compressed by a thread at once
+_GZIP_BLOCK_SIZE = 1024 * 1024
+
+# deflate back-references reach up to 32 KiB into the preceding data
+_GZIP_DICTIONARY_SIZE = 32 * 1024
+
+_CHUNK_SIZE = 65536
+
+
+def _default_threads() -> int:
+    return max(1, os.cpu_count() or 1)
+
+
+def _deflate_block(
+    block: bytes,
+    dictionary: bytes,
+    level: int,
+    last: bool
+) -> bytes:
+    if len(dictionary) > 0:
+        compressor = zlib.compressobj(
+            level,
+            zlib.DEFLATED,
+            -zlib.MAX_WBITS,
+            zdict=dictionary
+        )
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    data = compressor.compress(block)
+    data += compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return data
+
+
+class ParallelGzipWriter:
+    """
+    Write a single gzip member that is compressed by many threads.
+
+    Like pigz the data is split into blocks that are deflated in parallel.
+    Each block is primed with the end of its predecessor and all blocks end
+    on a byte boundary, so that their concatenation is one deflate stream
+    that any gzip implementation can read.
+    """
+
+    def __init__(
+        self,
+        fileobj: typing.BinaryIO,
+        level: int=6,
+        threads: typing.Optional[int]=None
+    ) -> None:
+        self.fileobj = fileobj
+        self.level = level
+        self.threads = _default_threads() if (threads is None) else threads
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.threads
+        )
+        self._pending: typing.Deque[concurrent.futures.Future] = \
+            collections.deque()
+        self._buffer = bytearray()
+        self._dictionary = b""
+        self._crc = 0
+        self._size = 0
+        self._closed = False
+        self.fileobj.write(b"".join([
+            b"\x1f\x8b\x08\x00",
+            struct.pack("<I", int(time.time()) & 0xffffffff),
+            b"\x00\x03"
+        ]))
+
+    def write(self, data: bytes) -> int:
+        """Compress the data."""
+        self._buffer += data
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        while len(self._buffer) >= _GZIP_BLOCK_SIZE:
+            block = bytes(self._buffer[:_GZIP_BLOCK_SIZE])
+            del self._buffer[:_GZIP_BLOCK_SIZE]
+            self._submit(block, last=False)
+        return len(data)
+
+    def _submit(self, block: bytes, last: bool) -> None:
+        dictionary = self._dictionary
+        self._dictionary = block[-_GZIP_DICTIONARY_SIZE:]
+        self._pending.append(self._executor.submit(
+            _deflate_block,
+            block,
+            dictionary,
+            self.level,
+            last
+        ))
+        # limit the memory held by blocks waiting to be written
+        while len(self._pending) > (self.threads * 2):
+            self.fileobj.write(self._pending.popleft().result())
+
+    def close(self) -> None:
+        """Compress the remaining data and write the gzip trailer."""
+        if self._closed is True:
+            return
+        self._closed = True
+        try:
+            self._submit(bytes(self._buffer), last=True)
+            self._buffer = bytearray()
+            while len(self._pending) > 0:
+                self.fileobj.write(self._pending.popleft().result())
+            self.fileobj.write(struct.pack(
+                "<II",
+                self._crc & 0xffffffff,
+                self._size & 0xffffffff
+            ))
+        finally:
+            self._executor.shutdown(wait=True)
+
+
+class CommandCompressor:
+    """Compress data with a multi-threaded compression command."""
+
+    def __init__(
+        self,
+        command: typing.List[str],
+        fileobj: typing.BinaryIO,
+        logger: typing.Optional['libioc.Logger.Logger']=None
+    ) -> None:
+        self.logger = logger
+        self.command = command
+        self._process = subprocess.Popen(  # nosec: B603
+            command,
+            stdin=subprocess.PIPE,
+            stdout=fileobj,
+            stderr=subprocess.PIPE
+        )
+
+    def write(self, data: bytes) -> int:
+        """Pass the data to the compression command."""
+        stdin = self._process.stdin
+        if stdin is None:
+            raise ValueError("compression command has no stdin")
+        stdin.write(data)
+        return len(data)
+
+    def close(self) -> None:
+        """Wait for the compression command to finish."""
+        _, stderr = self._process.communicate()
+        if self._process.returncode > 0:
+            if (self.logger is not None) and stderr:
+                self.logger.error(stderr.decode("UTF-8").strip())
+            raise libioc.errors.CommandFailure(
+                returncode=self._process.returncode,
+                logger=self.logger
+            )
+
+
+class Codec:
+    """Compression codec of backup archives."""
+
+    name: str
+    extension: str
+    compression_format: str
+    default_level: int
+
+    def __init__(
+        self,
+        name: str,
+        extension: str,
+        compression_format: str,
+        default_level: int,
+        command: typing.Optional[str]=None
+    ) -> None:
+        self.name = name
+        self.extension = extension
+        self.compression_format = compression_format
+        self.default_level = default_level
+        self.command = command
+
+    @property
+    def available(self) -> bool:
+        """Return True when the codec can be used on this host."""
+        if self.command is None:
+            return True
+        return (shutil.which(self.command) is not None)
+
+    def open(
+        self,
+        fileobj: typing.BinaryIO,
+        level: typing.Optional[int]=None,
+        threads: typing.Optional[int]=None,
+        logger: typing.Optional['libioc.Logger.Logger']=None
+    ) -> typing.Union[ParallelGzipWriter, CommandCompressor]:
+        """Return a writer that compresses into the file object."""
+        level = self.default_level if (level is None) else level
+        threads = _default_threads() if (threads is None) else threads
+        if self.command is None:
+            return ParallelGzipWriter(fileobj, level=level, threads=threads)
+        fileobj.flush()
+        return CommandCompressor([
+            self.command,
+            f"-T{threads}",
+            f"-{level}",
+            "-c",
+            "-q"
+        ], fileobj, logger=logger)
+
+
+CODECS: typing.Dict[str, Codec] = dict(
+    gzip=Codec(
+        name="gzip",
+        extension=".tar.gz",
+        compression_format="gz",
+        default_level=6
+    ),
+    xz=Codec(
+        name="xz",
+        extension=".txz",
+        compression_format="xz",
+        default_level=6,
+        command="xz"
+    ),
+    zstd=Codec(
+        name="zstd",
+        extension=".tar.zst",
+        compression_format="zst",
+        default_level=3,
+        command="zstd"
+    )
+)
+
+# magic bytes at the start of the compressed archives
+_MAGIC_NUMBERS: typing.List[typing.Tuple[bytes, str]] = [
+    (b"\x1f\x8b", "gz",),
+    (b"\xfd7zXZ\x00", "xz",),
+    (b"\x28\xb5\x2f\xfd", "zst",)
+]
+
+
+def get_codec(
+    name: str,
+    logger: typing.Optional['libioc.Logger.Logger']=None
+) -> Codec:
+    """Return an available codec by its name."""
+    try:
+        codec = CODECS[name]
+    except KeyError:
+        raise libioc.errors.BackupCodecUnavailable(
+            codec=name,
+            reason="unknown codec",
+            logger=logger
+        )
+    if codec.available is False:
+        raise libioc.errors.BackupCodecUnavailable(
+            codec=name,
+            reason=f"{codec.command} was not found",
+            logger=logger
+        )
+    return codec
+
+
+def detect_compression_format(file: str) -> typing.Optional[str]:
+    """Return the compression format of an archive file."""
+    with open(file, "rb") as f:
+        head = f.read(6)
+    for magic_number, compression_format in _MAGIC_NUMBERS:
+        if head.startswith(magic_number) is True:
+            return compression_format
+    return None
+
+
+class _CountingWriter:
+
+    def __init__(self, fileobj: typing.Any) -> None:
+        self.fileobj = fileobj
+        self.bytes_written = 0
+
+    def write(self, data: bytes) -> int:
+        self.fileobj.write(data)
+        self.bytes_written += len(data)
+        return len(data)
+
+
+class BundleWriter:
+    """
+    Stream the assets of a backup into a compressed tar archive.
+
+    Assets are written as archive members right away, so that no staging
+    directory is required. ZFS send streams are read from a pipe and stored
+    in members of SEND_STREAM_PART_SIZE bytes, because the size of a tar
+    member needs to be known before its content is written. Streams that
+    fit into one part are stored as a single member with the given name;
+    longer streams are stored in members with a numeric suffix.
+    """
+
+    ZFS_COMMAND: str = "/sbin/zfs"
+
+    destination: str
+    codec: Codec
+    _tar: typing.Optional[tarfile.TarFile]
+
+    def __init__(
+        self,
+        destination: str,
+        codec: str="gzip",
+        level: typing.Optional[int]=None,
+        threads: typing.Optional[int]=None,
+        logger: typing.Optional['libioc.Logger.Logger']=None
+    ) -> None:
+        self.logger = libioc.helpers_object.init_logger(self, logger)
+        self.destination = destination
+        self.codec = get_codec(codec, logger=self.logger)
+        self.level = level
+        self.threads = threads
+        self._tar = None
+        self._started_at: typing.Optional[float] = None
+        self._stopped_at: typing.Optional[float] = None
+
+    def open(self) -> None:
+        """Create the archive file."""
+        self._file = open(self.destination, "wb")
+        self._compressor = self.codec.open(
+            self._file,
+            level=self.level,
+            threads=self.threads,
+            logger=self.logger
+        )
+        self._counter = _CountingWriter(self._compressor)
+        self._tar = tarfile.open(
+            fileobj=self._counter,  # noqa: T484
+            mode="w|",
+            format=tarfile.PAX_FORMAT
+        )
+        self._started_at = timer()
+
+    def close(self) -> None:
+        """Finish the archive file."""
+        if self._tar is None:
+            return
+        try:
+            self._tar.close()
+            self._compressor.close()
+        finally:
+            self._file.close()
+            self._tar = None
+            self._stopped_at = timer()
+
+    def __enter__(self) -> 'BundleWriter':
+        """Open the archive file when entering the context."""
+        self.open()
+        return self
+
+    def __exit__(self, *args: typing.Any) -> None:
+        """Close the archive file when leaving the context."""
+        self.close()
+
+    @property
+    def tar(self) -> tarfile.TarFile:
+        """Return the open tar stream."""
+        if self._tar is None:
+            raise ValueError("the backup bundle is not open")
+        return self._tar
+
+    @property
+    def bytes_written(self) -> int:
+        """Return the number of uncompressed bytes written."""
+        try:
+            return self._counter.bytes_written
+        except AttributeError:
+            return 0
+
+    @property
+    def compressed_bytes(self) -> int:
+        """Return the size of the archive file."""
+        try:
+            return os.path.getsize(self.destination)
+        except FileNotFoundError:
+            return 0
+
+    @property
+    def duration(self) -> typing.Optional[float]:
+        """Return the seconds the bundle is written or took."""
+        if self._started_at is None:
+            return None
+        if self._stopped_at is None:
+            return timer() - self._started_at
+        return self._stopped_at - self._started_at
+
+    @property
+    def throughput(self) -> typing.Optional[float]:
+        """Return the average number of uncompressed bytes per second."""
+        duration = self.duration
+        if (duration is None) or (duration <= 0):
+            return None
+        return self.bytes_written / duration
+
+    def add_bytes(self, name: str, data: bytes, mode: int=0o644) -> None:
+        """Add a file with the given content."""
+        tar_info = tarfile.TarInfo(f"./{name}")
+        tar_info.size = len(data)
+        tar_info.mode = mode
+        tar_info.mtime = int(time.time())
+        self.tar.addfile(tar_info, io.BytesIO(data))
+
+    def add_path(self, name: str, path: str, recursive: bool=True) -> None:
+        """Add a file or directory of the filesystem."""
+        self.tar.add(path, arcname=f"./{name}", recursive=recursive)
+
+    def add_stream(self, name: str, stream: typing.BinaryIO) -> int:
+        """
+        Add the data read from a stream.
+
+        Returns:
+
+            int: The number of archive members written.
+        """
+        part = 0
+        while True:
+            data = _read_exactly(stream, SEND_STREAM_PART_SIZE)
+            if (part == 0) and (len(data) < SEND_STREAM_PART_SIZE):
+                self.add_bytes(name, data, mode=0o600)
+                return 1
+            if len(data) == 0:
+                return part
+            self.add_bytes(f"{name}.{part:06d}", data, mode=0o600)
+            part += 1
+            if len(data) < SEND_STREAM_PART_SIZE:
+                return part
+
+    def add_snapshot(
+        self,
+        name: str,
+        snapshot_name: str,
+        flags: typing.Iterable[typing.Any]=[]
+    ) -> int:
+        """Add the ZFS send stream of a snapshot read through a pipe."""
+        command = [self.ZFS_COMMAND, "send"]
+        for flag in flags:
+            command.append(_SEND_FLAG_ARGUMENTS[flag.name])
+        command.append(snapshot_name)
+        self.logger.spam(f"Executing: {' '.join(command)}")
+        process = subprocess.Popen(  # nosec: B603
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        stdout = process.stdout
+        if stdout is None:
+            raise ValueError("zfs send has no stdout")
+        try:
+            parts = self.add_stream(name, stdout)
+        finally:
+            stdout.close()
+            _, stderr = process.communicate()
+        if process.returncode > 0:
+            self.logger.error(stderr.decode("UTF-8").strip())
+            raise libioc.errors.CommandFailure(
+                returncode=process.returncode,
+                logger=self.logger
+            )
+        return parts
+
+
+_SEND_FLAG_ARGUMENTS = dict(
+    REPLICATE="-R",
+    PROPS="-p",
+    LARGEBLOCK="-L",
+    EMBED_DATA="-e",
+    COMPRESS="-c"
+)
+
+
+def _read_exactly(stream: typing.BinaryIO, size: int) -> bytes:
+    chunks: typing.List[bytes] = []
+    remaining = size
+    while remaining > 0:
+        chunk = stream.read(min(remaining, _CHUNK_SIZE))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def list_stream_parts(directory: str, name: str) -> typing.List[str]:
+    """Return the files of a stream in the order they were written."""
+    single_file = f"{directory}/{name}"
+    if os.path.isfile(single_file) is True:
+        return [single_file]
+    parts: typing.List[str] = []
+    while True:
+        part_file = f"{single_file}.{len(parts):06d}"
+        if os.path.isfile(part_file) is False:
+            return parts
+        parts.append(part_file)
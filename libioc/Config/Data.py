@@ -24,21 +24,34 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """Internal data storage for BaseConfig objects."""
 import typing
-import collections.abc
 
 InputData = typing.Dict[str, typing.Any]
 
 
 class Data(dict):
-    """Internal data storage for BaseConfig objects."""
+    """
+    Internal data storage for BaseConfig objects.
+
+    Besides the nested dict structure an index of all flattened keys is
+    maintained, so that membership tests, lengths and key listings do not
+    require walking the whole structure. Nested Data objects propagate
+    changes of their index to the parent they are attached to.
+    """
 
     delimiter: str = "."
 
+    _index: typing.Dict[str, None]
+    _parent: typing.Optional['Data']
+    _parent_key: typing.Optional[str]
+
     def __init__(
         self,
         data: typing.Optional[InputData]=None
     ) -> None:
         dict.__init__(self)
+        self._index = {}
+        self._parent = None
+        self._parent_key = None
         if data is not None:
             for key, value in data.items():
                 self.__setitem__(key, value)
@@ -75,39 +88,86 @@ class Data(dict):
             if self.delimiter not in key:
                 if isinstance(value, dict) and not isinstance(value, Data):
                     value = Data(value)
-                dict.__setitem__(data, key, value)
+                Data.__set_local(data, key, value)
                 return
             else:
                 keys = dict.keys(data)
                 current, key = key.split(self.delimiter, maxsplit=1)
                 if current not in keys:
-                    dict.__setitem__(data, current, Data())
+                    Data.__set_local(data, current, Data())
                 data = data[current]
 
+    def __set_local(self, key: str, value: typing.Any) -> None:
+        """Set an item of this level and update the index."""
+        if dict.__contains__(self, key) is True:
+            current_value = dict.__getitem__(self, key)
+            if isinstance(current_value, Data) or isinstance(value, Data):
+                self.__delete_local(key)
+        dict.__setitem__(self, key, value)
+        if isinstance(value, Data) is True:
+            value._parent = self
+            value._parent_key = key
+            for subkey in value._index:
+                self.__index_add(f"{key}{self.delimiter}{subkey}")
+        else:
+            self.__index_add(key)
+
+    def __delete_local(self, key: str) -> None:
+        """Delete an item of this level and update the index."""
+        current_value = dict.__getitem__(self, key)
+        dict.__delitem__(self, key)
+        if isinstance(current_value, Data) is True:
+            for subkey in current_value._index:
+                self.__index_remove(f"{key}{self.delimiter}{subkey}")
+            current_value._parent = None
+            current_value._parent_key = None
+        else:
+            self.__index_remove(key)
+
+    def __index_add(self, key: str) -> None:
+        data: typing.Optional[Data] = self
+        while data is not None:
+            data._index[key] = None
+            key = f"{data._parent_key}{self.delimiter}{key}"
+            data = data._parent
+
+    def __index_remove(self, key: str) -> None:
+        data: typing.Optional[Data] = self
+        while data is not None:
+            data._index.pop(key, None)
+            key = f"{data._parent_key}{self.delimiter}{key}"
+            data = data._parent
+
+    def __reduce__(self) -> typing.Tuple[typing.Any, ...]:
+        """Rebuild copies from the nested structure to get their own index."""
+        return (self.__class__, (self.nested,))
+
     def __contains__(self, key: typing.Any) -> bool:
         """Return whether a (nested) key is included in the dict."""
         if isinstance(key, str) is False:
             return False
+        if key in self._index:
+            return True
+        # nested dictionaries are not part of the flat index
         data = self
         while True:
             keys = dict.keys(data)
             try:
                 i = key.index(self.delimiter)
             except ValueError:
-                return any((
-                    (key in keys) is True,
-                    (key in dict.keys(data)) is True
-                ))
+                return (key in keys) is True
 
             current = key[0:i]
             if current not in keys:
                 return False
             key = key[(i + 1):]
             data = dict.__getitem__(data, current)
+            if isinstance(data, dict) is False:
+                return False
 
     def __len__(self) -> int:
         """Return the number of items in the flattened structure."""
-        return len(self.keys())
+        return len(self._index)
 
     def __delitem__(self, key: str) -> None:
         """Delete the key from the (nested) structure."""
@@ -117,10 +177,10 @@ class Data(dict):
         marked_key = None
         while len(key) > 0:
             if self.delimiter not in key:
-                dict.__delitem__(data, key)
+                data.__delete_local(key)
                 if (marked_data is not None) and (marked_key is not None):
                     # delete empty parent dictionary afterwards
-                    dict.__delitem__(marked_data, marked_key)
+                    marked_data.__delete_local(marked_key)
 
                 return
             else:
@@ -143,7 +203,7 @@ class Data(dict):
 
     def keys(self) -> typing.KeysView[str]:
         """Return the available configuration keys."""
-        return collections.abc.KeysView(list(self.__iter__()))  # noqa: T484
+        return self._index.keys()
 
     def values(self) -> typing.ValuesView[typing.Any]:
         """Return all config values."""
@@ -161,13 +221,7 @@ class Data(dict):
 
     def __iter__(self) -> typing.Iterator[str]:
         """Return the flattened dict iterator."""
-        for key in dict.__iter__(self):
-            value = dict.__getitem__(self, key)
-            if isinstance(value, Data) is True:
-                for subkey in value.__iter__():
-                    yield f"{key}.{subkey}"
-            else:
-                yield key
+        return iter(self._index)
 
     @property
     def nested(self) -> dict:
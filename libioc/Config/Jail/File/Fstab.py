@@ -31,11 +31,16 @@ import re
 
 import libioc.helpers
 import libioc.helpers_object
+import libioc.MountTable
 import libioc.Types
 import libioc.Config.Jail
 import libioc.Config.Jail.File
 import libioc.Storage.Basejail
 
+# A field is a sequence of non-whitespace or backslash-escaped whitespace
+_FIELD_PATTERN = re.compile(r"(?:\\\s+|\S)+")
+_ESCAPED_WHITESPACE_PATTERN = re.compile(r"\\\s+")
+
 
 class FstabFsSpec(libioc.Types.AbsolutePath):
     """Enforces an AbsolutePath or special device name."""
@@ -168,6 +173,10 @@ class Fstab(collections.MutableSequence):
         FstabCommentLine,
         FstabAutoPlaceholderLine
     ]]
+    _destinations: typing.Dict[
+        typing.Optional[str],
+        typing.List[typing.Union[FstabLine, FstabAutoPlaceholderLine]]
+    ]
 
     def __init__(
         self,
@@ -177,6 +186,7 @@ class Fstab(collections.MutableSequence):
     ) -> None:
 
         self._lines = []
+        self._destinations = {}
         self.logger = libioc.helpers_object.init_logger(self, logger)
         self.host = libioc.helpers_object.init_host(self, host)
         self.file = file
@@ -212,11 +222,12 @@ class Fstab(collections.MutableSequence):
             exclude_destinations:
                 List of destination strings that is skipped
         """
-        list.clear(self._lines)
+        self._clear_lines()
 
         line: str
         comment: typing.Optional[str]
         auto_comment_found: bool = False
+        _skip_destinations = set(skip_destinations)
 
         for line in input_text.rstrip("\n").splitlines():
             if _is_comment_line(line) or _is_empty_line(line):
@@ -240,16 +251,10 @@ class Fstab(collections.MutableSequence):
             except ValueError:
                 comment = None
 
-            line = line.strip()
-
-            if line == "":
+            fragments = _tokenize(line)
+            if len(fragments) == 0:
                 continue
 
-            line = re.sub(r"\s\s*", " ", line)
-            line = re.sub(r"([^\\\\])\s", r"\g<1>\n", line)
-            line = line.replace("\\ ", " ")
-
-            fragments = line.splitlines()
             if len(fragments) != 6:
                 self.logger.log(
                     f"Invalid line in fstab file {self.path}"
@@ -257,10 +262,10 @@ class Fstab(collections.MutableSequence):
                 )
                 continue
 
-            source = fragments[0].strip()
-            destination = fragments[1].strip()
+            source = fragments[0]
+            destination = fragments[1]
 
-            if destination in skip_destinations:
+            if destination in _skip_destinations:
                 continue
 
             destination = self.__replace_magic_path(destination)
@@ -382,7 +387,7 @@ class Fstab(collections.MutableSequence):
                 f"or FstabAutoPlaceholderLine, but was {type(line).__name__}"
             )
 
-        self._lines.append(line)
+        self._append_line(line)
         return line
 
     def index(
@@ -396,16 +401,13 @@ class Fstab(collections.MutableSequence):
         end: typing.Optional[int]=None
     ) -> int:
         """Find the index position of a FstabLine in the Fstab instance."""
-        i: int = 0
-        items = list(self)
+        line_hash = hash(line)
         start = 0 if (start is None) else start
-        end = (len(items) - 1) if (end is None) else end
-        for existing_line in items:
-            if (i >= start) and (hash(existing_line) == hash(line)):
-                return i
-            i += 1
-            if (i > end):
+        for i, existing_line in enumerate(self):
+            if (end is not None) and (i > end):
                 break
+            if (i >= start) and (hash(existing_line) == line_hash):
+                return i
         raise ValueError("Fstab line does not exist")
 
     def __contains__(  # noqa: T484
@@ -417,11 +419,9 @@ class Fstab(collections.MutableSequence):
         ]
     ) -> bool:
         """Return True when the FstabLine already exists."""
-        try:
-            self.index(line)
-            return True
-        except ValueError:
+        if isinstance(line, FstabCommentLine):
             return False
+        return (_get_index_key(line) in self._destinations) is True
 
     def __str__(self) -> str:
         """Return the entire content of the fstab file as string."""
@@ -444,7 +444,7 @@ class Fstab(collections.MutableSequence):
             f"Deleting fstab entry: {source} -> {destination}"
         )
         real_index = self._get_real_index(index)
-        self._lines.__delitem__(real_index)
+        self._remove_line(real_index)
 
     def __getitem__(self, index: int) -> typing.Union[  # noqa: T484
         FstabLine,
@@ -465,7 +465,7 @@ class Fstab(collections.MutableSequence):
     ) -> None:
         """Set or overwrite the FstabLine at the given index."""
         real_index = self._get_real_index(index)
-        self._lines.__setitem__(real_index, value)
+        self._replace_line(real_index, value)
 
     def insert(
         self,
@@ -499,7 +499,87 @@ class Fstab(collections.MutableSequence):
         else:
             real_index = self._get_real_index(index)
 
-        self._lines.insert(real_index, value)
+        self._insert_line(real_index, value)
+
+    def _clear_lines(self) -> None:
+        self._lines.clear()
+        self._destinations.clear()
+
+    def _append_line(
+        self,
+        line: typing.Union[
+            FstabLine,
+            FstabCommentLine,
+            FstabAutoPlaceholderLine
+        ]
+    ) -> None:
+        self._lines.append(line)
+        self._index_line(line)
+
+    def _insert_line(
+        self,
+        real_index: int,
+        line: typing.Union[
+            FstabLine,
+            FstabCommentLine,
+            FstabAutoPlaceholderLine
+        ]
+    ) -> None:
+        self._lines.insert(real_index, line)
+        self._index_line(line)
+
+    def _replace_line(
+        self,
+        real_index: int,
+        line: typing.Union[
+            FstabLine,
+            FstabCommentLine,
+            FstabAutoPlaceholderLine
+        ]
+    ) -> None:
+        self._unindex_line(self._lines[real_index])
+        self._lines[real_index] = line
+        self._index_line(line)
+
+    def _remove_line(self, real_index: int) -> None:
+        self._unindex_line(self._lines.pop(real_index))
+
+    def _index_line(
+        self,
+        line: typing.Union[
+            FstabLine,
+            FstabCommentLine,
+            FstabAutoPlaceholderLine
+        ]
+    ) -> None:
+        if isinstance(line, FstabCommentLine):
+            return
+        key = _get_index_key(line)
+        self._destinations.setdefault(key, []).append(line)
+
+    def _unindex_line(
+        self,
+        line: typing.Union[
+            FstabLine,
+            FstabCommentLine,
+            FstabAutoPlaceholderLine
+        ]
+    ) -> None:
+        if isinstance(line, FstabCommentLine):
+            return
+        key = _get_index_key(line)
+        indexed_lines = self._destinations.get(key, [])
+        for i, indexed_line in enumerate(indexed_lines):
+            if indexed_line is line:
+                del indexed_lines[i]
+                break
+        if len(indexed_lines) == 0:
+            self._destinations.pop(key, None)
+
+    def _rebuild_index(self) -> None:
+        self._destinations.clear()
+        for line in self._lines:
+            self._index_line(line)
 
     def _get_real_index(self, index: int) -> int:
         target_line = list(self.__iter__())[index]
@@ -538,6 +618,7 @@ class Fstab(collections.MutableSequence):
                 replacement
             )
             self._lines[i] = line
+        self._rebuild_index()
 
 
 class JailFstab(Fstab):
@@ -585,7 +666,7 @@ class JailFstab(Fstab):
         """
         BasejailStorage = libioc.Storage.Basejail.BasejailStorage
         if isinstance(self.jail.storage_backend, BasejailStorage) is True:
-            skip_destinations += list(map(
+            skip_destinations = skip_destinations + list(map(
                 lambda x: str(x[1]),
                 self.jail.storage_backend.basejail_mounts
             ))
@@ -739,7 +820,7 @@ class JailFstab(Fstab):
                     f"{_source} mounted to running jail {_jail_name}"
                 )
 
-        self._lines.append(line)
+        self._append_line(line)
         return line
 
     def update_release(
@@ -769,7 +850,7 @@ class JailFstab(Fstab):
             f"Deleting fstab entry: {source} -> {destination}"
         )
         real_index = self._get_real_index(index)
-        self._lines.__delitem__(real_index)
+        self._remove_line(real_index)
 
         if self.jail.running is True:
             self.logger.verbose(
@@ -783,22 +864,37 @@ class JailFstab(Fstab):
 
     def mount(
         self,
-        event_scope: typing.Optional['libioc.events.Scope']=None
+        event_scope: typing.Optional['libioc.events.Scope']=None,
+        mount_table: typing.Optional['libioc.MountTable.MountTable']=None
     ) -> typing.Generator['libioc.events.MountFstab', None, None]:
-        """Mount all fstab entries to the jail."""
+        """
+        Mount all fstab entries to the jail.
+
+        Args:
+
+            event_scope (libioc.events.Scope): (optional)
+                Pass on the IocEvent stack for use in higher order functions.
+
+            mount_table (libioc.MountTable.MountTable): (optional)
+                Share a snapshot of the mounted filesystems with other
+                operations. A new snapshot is taken when none is given.
+        """
         event = libioc.events.MountFstab(
             jail=self.jail,
             scope=event_scope
         )
         yield event.begin()
+        if mount_table is None:
+            mount_table = libioc.MountTable.MountTable(logger=self.logger)
         try:
-            list(self.unmount())
+            list(self.unmount(mount_table=mount_table))
             for line in [x for x in self if isinstance(x, FstabLine)]:
                 libioc.helpers.mount(
                     destination=line["destination"],
                     source=line["source"],
                     fstype=line["type"],
-                    opts=[x.strip() for x in line["options"].split(",")]
+                    opts=[x.strip() for x in line["options"].split(",")],
+                    mount_table=mount_table
                 )
         except Exception as e:
             yield event.fail(e)
@@ -807,20 +903,38 @@ class JailFstab(Fstab):
 
     def unmount(
         self,
-        event_scope: typing.Optional['libioc.events.Scope']=None
+        event_scope: typing.Optional['libioc.events.Scope']=None,
+        mount_table: typing.Optional['libioc.MountTable.MountTable']=None
     ) -> typing.Generator['libioc.events.MountFstab', None, None]:
-        """Unmount all fstab entries from the jail."""
+        """
+        Unmount all fstab entries from the jail.
+
+        Args:
+
+            event_scope (libioc.events.Scope): (optional)
+                Pass on the IocEvent stack for use in higher order functions.
+
+            mount_table (libioc.MountTable.MountTable): (optional)
+                Share a snapshot of the mounted filesystems with other
+                operations. A new snapshot is taken when none is given.
+        """
         event = libioc.events.MountFstab(
             jail=self.jail,
             scope=event_scope
         )
         yield event.begin()
+        if mount_table is None:
+            mount_table = libioc.MountTable.MountTable(logger=self.logger)
         has_unmounted_any = False
         try:
             for line in [x for x in self if isinstance(x, FstabLine)]:
-                if os.path.ismount(line["destination"]) is False:
+                if mount_table.is_mounted(line["destination"]) is False:
                     continue
-                libioc.helpers.umount(line["destination"], force=True)
+                libioc.helpers.umount(
+                    line["destination"],
+                    force=True,
+                    mount_table=mount_table
+                )
                 has_unmounted_any = True
         except Exception as e:
             yield event.fail(e)
@@ -832,6 +946,27 @@ class JailFstab(Fstab):
             yield event.end()
 
 
+def _tokenize(text: str) -> typing.List[str]:
+    """Split a fstab line into its whitespace separated fields."""
+    fragments = _FIELD_PATTERN.findall(text)
+    if "\\" not in text:
+        return fragments
+    return [_ESCAPED_WHITESPACE_PATTERN.sub(" ", x) for x in fragments]
+
+
+def _get_index_key(
+    line: typing.Union[
+        'FstabLine',
+        'FstabCommentLine',
+        'FstabAutoPlaceholderLine'
+    ]
+) -> typing.Optional[str]:
+    """Return the key a line is indexed with (its destination)."""
+    if isinstance(line, FstabLine):
+        return str(line["destination"])
+    return None
+
+
 def _is_comment_line(text: str) -> bool:
     return text.strip().startswith("#") is True
 
@@ -30,6 +30,7 @@ import libioc.Config.Prototype
 import libioc.Config.Dataset
 import libioc.Resource
 import libioc.errors
+import libioc.helpers
 
 
 ZFS_PROPERTY_PREFIX = "org.freebsd.iocage:"
@@ -49,10 +50,61 @@ def get_iocage_property_name(zfs_property_name: str) -> str:
     return zfs_property_name[len(ZFS_PROPERTY_PREFIX):]
 
 
+def read_iocage_properties(
+    dataset: libzfs.ZFSDataset
+) -> typing.Dict[str, str]:
+    """
+    Return the iocage configuration properties of a dataset.
+
+    Each access of libzfs dataset properties fetches all properties of the
+    dataset, so that they are read only once.
+    """
+    data: typing.Dict[str, str] = {}
+    for name, prop in dataset.properties.items():
+        if is_iocage_property(name):
+            data[get_iocage_property_name(name)] = prop.value
+    return data
+
+
+class ZFSPropertyReader(dict):
+    """
+    Batched reader of the iocage properties of all children of a dataset.
+
+    The properties of all child datasets (for example RootDatasets.jails)
+    are fetched in a single pass on first access and cached until the
+    reader is discarded, typically after listing resources.
+    """
+
+    parent: libzfs.ZFSDataset
+    _loaded: bool
+
+    def __init__(self, parent: libzfs.ZFSDataset) -> None:
+        self.parent = parent
+        self._loaded = False
+        dict.__init__(self, {})
+
+    def load(self) -> None:
+        """Read the iocage properties of all child datasets."""
+        self.clear()
+        for child in self.parent.children:
+            self[child.name] = read_iocage_properties(child)
+        self._loaded = True
+
+    def read(self, dataset_name: str) -> typing.Dict[str, str]:
+        """Return the iocage properties of a child dataset."""
+        if self._loaded is False:
+            self.load()
+        try:
+            return dict(self[dataset_name])
+        except KeyError:
+            return {}
+
+
 class BaseConfigZFS(libioc.Config.Dataset.DatasetConfig):
     """ioc configuration stored in ZFS properties."""
 
     config_type = "zfs"
+    _properties: typing.Optional[typing.Dict[str, str]] = None
 
     def read(self) -> dict:
         """Read the configuration from the ZFS dataset."""
@@ -66,10 +118,17 @@ class BaseConfigZFS(libioc.Config.Dataset.DatasetConfig):
             }
 
     def write(self, data: dict) -> None:
-        """Write changes to ZFS properties of the dataset."""
+        """
+        Write changes to ZFS properties of the dataset.
+
+        Only changed properties are written, all of them at once.
+        """
+        current_data = read_iocage_properties(self.dataset)
         output_data = {}
         for key, value in data.items():
-            output_data[key] = self._to_string(value)
+            output_value = self._to_string(value)
+            if current_data.get(key) != output_value:
+                output_data[key] = output_value
 
         # ToDo: Delete unnecessary ZFS options
         # existing_property_names = list(
@@ -85,12 +144,14 @@ class BaseConfigZFS(libioc.Config.Dataset.DatasetConfig):
         #   if not existing_property_name in data_keys:
         #     pass
 
-        for key, value in output_data.items():
-            prop_name = f"{ZFS_PROPERTY_PREFIX}{key}"
-            prop = libzfs.ZFSUserProperty(
-                self._to_string(value)
-            )
-            self.dataset.properties[prop_name] = prop
+        self._properties = None
+        if len(output_data) == 0:
+            return
+
+        self.dataset.update_properties(dict([
+            (f"{ZFS_PROPERTY_PREFIX}{key}", libzfs.ZFSUserProperty(value),)
+            for key, value in output_data.items()
+        ]))
 
     def map_input(
         self,
@@ -125,19 +186,12 @@ class BaseConfigZFS(libioc.Config.Dataset.DatasetConfig):
         """Signal if iocage ZFS configuration properties were found."""
         if self.dataset is None:
             return False
-        for prop in self.dataset.properties:
-            if is_iocage_property(prop):
-                return True
-
-        return False
+        return (len(self._read_properties()) > 0) is True
 
     def _read_properties(self) -> dict:
-        data = {}
-        for prop in self.dataset.properties:
-            if is_iocage_property(prop):
-                name = get_iocage_property_name(prop)
-                data[name] = self.dataset.properties[prop].value
-        return data
+        if self._properties is None:
+            self._properties = read_iocage_properties(self.dataset)
+        return dict(self._properties)
 
 
 class DatasetConfigZFS(BaseConfigZFS):
@@ -147,9 +201,20 @@ class DatasetConfigZFS(BaseConfigZFS):
         self,
         dataset: libzfs.ZFSDataset,
         file: typing.Optional[str]=None,
-        logger: typing.Optional['libioc.Logger.Logger']=None
+        logger: typing.Optional['libioc.Logger.Logger']=None,
+        properties: typing.Optional[typing.Dict[str, str]]=None
     ) -> None:
+        """
+        Initialize the ZFS property config of a dataset.
+
+        Args:
+
+            properties (dict): (optional)
+                The iocage properties of the dataset when they were read
+                already (for example by a ZFSPropertyReader).
+        """
         self._dataset = dataset
+        self._properties = properties
         libioc.Config.Dataset.DatasetConfig.__init__(
             self,
             file=file,
@@ -0,0 +1,392 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# Copyright (c) 2014-2018, iocage
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""ioc delta of a ZFS dataset between two of its snapshots."""
+import typing
+import json
+import os
+import os.path
+import re
+import shutil
+import stat
+
+import libioc.errors
+import libioc.helpers
+import libioc.helpers_object
+
+# zfs diff escapes whitespace and special bytes as \<4 octal digits>
+_ESCAPED_BYTE_PATTERN = re.compile(rb"\\([0-7]{4})")
+
+_DIRECTORY = "/"
+
+
+def _unescape(value: str) -> str:
+    raw = _ESCAPED_BYTE_PATTERN.sub(
+        lambda match: bytes([int(match.group(1), 8)]),
+        value.encode("UTF-8")
+    )
+    return raw.decode("UTF-8", errors="surrogateescape")
+
+
+class DatasetChange:
+    """Single change reported by zfs diff."""
+
+    __slots__ = ("change_type", "file_type", "path", "new_path",)
+
+    change_type: str
+    file_type: str
+    path: str
+    new_path: typing.Optional[str]
+
+    def __init__(
+        self,
+        change_type: str,
+        file_type: str,
+        path: str,
+        new_path: typing.Optional[str]=None
+    ) -> None:
+        self.change_type = change_type
+        self.file_type = file_type
+        self.path = path
+        self.new_path = new_path
+
+    @property
+    def is_directory(self) -> bool:
+        """Return True when the changed file is a directory."""
+        return (self.file_type == _DIRECTORY) is True
+
+    def __repr__(self) -> str:
+        """Return a string representation of the change."""
+        path = self.path
+        if self.new_path is not None:
+            path += f" -> {self.new_path}"
+        return f"<{self.__class__.__name__} {self.change_type} {path}>"
+
+
+class DatasetDelta:
+    """
+    Changed files of a dataset between its origin and a later snapshot.
+
+    The changes are listed by ZFS, so that the work needed to export a delta
+    grows with the number of changed files instead of the dataset size.
+    Added, modified and renamed files are copied from the later snapshot,
+    while removed and renamed files are recorded in a deletion manifest.
+    """
+
+    ZFS_COMMAND: str = "/sbin/zfs"
+
+    from_snapshot: str
+    to_snapshot: str
+    mountpoint: str
+    source_root: str
+    excludes: typing.List[str]
+
+    def __init__(
+        self,
+        from_snapshot: str,
+        to_snapshot: str,
+        mountpoint: str,
+        source_root: typing.Optional[str]=None,
+        excludes: typing.List[str]=[],
+        logger: typing.Optional['libioc.Logger.Logger']=None
+    ) -> None:
+        """
+        Initialize a DatasetDelta.
+
+        Args:
+
+            from_snapshot (str):
+                The full name of the earlier snapshot, for instance the
+                origin of a cloned dataset.
+
+            to_snapshot (str):
+                The full name of the later snapshot of the dataset.
+
+            mountpoint (str):
+                The mountpoint of the dataset that zfs diff reports paths in.
+
+            source_root (str): (optional)
+                Files are copied from this directory. Defaults to the
+                to_snapshot directory below the mountpoint.
+
+            excludes (list of str): (optional)
+                Paths relative to the mountpoint that are not exported.
+        """
+        self.logger = libioc.helpers_object.init_logger(self, logger)
+        self.from_snapshot = from_snapshot
+        self.to_snapshot = to_snapshot
+        self.mountpoint = mountpoint.rstrip("/")
+        if source_root is None:
+            snapshot_name = to_snapshot.split("@", maxsplit=1)[1]
+            source_root = f"{self.mountpoint}/.zfs/snapshot/{snapshot_name}"
+        self.source_root = source_root
+        self.excludes = [x.strip("/") for x in excludes]
+
+    def read_changes(self) -> typing.List[DatasetChange]:
+        """List the changes between both snapshots with zfs diff."""
+        stdout, stderr, returncode = libioc.helpers.exec(
+            [
+                self.ZFS_COMMAND,
+                "diff",
+                "-H",
+                "-F",
+                self.from_snapshot,
+                self.to_snapshot
+            ],
+            logger=self.logger,
+            ignore_error=True
+        )
+        if returncode > 0:
+            raise libioc.errors.DatasetDiffUnavailable(
+                from_snapshot=self.from_snapshot,
+                to_snapshot=self.to_snapshot,
+                reason=stderr,
+                logger=self.logger
+            )
+
+        changes: typing.List[DatasetChange] = []
+        for line in (stdout or "").splitlines():
+            fields = line.split("\t")
+            if len(fields) < 3:
+                continue
+            changes.append(DatasetChange(
+                change_type=fields[0],
+                file_type=fields[1],
+                path=_unescape(fields[2]),
+                new_path=(_unescape(fields[3]) if len(fields) > 3 else None)
+            ))
+        return changes
+
+    def _get_relative_path(self, path: str) -> typing.Optional[str]:
+        prefix = f"{self.mountpoint}/"
+        if path.startswith(prefix) is False:
+            return None
+        relative_path = path[len(prefix):].strip("/")
+        if relative_path == "":
+            return None
+        for exclude in self.excludes:
+            if (relative_path == exclude) or \
+                    relative_path.startswith(f"{exclude}/"):
+                return None
+        return relative_path
+
+    def read_delta(
+        self
+    ) -> typing.Tuple[typing.List[typing.Tuple[str, bool]], typing.List[str]]:
+        """
+        Return the paths to export and the deleted paths.
+
+        The paths to export are sorted, so that parent directories precede
+        their content. Each path comes with a flag whether the content of a
+        directory needs to be exported recursively.
+        """
+        deleted: typing.Set[str] = set()
+        copies: typing.Dict[str, bool] = {}
+        for change in self.read_changes():
+            path = self._get_relative_path(change.path)
+            if change.change_type == "-":
+                if path is not None:
+                    deleted.add(path)
+            elif change.change_type in ("+", "M",):
+                if path is not None:
+                    copies[path] = False
+            elif change.change_type == "R":
+                if path is not None:
+                    deleted.add(path)
+                new_path = self._get_relative_path(change.new_path or "")
+                if new_path is not None:
+                    # the content of renamed directories is not listed
+                    copies[new_path] = change.is_directory
+
+        # parent directories are exported with their attributes
+        for path in list(copies.keys()):
+            fragments = path.split("/")[:-1]
+            for i in range(len(fragments)):
+                copies.setdefault("/".join(fragments[:(i + 1)]), False)
+
+        return sorted(copies.items()), sorted(deleted)
+
+    def export(
+        self,
+        destination: str,
+        manifest_file: str
+    ) -> typing.Tuple[int, int]:
+        """
+        Copy the changed files and record deleted files.
+
+        Args:
+
+            destination (str):
+                The directory the changed files are copied to.
+
+            manifest_file (str):
+                The JSON file that lists deleted paths.
+
+        Returns:
+
+            tuple(int, int): The number of copied and deleted paths.
+        """
+        copies, deleted = self.read_delta()
+
+        copier = _DeltaCopier(self.source_root, destination)
+        for path, recursive in copies:
+            copier.copy(path, recursive=recursive)
+        copier.finish()
+
+        with open(manifest_file, "w", encoding="UTF-8") as f:
+            f.write(get_manifest(deleted))
+
+        self.logger.verbose(
+            f"Dataset delta of {self.to_snapshot}: "
+            f"{len(copies)} changed, {len(deleted)} deleted"
+        )
+        return (len(copies), len(deleted),)
+
+
+def get_manifest(deleted: typing.List[str]) -> str:
+    """Return the JSON manifest of deleted paths."""
+    return json.dumps(dict(deleted=sorted(deleted)))
+
+
+class _DeltaCopier:
+    """Copy files with their metadata and hard links."""
+
+    def __init__(self, source_root: str, destination: str) -> None:
+        self.source_root = source_root
+        self.destination = destination
+        self._directories: typing.List[typing.Tuple[str, os.stat_result]] = []
+        self._inodes: typing.Dict[typing.Tuple[int, int], str] = {}
+
+    def copy(self, path: str, recursive: bool) -> None:
+        source = f"{self.source_root}/{path}"
+        try:
+            source_stat = os.lstat(source)
+        except FileNotFoundError:
+            return
+        target = f"{self.destination}/{path}"
+        self._copy(source, target, source_stat, recursive)
+
+    def finish(self) -> None:
+        # directory times change when their content is written
+        for path, source_stat in reversed(self._directories):
+            self._copy_metadata(path, source_stat)
+
+    def _copy(
+        self,
+        source: str,
+        target: str,
+        source_stat: os.stat_result,
+        recursive: bool
+    ) -> None:
+        mode = source_stat.st_mode
+        if stat.S_ISDIR(mode):
+            if os.path.isdir(target) is False:
+                os.mkdir(target)
+            self._directories.append((target, source_stat,))
+            if recursive is True:
+                for entry in os.scandir(source):
+                    self._copy(
+                        entry.path,
+                        f"{target}/{entry.name}",
+                        entry.stat(follow_symlinks=False),
+                        recursive=True
+                    )
+            return
+
+        if os.path.lexists(target) is True:
+            os.unlink(target)
+
+        if stat.S_ISLNK(mode):
+            os.symlink(os.readlink(source), target)
+        elif stat.S_ISREG(mode):
+            inode = (source_stat.st_dev, source_stat.st_ino,)
+            if (source_stat.st_nlink > 1) and (inode in self._inodes):
+                os.link(self._inodes[inode], target)
+                return
+            shutil.copyfile(source, target, follow_symlinks=False)
+            if source_stat.st_nlink > 1:
+                self._inodes[inode] = target
+        elif stat.S_ISCHR(mode) or stat.S_ISBLK(mode) or stat.S_ISFIFO(mode):
+            os.mknod(target, mode, source_stat.st_rdev)
+        else:
+            # sockets cannot be copied
+            return
+        self._copy_metadata(target, source_stat)
+
+    def _copy_metadata(self, target: str, source_stat: os.stat_result) -> None:
+        try:
+            os.lchown(target, source_stat.st_uid, source_stat.st_gid)
+        except PermissionError:
+            pass
+        if stat.S_ISLNK(source_stat.st_mode) is False:
+            os.chmod(target, stat.S_IMODE(source_stat.st_mode))
+        if os.utime in os.supports_follow_symlinks:
+            os.utime(
+                target,
+                ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns),
+                follow_symlinks=False
+            )
+        elif stat.S_ISLNK(source_stat.st_mode) is False:
+            os.utime(
+                target,
+                ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns)
+            )
+
+
+def remove_deleted_files(
+    root: str,
+    manifest_file: str,
+    logger: typing.Optional['libioc.Logger.Logger']=None
+) -> int:
+    """
+    Delete the paths listed in a manifest written by DatasetDelta.export.
+
+    Paths that point outside of the root directory are ignored.
+
+    Returns:
+
+        int: The number of deleted paths.
+    """
+    with open(manifest_file, "r", encoding="UTF-8") as f:
+        deleted_paths = json.load(f)["deleted"]
+
+    real_root = os.path.realpath(root)
+    count = 0
+    for path in sorted(deleted_paths, reverse=True):
+        target = os.path.normpath(f"{real_root}/{path}")
+        parent = os.path.realpath(os.path.dirname(target))
+        if (parent != real_root) and \
+                (parent.startswith(f"{real_root}/") is False):
+            if logger is not None:
+                logger.warn(f"Skipping deletion outside of {root}: {path}")
+            continue
+        target = f"{parent}/{os.path.basename(target)}"
+        if os.path.lexists(target) is False:
+            continue
+        if os.path.isdir(target) and (os.path.islink(target) is False):
+            shutil.rmtree(target)
+        else:
+            os.unlink(target)
+        count += 1
+    return count
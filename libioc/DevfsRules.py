@@ -24,8 +24,12 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """ioc module for host devfs rule configuration."""
 import typing
+import contextlib
 import os.path
 import re
+import shlex
+import tempfile
+import threading
 
 import libioc.errors
 import libioc.helpers
@@ -140,19 +144,31 @@ class DevfsRuleset(list):
         output = [ruleset_line] + [str(x) for x in self]
         return "\n".join(output) + "\n"
 
+    @property
+    def content_key(self) -> typing.Tuple[str, ...]:
+        """Return a hashable key that identifies the rules of the ruleset."""
+        return tuple(self)
+
 
 class DevfsRules(list):
     """
     Abstraction for the hosts /etc/devfs.rules.
 
-    Read and edit devfs rules in a programmatic way.
-    Restart the devfs service after applying changes.
+    Read and edit devfs rules in a programmatic way. New rulesets are loaded
+    into the kernel individually with load_ruleset(), so that the devfs
+    service does not need to be restarted.
     """
 
+    DEVFS_COMMAND: str = "/sbin/devfs"
+
     _rules_file: str
     _ruleset_number_index: typing.Dict[int, int]
     _ruleset_name_index: typing.Dict[str, int]
+    _ruleset_content_index: typing.Dict[typing.Tuple[str, ...], int]
     _system_rule_lines: typing.List[int]
+    _batch_depth: int
+    _save_pending: bool
+    lock: threading.RLock
 
     def __init__(
         self,
@@ -172,9 +188,17 @@ class DevfsRules(list):
         """
         self.logger = logger
 
+        # serializes lookups and additions of jails started in parallel
+        self.lock = threading.RLock()
+
         # index rulesets to find duplicated and provide easy access
         self._ruleset_number_index = {}
         self._ruleset_name_index = {}
+        self._ruleset_content_index = {}
+
+        # writing the file is deferred while changes are batched
+        self._batch_depth = 0
+        self._save_pending = False
 
         # remember all lines that were loaded from defaults (system)
         self._system_rule_lines = []
@@ -231,6 +255,10 @@ class DevfsRules(list):
         # build indexes
         self._ruleset_number_index[ruleset.number] = next_line_index
         self._ruleset_name_index[ruleset.name] = next_line_index
+        self._ruleset_content_index.setdefault(
+            ruleset.content_key,
+            next_line_index
+        )
         if is_system_rule is True:
             self._system_rule_lines.append(next_line_index)
 
@@ -271,6 +299,50 @@ class DevfsRules(list):
         ruleset = self[index[rule_number]]  # type: DevfsRuleset
         return ruleset
 
+    def find_by_rules(
+        self,
+        ruleset: DevfsRuleset
+    ) -> typing.Optional[DevfsRuleset]:
+        """Find the first ruleset with the same rules regardless its name."""
+        index = self._ruleset_content_index.get(ruleset.content_key)
+        if index is None:
+            return None
+        existing_ruleset = self[index]  # type: DevfsRuleset
+        return existing_ruleset
+
+    def __contains__(self, value: typing.Any) -> bool:
+        """Return True when the ruleset or line is part of the rules."""
+        if isinstance(value, DevfsRuleset):
+            return value.content_key in self._ruleset_content_index
+        return list.__contains__(self, value)
+
+    def index(  # noqa: T484
+        self,
+        value: typing.Any,
+        *args: typing.Any
+    ) -> int:
+        """Return the line position of a ruleset or line."""
+        if isinstance(value, DevfsRuleset) and (len(args) == 0):
+            try:
+                return self._ruleset_content_index[value.content_key]
+            except KeyError:
+                raise ValueError("devfs ruleset is not in the list")
+        return list.index(self, value, *args)
+
+    def clear(self) -> None:
+        """Remove all rulesets and lines."""
+        list.clear(self)
+        self._ruleset_number_index.clear()
+        self._ruleset_name_index.clear()
+        self._ruleset_content_index.clear()
+        self._system_rule_lines.clear()
+
+    def _rebuild_content_index(self) -> None:
+        self._ruleset_content_index.clear()
+        for i, line in enumerate(self):
+            if isinstance(line, DevfsRuleset):
+                self._ruleset_content_index.setdefault(line.content_key, i)
+
     @property
     def default_rules_file(self) -> str:
         """Return the default path to the devfs rules file."""
@@ -313,8 +385,12 @@ class DevfsRules(list):
             self.logger.debug(f"Reading devfs.rules from {self.rules_file}")
 
         self.clear()
-        self._read_rules_file(self.default_rules_file, system=True)
-        self._read_rules_file(self.rules_file)
+        try:
+            self._read_rules_file(self.default_rules_file, system=True)
+            self._read_rules_file(self.rules_file)
+        finally:
+            # rules are added to the rulesets after they were indexed
+            self._rebuild_content_index()
 
     def _read_rules_file(
         self,
@@ -354,12 +430,39 @@ class DevfsRules(list):
 
         f.close()
 
+    @contextlib.contextmanager
+    def batch(self) -> typing.Iterator['DevfsRules']:
+        """
+        Write the devfs.rules file once after a batch of changes.
+
+        Calls of save() within the context are deferred until the outermost
+        batch context is left.
+        """
+        with self.lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self._batch_depth -= 1
+                if (self._batch_depth == 0) and (self._save_pending is True):
+                    self.save()
+
     def save(self) -> None:
         """
         Apply changes to the devfs.rules file.
 
-        Automatically restarts devfs service when the file was changed.
+        The file is not written before the current batch has finished. New
+        rulesets need to be loaded with load_ruleset().
         """
+        with self.lock:
+            if self._batch_depth > 0:
+                self._save_pending = True
+                return
+            self._save_pending = False
+            self._save()
+
+    def _save(self) -> None:
         content_before = None
 
         if os.path.isfile(self.rules_file):
@@ -385,15 +488,58 @@ class DevfsRules(list):
 
             f.write(new_content)
             f.truncate()
-            self._restart_devfs_service()
 
         f.close()
 
-    def _restart_devfs_service(self) -> None:
-        """Restart devfs service after changing devfs.rules."""
+    def load_ruleset(self, ruleset: DevfsRuleset) -> None:
+        """
+        Load a ruleset into the kernel.
+
+        Existing rules of the ruleset number are replaced. References to
+        other rulesets by their $name are resolved to the ruleset number. All
+        rules are passed to a single devfs invocation.
+        """
+        rules = [self._resolve_rule(rule) for rule in ruleset]
+        rulespecs: typing.List[str] = []
+        for rule in rules:
+            if rule.startswith("add ") is False:
+                raise libioc.errors.InvalidDevfsRulesSyntax(
+                    devfs_rules_file=self.rules_file,
+                    reason=f"Unsupported devfs rule: {rule}",
+                    logger=self.logger
+                )
+            rulespecs.append(rule[4:])
+
+        command = [self.DEVFS_COMMAND, "rule", "-s", str(ruleset.number)]
         if self.logger is not None:
-            self.logger.debug("Restarting devfs service")
-        libioc.helpers.exec(["service", "devfs", "restart"])
+            self.logger.debug(f"Loading devfs ruleset {ruleset.number}")
+        libioc.helpers.exec(command + ["delset"], logger=self.logger)
+        if len(rulespecs) == 0:
+            return
+        with tempfile.TemporaryFile() as f:
+            f.write(("\n".join(rulespecs) + "\n").encode("UTF-8"))
+            f.seek(0)
+            libioc.helpers.exec(
+                command + ["add", "-"],
+                logger=self.logger,
+                stdin=f
+            )
+
+    def _resolve_rule(self, rule: str) -> str:
+        """Return the rule with resolved ruleset names and without quotes."""
+        fragments = shlex.split(rule)
+        for i, fragment in enumerate(fragments):
+            if fragment.startswith("$") is False:
+                continue
+            try:
+                fragments[i] = str(self.find_by_name(fragment[1:]).number)
+            except KeyError:
+                raise libioc.errors.InvalidDevfsRulesSyntax(
+                    devfs_rules_file=self.rules_file,
+                    reason=f"Unknown devfs ruleset {fragment}",
+                    logger=self.logger
+                )
+        return " ".join(fragments)
 
     def __str__(self) -> str:
         """Return the devfs.rules content as string."""
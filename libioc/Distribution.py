@@ -24,8 +24,6 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """ioc Distribution module."""
 import typing
-import os
-import platform
 import re
 import urllib.request
 import html.parser
@@ -120,10 +118,7 @@ class DistributionGenerator:
         Often used to differentiate between operations for HardenedBSD or
         standard FreeBSD.
         """
-        if os.path.exists("/usr/sbin/hbsd-update"):
-            return "HardenedBSD"
-        else:
-            return platform.system()
+        return self.host.facts.distribution_name
 
     @property
     def mirror_url(self) -> str:
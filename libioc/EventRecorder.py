@@ -0,0 +1,173 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# Copyright (c) 2014-2018, iocage
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""ioc event recorder for profiling the duration of operations."""
+import typing
+import json
+import math
+import os
+import threading
+from timeit import default_timer as timer
+
+import libioc.events
+
+
+class EventRecord:
+    """The timing of a finished event."""
+
+    type: str
+    identifier: typing.Optional[str]
+    state: str
+    started_at: float
+    stopped_at: float
+    depth: int
+    thread_id: int
+
+    def __init__(
+        self,
+        event: 'libioc.events.IocEvent',
+        thread_id: int
+    ) -> None:
+        self.type = event.type
+        self.identifier = getattr(event, "identifier", None)
+        self.state = event.get_state_string()
+        self.started_at = event._started_at
+        self.stopped_at = event._stopped_at
+        self.depth = event.parent_count
+        self.thread_id = thread_id
+
+    @property
+    def duration(self) -> float:
+        """Return the seconds the event was pending."""
+        return self.stopped_at - self.started_at
+
+
+class EventRecorder:
+    """
+    Record the timing of all events of the attached scopes.
+
+    Events report to the recorder of their scope when they finish. Scopes
+    created for parallel operations (for example by the JailScheduler) pass
+    the recorder on, so that one recorder collects a complete trace of a
+    start, stop, fetch or backup operation.
+
+    Example:
+
+        recorder = libioc.EventRecorder.EventRecorder()
+        jail.start(event_scope=recorder.new_scope())
+        recorder.write_chrome_trace("start.json")
+        print(recorder.summary())
+    """
+
+    records: typing.List[EventRecord]
+
+    def __init__(self) -> None:
+        self.records = []
+        self._origin = float(timer())
+        self._lock = threading.Lock()
+
+    def new_scope(self) -> 'libioc.events.Scope':
+        """Return a new event scope that is attached to the recorder."""
+        return libioc.events.Scope(recorder=self)
+
+    def attach(self, scope: 'libioc.events.Scope') -> None:
+        """Record all events of an existing scope that finish from now on."""
+        scope.recorder = self
+
+    def record(self, event: 'libioc.events.IocEvent') -> None:
+        """Add a finished event to the trace."""
+        record = EventRecord(event, thread_id=threading.get_ident())
+        with self._lock:
+            self.records.append(record)
+
+    def clear(self) -> None:
+        """Forget all recorded events."""
+        with self._lock:
+            self.records = []
+            self._origin = float(timer())
+
+    def chrome_trace(self) -> typing.Dict[str, typing.Any]:
+        """
+        Return the trace in the Chrome trace event format.
+
+        The output can be loaded into chrome://tracing or Perfetto. Each
+        thread that ran events is shown as its own track.
+        """
+        pid = os.getpid()
+        with self._lock:
+            records = list(self.records)
+        thread_ids: typing.Dict[int, int] = {}
+        trace_events = []
+        for record in sorted(records, key=lambda x: x.started_at):
+            tid = thread_ids.setdefault(record.thread_id, len(thread_ids) + 1)
+            trace_events.append(dict(
+                name=record.type,
+                cat="libioc",
+                ph="X",
+                ts=round((record.started_at - self._origin) * 1000000, 3),
+                dur=round(record.duration * 1000000, 3),
+                pid=pid,
+                tid=tid,
+                args=dict(
+                    identifier=record.identifier,
+                    state=record.state,
+                    depth=record.depth
+                )
+            ))
+        return dict(traceEvents=trace_events, displayTimeUnit="ms")
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Write the trace in the Chrome trace event format to a file."""
+        with open(path, "w", encoding="UTF-8") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def summary(self) -> typing.Dict[str, typing.Dict[str, float]]:
+        """
+        Return the latency of the recorded events by event type.
+
+        Each event type maps to the count of its events and the p50, p95 and
+        max duration in seconds.
+        """
+        with self._lock:
+            records = list(self.records)
+        durations: typing.Dict[str, typing.List[float]] = {}
+        for record in records:
+            durations.setdefault(record.type, []).append(record.duration)
+
+        output: typing.Dict[str, typing.Dict[str, float]] = {}
+        for event_type in sorted(durations):
+            values = sorted(durations[event_type])
+            output[event_type] = dict(
+                count=len(values),
+                p50=_percentile(values, 50),
+                p95=_percentile(values, 95),
+                max=values[-1]
+            )
+        return output
+
+
+def _percentile(sorted_values: typing.List[float], percent: int) -> float:
+    """Return the nearest-rank percentile of a sorted list."""
+    rank = int(math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[max(0, rank - 1)]
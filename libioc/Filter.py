@@ -23,6 +23,7 @@
 # IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 """ioc filters for ListableResource."""
+import functools
 import re
 import typing
 
@@ -39,23 +40,42 @@ _TermValuesType = typing.Union[
 
 _REGEX_PATTERN_SPLIT_COMMA = re.compile(r"(?<!\\),")
 
+# Sources that can answer a filter term, ordered by the cost of a lookup
+SOURCE_NAME = 0
+SOURCE_PROPERTIES = 1
+SOURCE_STATE = 2
+SOURCE_CONFIG = 3
 
-def match_filter(value: str, filter_string: str) -> bool:
-    """Return True when the value matches the filter string."""
-    escaped_characters = [".", "$", "^", "(", ")", "?"]
-    for character in escaped_characters:
+
+_FILTER_ESCAPED_CHARACTERS = (".", "$", "^", "(", ")", "?")
+_FILTER_GLOB_CHARACTERS = ("*", "+")
+_FILTER_REGEX_CHARACTERS = frozenset("*+[]{}|\\")
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_filter(filter_string: str) -> typing.Pattern[str]:
+    """Return the memoized regular expression of a filter string."""
+    for character in _FILTER_ESCAPED_CHARACTERS:
         filter_string = filter_string.replace(character, f"\\{character}")
     filter_string = filter_string.replace("*", ".*")
     filter_string = filter_string.replace("+", ".+")
-    pattern = f"^{filter_string}$"
-    match = re.match(pattern, value)
-    return match is not None
+    return re.compile(f"^{filter_string}$")
+
+
+def match_filter(value: str, filter_string: str) -> bool:
+    """Return True when the value matches the filter string."""
+    return compile_filter(filter_string).match(value) is not None
 
 
 class Term(list):
     """A single filter term."""
 
-    glob_characters = ["*", "+"]
+    glob_characters = list(_FILTER_GLOB_CHARACTERS)
+
+    _exact_values: typing.Set[str]
+    _patterns: typing.List[typing.Pattern[str]]
+    _short_names: typing.Set[str]
+    _parsed_values: typing.Set[typing.Optional[typing.Union[str, bool]]]
 
     def __init__(
         self,
@@ -74,12 +94,61 @@ class Term(list):
             data = []
 
         list.__init__(self, data)
+        self._compile()
+
+    def _compile(self) -> None:
+        """
+        Precompile the filter values for matching.
+
+        Filter strings without glob or regex characters only match equal
+        values, so that they are looked up in sets instead. All others are
+        compiled to regular expressions once. Filter strings that parse to
+        a boolean or None also match values that parse to the same.
+        """
+        self._exact_values = set()
+        self._patterns = []
+        self._short_names = set()
+        self._parsed_values = set()
+
+        for filter_string in self._filter_strings():
+            if _FILTER_REGEX_CHARACTERS.isdisjoint(filter_string) is False:
+                self._patterns.append(compile_filter(filter_string))
+
+            if self._filter_string_has_globs(filter_string) is True:
+                continue
+
+            # match against humanreadable names as well
+            if len(filter_string) == 8:
+                self._short_names.add(filter_string)
+
+            parsed_filter = libioc.helpers.parse_user_input(filter_string)
+            if isinstance(parsed_filter, str):
+                self._exact_values.add(filter_string)
+            else:
+                self._parsed_values.add(parsed_filter)
+
+    def _filter_strings(self) -> typing.Iterator[str]:
+        for filter_value in self:
+            if isinstance(filter_value, str):
+                yield filter_value
+            elif isinstance(filter_value, _ResourceSelector):
+                yield filter_value.name
+            elif isinstance(filter_value, list):
+                yield from filter_value
 
     @property
     def short(self) -> bool:
         """Return True if the short name of a UUID be used."""
         return (self.key == "name") is True
 
+    @property
+    def exact(self) -> bool:
+        """Return True if the term matches a single value without globs."""
+        filter_strings = list(self._filter_strings())
+        if len(filter_strings) != 1:
+            return False
+        return (self._filter_string_has_globs(filter_strings[0]) is False)
+
     def matches_resource(
         self,
         resource: 'libioc.Resource.Resource'
@@ -109,46 +178,21 @@ class Term(list):
 
         input_value = libioc.helpers.to_string(value)
 
-        for filter_value in self:
-
-            if isinstance(filter_value, str):
-                if self._match_filter(input_value, filter_value, short):
-                    return True
-            elif isinstance(filter_value, _ResourceSelector):
-                if self._match_filter(input_value, filter_value.name, short):
-                    return True
-            elif isinstance(filter_value, list):
-                results = list(map(
-                    lambda x: self._match_filter(input_value, x, short),
-                    filter_value
-                ))
-                if any(results):
-                    return True
-
-        return False
-
-    def _match_filter(
-        self,
-        value: str,
-        filter_string: str,
-        short: bool=False
-    ) -> bool:
-        if match_filter(value, filter_string) is True:
+        if input_value in self._exact_values:
             return True
 
-        has_no_globs = not self._filter_string_has_globs(filter_string)
-        if has_no_globs is True:
-            # match against humanreadable names as well
-            has_humanreadble_length = (len(filter_string) == 8)
-            if (has_humanreadble_length is True) and (short is True):
-                shortname = libioc.helpers.to_humanreadable_name(value)
-                if shortname == filter_string:
-                    return True
+        for pattern in self._patterns:
+            if pattern.match(input_value) is not None:
+                return True
 
-            _parse_user_input = libioc.helpers.parse_user_input
-            parsed_value = _parse_user_input(value)
-            parsed_filter = _parse_user_input(filter_string)
-            return (parsed_value == parsed_filter) is True
+        if (short is True) and (len(self._short_names) > 0):
+            shortname = libioc.helpers.to_humanreadable_name(input_value)
+            if shortname in self._short_names:
+                return True
+
+        if len(self._parsed_values) > 0:
+            parsed_value = libioc.helpers.parse_user_input(input_value)
+            return (parsed_value in self._parsed_values) is True
 
         return False
 
@@ -287,6 +331,13 @@ class Terms(list):
 
         return True
 
+    def selects_single_name(self) -> bool:
+        """Return True if a name term selects a single resource by name."""
+        for term in self:
+            if (term.key == "name") and (term.exact is True):
+                return True
+        return False
+
     def match_source(self, source_name: str) -> bool:
         """Check if the source name matches the filter terms."""
         for term in self:
@@ -302,6 +353,21 @@ class Terms(list):
         # no name term or none at all
         return True
 
+    def plan(
+        self,
+        state_keys: typing.Iterable[str]=()
+    ) -> 'QueryPlan':
+        """
+        Return a QueryPlan that evaluates the terms in stages.
+
+        Args:
+
+            state_keys (iterable):
+                Keys that are answered by the resource state (for example the
+                running jail table) instead of its configuration.
+        """
+        return QueryPlan(self, state_keys=state_keys)
+
     def _parse_term(self, user_input: str) -> Term:
         value: typing.Any
         try:
@@ -341,3 +407,85 @@ class Terms(list):
     def __repr__(self) -> str:
         """Return the Terms in human and robot friendly format."""
         return self.__str__()
+
+
+class QueryPlan:
+    """
+    Filter terms grouped by the cheapest source that can answer them.
+
+    A ListableResource evaluates the stages in ascending cost order, so that
+    resources are rejected before they are loaded whenever possible:
+
+        SOURCE_NAME:
+            The resource name derived from its dataset name.
+
+        SOURCE_PROPERTIES:
+            ZFS user properties of the resource dataset. Terms that are not
+            answered by the properties are deferred to SOURCE_CONFIG.
+
+        SOURCE_STATE:
+            Runtime state of the resource (for example the running jails).
+
+        SOURCE_CONFIG:
+            The fully loaded resource and its configuration.
+    """
+
+    stages: typing.Dict[int, typing.List[Term]]
+
+    def __init__(
+        self,
+        terms: typing.Iterable[Term],
+        state_keys: typing.Iterable[str]=()
+    ) -> None:
+
+        _state_keys = set(state_keys)
+        self.stages = {
+            SOURCE_NAME: [],
+            SOURCE_PROPERTIES: [],
+            SOURCE_STATE: [],
+            SOURCE_CONFIG: []
+        }
+
+        for term in terms:
+            if term.key == "name":
+                source = SOURCE_NAME
+            elif term.key in _state_keys:
+                source = SOURCE_STATE
+            else:
+                source = SOURCE_PROPERTIES
+            self.stages[source].append(term)
+
+    def requires(self, source: int) -> bool:
+        """Return True if terms need to be answered by the given source."""
+        return (len(self.stages[source]) > 0) is True
+
+    def match_values(
+        self,
+        terms: typing.Iterable[Term],
+        values: typing.Dict[str, typing.Any]
+    ) -> typing.Optional[typing.List[Term]]:
+        """
+        Match terms against values obtained from a source.
+
+        Returns None when a term does not match one of the values. Otherwise
+        the terms that could not be answered by the values are returned.
+        """
+        unresolved: typing.List[Term] = []
+        for term in terms:
+            if term.key not in values.keys():
+                unresolved.append(term)
+                continue
+            if term.matches(values[term.key], term.short) is False:
+                return None
+        return unresolved
+
+    def match_resource(
+        self,
+        resource: 'libioc.Resource.Resource',
+        terms: typing.Iterable[Term]
+    ) -> bool:
+        """Return True if all given terms match the loaded resource."""
+        for term in terms:
+            if term.matches_resource(resource) is False:
+                return False
+        return True
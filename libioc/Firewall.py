@@ -24,6 +24,7 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """ioc firewall module."""
 import typing
+import tempfile
 
 import freebsd_sysctl
 
@@ -32,8 +33,15 @@ import libioc.helpers_object
 import libioc.CommandQueue
 
 
-class Firewall:
-    """ioc host firewall abstraction."""
+class Firewall(libioc.CommandQueue.CommandQueue):
+    """
+    ioc host firewall abstraction.
+
+    Rules are not applied immediately, but collected in the command queue
+    until apply() is called. Then all queued rules are loaded with a single
+    ipfw invocation that reads them from stdin, and all rule numbers queued
+    for deletion are removed with another one.
+    """
 
     IPFW_RULE_OFFSET: int
     IPFW_COMMAND: str = "/sbin/ipfw"
@@ -45,6 +53,7 @@ class Firewall:
 
         self.IPFW_RULE_OFFSET = 10000
         self.logger = libioc.helpers_object.init_logger(self, logger)
+        self.clear_command_queue()
 
     @property
     def _required_sysctl_properties(self) -> typing.Dict[str, int]:
@@ -87,13 +96,11 @@ class Firewall:
         rule_number: typing.Union[int, str],
         insecure: bool=False
     ) -> None:
-        """Delete a firewall rule by its number."""
-        command = [
-            self.IPFW_COMMAND,
-            "-q", "delete",
-            self._offset_rule_number(rule_number, insecure=insecure)
-        ]
-        self._exec(command, ignore_error=True)
+        """Queue the deletion of firewall rules by their number."""
+        self.append_command_queue(
+            self._offset_rule_number(rule_number, insecure=insecure),
+            queue_name="delete"
+        )
 
     def add_rule(
         self,
@@ -101,14 +108,38 @@ class Firewall:
         rule_arguments: typing.List[str],
         insecure: bool=False
     ) -> None:
-        """Add a rule to the firewall configuration."""
-        command = [
-            self.IPFW_COMMAND,
-            "-q", "add",
-            self._offset_rule_number(rule_number, insecure=insecure)
-        ] + rule_arguments
+        """Queue a rule for the firewall configuration."""
+        self.append_command_queue(
+            " ".join([
+                "add",
+                self._offset_rule_number(rule_number, insecure=insecure)
+            ] + rule_arguments),
+            queue_name="add"
+        )
+
+    def apply(self) -> None:
+        """Delete and add the queued firewall rules."""
+        rule_numbers: typing.List[str] = []
+        for rule_number in self.read_commands("delete"):
+            if rule_number not in rule_numbers:
+                rule_numbers.append(rule_number)
+        if len(rule_numbers) > 0:
+            self._exec(
+                [self.IPFW_COMMAND, "-q", "delete"] + rule_numbers,
+                ignore_error=True
+            )
 
-        self._exec(command)
+        rules = self.read_commands("add")
+        if len(rules) == 0:
+            return
+        with tempfile.TemporaryFile() as f:
+            f.write(("\n".join(rules) + "\n").encode("UTF-8"))
+            f.seek(0)
+            self._exec(
+                [self.IPFW_COMMAND, "-q", "/dev/stdin"],
+                stdin=f
+            )
+        self.logger.spam(f"{len(rules)} firewall rules added")
 
     def _offset_rule_number(
         self,
@@ -127,10 +158,16 @@ class Firewall:
     def _exec(
         self,
         command: typing.List[str],
-        ignore_error: bool=False
+        ignore_error: bool=False,
+        **subprocess_args: typing.Any
     ) -> None:
         try:
-            libioc.helpers.exec(command, ignore_error=ignore_error)
+            libioc.helpers.exec(
+                command,
+                ignore_error=ignore_error,
+                logger=self.logger,
+                **subprocess_args
+            )
         except libioc.errors.CommandFailure:
             raise libioc.errors.FirewallCommandFailure(
                 logger=self.logger
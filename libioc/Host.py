@@ -27,6 +27,7 @@ import typing
 import os
 import platform
 import re
+import threading
 import freebsd_sysctl
 import uuid
 
@@ -35,7 +36,9 @@ import libzfs
 import libioc.Datasets
 import libioc.DevfsRules
 import libioc.Distribution
+import libioc.LaunchParamPlan
 import libioc.Resource
+import libioc.ResourceLimit
 import libioc.helpers
 import libioc.helpers_object
 
@@ -48,18 +51,24 @@ _distribution_types = typing.Union[
 ]
 UUID = uuid.UUID
 
+_FactValue = typing.TypeVar("_FactValue")
 
-class HostGenerator:
-    """Asynchronous representation of the jail host."""
 
-    _class_distribution = libioc.Distribution.DistributionGenerator
+class HostFacts:
+    """
+    Memoized facts about the host.
 
-    _devfs: libioc.DevfsRules.DevfsRules
-    _defaults: libioc.Resource.DefaultResource
-    __user_provided_defaults: typing.Optional[libioc.Resource.DefaultResource]
-    releases_dataset: libzfs.ZFSDataset
-    datasets: libioc.Datasets.Datasets
-    distribution: _distribution_types
+    Each fact is looked up once on first access and kept until it is
+    invalidated, for example after the host userland was updated.
+    """
+
+    FACTS = (
+        "uuid",
+        "userland_version",
+        "release_version",
+        "processor",
+        "distribution_name"
+    )
 
     __branch_pattern = re.compile(
         r"""\(hardened/
@@ -75,6 +84,111 @@ class HostGenerator:
         re.X
     )
 
+    _values: typing.Dict[str, typing.Any]
+
+    def __init__(self) -> None:
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, *names: str) -> None:
+        """Forget the named facts or all facts when no name is given."""
+        for name in names:
+            if name not in self.FACTS:
+                raise KeyError(f"Unknown host fact: {name}")
+        with self._lock:
+            if len(names) == 0:
+                self._values.clear()
+            for name in names:
+                self._values.pop(name, None)
+
+    def _get(
+        self,
+        name: str,
+        lookup: typing.Callable[[], _FactValue]
+    ) -> _FactValue:
+        with self._lock:
+            if name in self._values:
+                value: _FactValue = self._values[name]
+                return value
+        value = lookup()
+        with self._lock:
+            self._values[name] = value
+        return value
+
+    @property
+    def uuid(self) -> UUID:
+        """Return the hostuuid."""
+        return self._get(
+            "uuid",
+            lambda: uuid.UUID(freebsd_sysctl.Sysctl("kern.hostuuid").value)
+        )
+
+    @property
+    def userland_version(self) -> float:
+        """Return the host userland version number."""
+        return self._get(
+            "userland_version",
+            lambda: float(libioc.helpers.get_os_version()["userland"])
+        )
+
+    @property
+    def processor(self) -> str:
+        """Return the hosts processor architecture."""
+        return self._get("processor", platform.processor)
+
+    @property
+    def distribution_name(self) -> str:
+        """Return the name of the host distribution."""
+        return self._get("distribution_name", self._get_distribution_name)
+
+    @property
+    def release_version(self) -> str:
+        """Return the host release version."""
+        return self._get("release_version", self._get_release_version)
+
+    def _get_distribution_name(self) -> str:
+        if os.path.exists("/usr/sbin/hbsd-update"):
+            return "HardenedBSD"
+        else:
+            return platform.system()
+
+    def _get_release_version(self) -> str:
+        uname = os.uname()
+        distribution_name = self.distribution_name
+        if distribution_name == "FreeBSD":
+            release_version_fragments = uname[2].split("-")
+
+            if len(release_version_fragments) > 1:
+                return "-".join(release_version_fragments[0:2])
+
+        elif distribution_name == "HardenedBSD":
+
+            match = self.__branch_pattern.search(uname[3])
+            if match is not None:
+                return match["release"].upper()
+
+            match = self.__release_name_pattern.search(uname[2])
+            if match is not None:
+                return f"{match['major']}-{match['type']}"
+
+        raise libioc.errors.HostReleaseUnknown()
+
+
+class HostGenerator:
+    """Asynchronous representation of the jail host."""
+
+    _class_distribution = libioc.Distribution.DistributionGenerator
+
+    _devfs: libioc.DevfsRules.DevfsRules
+    _resource_limit: libioc.ResourceLimit.ResourceLimit
+    _launch_param_plan: libioc.LaunchParamPlan.LaunchParamPlan
+    _defaults: libioc.Resource.DefaultResource
+    __user_provided_defaults: typing.Optional[libioc.Resource.DefaultResource]
+    releases_dataset: libzfs.ZFSDataset
+    datasets: libioc.Datasets.Datasets
+    distribution: _distribution_types
+    facts: HostFacts
+
     def __init__(
         self,
         defaults: typing.Optional[libioc.Resource.DefaultResource]=None,
@@ -85,6 +199,7 @@ class HostGenerator:
 
         self.logger = libioc.helpers_object.init_logger(self, logger)
         self.zfs = libioc.helpers_object.init_zfs(self, zfs)
+        self.facts = HostFacts()
 
         if datasets is not None:
             self.datasets = datasets
@@ -120,7 +235,7 @@ class HostGenerator:
     @property
     def uuid(self) -> UUID:
         """Return the hostuuid and memoize on first lookup."""
-        return uuid.UUID(freebsd_sysctl.Sysctl("kern.hostuuid").value)
+        return self.facts.uuid
 
     @property
     def defaults(self) -> 'libioc.Resource.DefaultResource':
@@ -149,37 +264,38 @@ class HostGenerator:
             )
         return self._devfs
 
+    @property
+    def resource_limit(self) -> 'libioc.ResourceLimit.ResourceLimit':
+        """Return the lazy-loaded ResourceLimit engine."""
+        if "_resource_limit" not in dir(self):
+            self._resource_limit = libioc.ResourceLimit.ResourceLimit(
+                logger=self.logger
+            )
+        return self._resource_limit
+
+    @property
+    def launch_param_plan(self) -> 'libioc.LaunchParamPlan.LaunchParamPlan':
+        """Return the lazy-loaded plan of jail params passed on start."""
+        if "_launch_param_plan" not in dir(self):
+            self._launch_param_plan = libioc.LaunchParamPlan.LaunchParamPlan(
+                logger=self.logger
+            )
+        return self._launch_param_plan
+
     @property
     def userland_version(self) -> float:
         """Return the host userland version number."""
-        return float(libioc.helpers.get_os_version()["userland"])
+        return self.facts.userland_version
 
     @property
     def release_version(self) -> str:
         """Return the host release version."""
-        if self.distribution.name == "FreeBSD":
-            release_version_string = os.uname()[2]
-            release_version_fragments = release_version_string.split("-")
-
-            if len(release_version_fragments) > 1:
-                return "-".join(release_version_fragments[0:2])
-
-        elif self.distribution.name == "HardenedBSD":
-
-            match = re.search(self.__branch_pattern, os.uname()[3])
-            if match is not None:
-                return match["release"].upper()
-
-            match = re.search(self.__release_name_pattern, os.uname()[2])
-            if match is not None:
-                return f"{match['major']}-{match['type']}"
-
-        raise libioc.errors.HostReleaseUnknown()
+        return self.facts.release_version
 
     @property
     def processor(self) -> str:
         """Return the hosts processor architecture."""
-        return platform.processor()
+        return self.facts.processor
 
     @property
     def ipfw_enabled(self) -> bool:
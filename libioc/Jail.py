@@ -42,9 +42,7 @@ import hashlib
 import uuid
 
 import libzfs
-import freebsd_sysctl
 import jail as libjail
-import freebsd_sysctl.types
 
 import libioc.Types
 import libioc.errors
@@ -53,9 +51,14 @@ import libioc.helpers
 import libioc.helpers_object
 import libioc.DevfsRules
 import libioc.Host
+import libioc.JailIndex
+import libioc.MountTable
+import libioc.RunningJails
 import libioc.Config.Jail.BaseConfig
 import libioc.Config.Jail.JailConfig
+import libioc.Firewall
 import libioc.Network
+import libioc.NetworkInterface
 import libioc.Release
 import libioc.Storage
 import libioc.Storage.Basejail
@@ -317,6 +320,8 @@ class JailGenerator(JailResource):
     _class_storage = libioc.Storage.Storage
     _provisioner: 'libioc.Provisioning.Prototype'
     __jid: typing.Optional[int]
+    running_jails: typing.Optional['libioc.RunningJails.RunningJails']
+    mount_table: typing.Optional['libioc.MountTable.MountTable']
 
     def __init__(
         self,
@@ -331,7 +336,12 @@ class JailGenerator(JailResource):
         fstab: typing.Optional['libioc.Config.Jail.File.Fstab.Fstab']=None,
         root_datasets_name: typing.Optional[str]=None,
         new: bool=False,
-        skip_invalid_config: bool=False
+        skip_invalid_config: bool=False,
+        config_data: typing.Optional[typing.Dict[str, typing.Any]]=None,
+        running_jails: typing.Optional[
+            'libioc.RunningJails.RunningJails'
+        ]=None,
+        mount_table: typing.Optional['libioc.MountTable.MountTable']=None
     ) -> None:
         """
         Initialize a Jail.
@@ -341,6 +351,19 @@ class JailGenerator(JailResource):
             data (string|dict):
                 Jail configuration dict or jail name as string identifier.
 
+            config_data (dict): (optional)
+                Content of the jail's config file when it is already known
+                (for example from the JailIndex), so that it is not read again.
+
+            running_jails (libioc.RunningJails.RunningJails): (optional)
+                Snapshot of the running jails that answers the JID of this
+                jail instead of querying the kernel on every access.
+
+            mount_table (libioc.MountTable.MountTable): (optional)
+                Snapshot of the mounted filesystems that is shared by the
+                start and stop operations of this jail. Otherwise each
+                operation enumerates the mounted filesystems once.
+
             zfs (libzfs.ZFS): (optional)
                 Inherit an existing libzfs.ZFS() instance from ancestor classes
 
@@ -353,6 +376,8 @@ class JailGenerator(JailResource):
         self.logger = libioc.helpers_object.init_logger(self, logger)
         self.zfs = libioc.helpers_object.init_zfs(self, zfs)
         self.host = libioc.helpers_object.init_host(self, host)
+        self.running_jails = running_jails
+        self.mount_table = mount_table
 
         if isinstance(data, str):
             data = dict(id=data)
@@ -396,8 +421,12 @@ class JailGenerator(JailResource):
         )
 
         if new is False:
+            if config_data is None:
+                config_data = self.read_config()
+            else:
+                config_data = dict(config_data)
             self.config.read(
-                data=self.read_config(),
+                data=config_data,
                 skip_on_error=skip_invalid_config
             )
             if self.config["id"] is None:
@@ -473,7 +502,29 @@ class JailGenerator(JailResource):
                 Environment variables that are available in all jail hooks.
                 Existing environment variables (provided by the system or ioc)
                 can be overridden with entries in this dictionary.
+
+        Dataset lookups are cached while the jail starts.
         """
+        yield from self.zfs.cached_events(self._start(
+            quick=quick,
+            passthru=passthru,
+            single_command=single_command,
+            event_scope=event_scope,
+            dependant_jails_seen=dependant_jails_seen,
+            start_dependant_jails=start_dependant_jails,
+            env=env
+        ))
+
+    def _start(
+        self,
+        quick: bool,
+        passthru: bool,
+        single_command: typing.Optional[str],
+        event_scope: typing.Optional['libioc.events.Scope'],
+        dependant_jails_seen: typing.List['JailGenerator'],
+        start_dependant_jails: bool,
+        env: typing.Dict[str, str]
+    ) -> typing.Generator['libioc.events.IocEvent', None, None]:
         self.require_jail_existing()
         self.require_jail_stopped()
         self.require_jail_match_hostid()
@@ -522,15 +573,20 @@ class JailGenerator(JailResource):
         )
 
         # Basejail Actions
+        mount_table = self._get_mount_table()
         if self.is_basejail is True:
             yield from self.storage_backend.apply(
                 self.storage,
                 self.release,
-                event_scope=jailStartEvent.scope
+                event_scope=jailStartEvent.scope,
+                mount_table=mount_table
             )
 
         # Jail Fstab
-        yield from self.fstab.mount(event_scope=jailStartEvent.scope)
+        yield from self.fstab.mount(
+            event_scope=jailStartEvent.scope,
+            mount_table=mount_table
+        )
 
         # Jail Creation
         jailAttachEvent = libioc.events.JailAttach(
@@ -543,6 +599,12 @@ class JailGenerator(JailResource):
 
         if jid > 0:
             self.__jid = jid
+            if self.running_jails is not None:
+                self.running_jails.add(libioc.RunningJails.RunningJail(
+                    jid=jid,
+                    name=self.identifier,
+                    path=self.root_dataset.mountpoint
+                ))
             yield jailAttachEvent.end()
         else:
             error_code = ctypes.get_errno()
@@ -578,10 +640,14 @@ class JailGenerator(JailResource):
                         jid,
                         event_scope=jailStartEvent.scope
                     )
-                yield from self.fstab.unmount(event_scope=jailStartEvent.scope)
+                yield from self.fstab.unmount(
+                    event_scope=jailStartEvent.scope,
+                    mount_table=mount_table
+                )
                 yield from self.storage_backend.teardown(
                     self.storage,
-                    event_scope=jailStartEvent.scope
+                    event_scope=jailStartEvent.scope,
+                    mount_table=mount_table
                 )
                 yield from self.__clear_resource_limits(
                     force=False,
@@ -605,10 +671,16 @@ class JailGenerator(JailResource):
         )
 
         # Mount Devfs
-        yield from self.__mount_devfs(jailStartEvent.scope)
+        yield from self.__mount_devfs(
+            jailStartEvent.scope,
+            mount_table=mount_table
+        )
 
         # Mount Fdescfs
-        yield from self.__mount_fdescfs(jailStartEvent.scope)
+        yield from self.__mount_fdescfs(
+            jailStartEvent.scope,
+            mount_table=mount_table
+        )
 
         # Setup Network
         yield from self.__start_network(jailStartEvent.scope)
@@ -664,7 +736,8 @@ class JailGenerator(JailResource):
 
     def __mount_devfs(
         self,
-        event_scope: typing.Optional['libioc.events.Scope']=None
+        event_scope: typing.Optional['libioc.events.Scope']=None,
+        mount_table: typing.Optional['libioc.MountTable.MountTable']=None
     ) -> typing.Generator['libioc.events.MountDevFS', None, None]:
         extra_args = dict()
         if self.config["devfs_ruleset"] is not None:
@@ -675,18 +748,21 @@ class JailGenerator(JailResource):
             mountpoint="/dev",
             event=libioc.events.MountDevFS,
             event_scope=event_scope,
+            mount_table=mount_table,
             **extra_args
         )
 
     def __mount_fdescfs(
         self,
-        event_scope: typing.Optional['libioc.events.Scope']=None
+        event_scope: typing.Optional['libioc.events.Scope']=None,
+        mount_table: typing.Optional['libioc.MountTable.MountTable']=None
     ) -> typing.Generator['libioc.events.MountFdescfs', None, None]:
         yield from self.__mount_in_jail(
             filesystem="fdescfs",
             mountpoint="/dev/fd",
             event=libioc.events.MountFdescfs,
-            event_scope=event_scope
+            event_scope=event_scope,
+            mount_table=mount_table
         )
 
     def __mount_in_jail(
@@ -695,6 +771,7 @@ class JailGenerator(JailResource):
         mountpoint: str,
         event: 'libioc.events.JailEvent',
         event_scope: typing.Optional['libioc.events.Scope']=None,
+        mount_table: typing.Optional['libioc.MountTable.MountTable']=None,
         **extra_args: str
     ) -> typing.Generator['libioc.events.MountFdescfs', None, None]:
 
@@ -727,6 +804,7 @@ class JailGenerator(JailResource):
                 destination=_mountpoint,
                 fstype=filesystem,
                 logger=self.logger,
+                mount_table=mount_table,
                 **extra_args
             )
         except Exception as e:
@@ -768,7 +846,8 @@ class JailGenerator(JailResource):
                 filters=_depends,
                 host=self.host,
                 logger=self.logger,
-                zfs=self.zfs
+                zfs=self.zfs,
+                running_jails=self.running_jails
             ),
             key=lambda x: x.config["priority"]
         )
@@ -1065,15 +1144,25 @@ class JailGenerator(JailResource):
                 jid,
                 event_scope=jailStopEvent.scope
             )
-        yield from self.fstab.unmount(event_scope=jailStopEvent.scope)
+        mount_table = self._get_mount_table()
+        yield from self.fstab.unmount(
+            event_scope=jailStopEvent.scope,
+            mount_table=mount_table
+        )
         yield from self.storage_backend.teardown(
             self.storage,
-            event_scope=jailStopEvent.scope
+            event_scope=jailStopEvent.scope,
+            mount_table=mount_table
         )
         yield from self.__clear_resource_limits(force, jailStopEvent.scope)
 
         yield jailStopEvent.end()
 
+    def _get_mount_table(self) -> 'libioc.MountTable.MountTable':
+        if self.mount_table is not None:
+            return self.mount_table
+        return libioc.MountTable.MountTable(logger=self.logger)
+
     @property
     def _jail_conf_file(self) -> str:
         return f"{self.launch_script_dir}/jail.conf"
@@ -1196,6 +1285,7 @@ class JailGenerator(JailResource):
         except Exception as e:
             zfsDatasetDestroyEvent.fail(e)
             raise e
+        libioc.JailIndex.update_jail(self, remove=True)
         yield zfsDatasetDestroyEvent.end()
 
     def rename(
@@ -1264,6 +1354,7 @@ class JailGenerator(JailResource):
         for event in fstab_path_events:
             yield event
 
+        libioc.JailIndex.update_jail(self, jail_id=current_id)
         yield jailRenameEvent.end()
 
     def _update_fstab_paths(
@@ -1496,6 +1587,7 @@ class JailGenerator(JailResource):
         libioc.LaunchableResource.LaunchableResource.save(self)
         self._write_config(self.config.data)
         self._save_autoconfig()
+        libioc.JailIndex.update_jail(self)
 
     def _save_autoconfig(self) -> None:
         """
@@ -1603,10 +1695,10 @@ class JailGenerator(JailResource):
         jid = self.jid
         try:
             libjail.dll.jail_remove(jid)
-            while self.running or (libjail.is_jid_dying(jid) is True):
+            self.query_jid(refresh=True)
+            while (self.__jid is not None) or libjail.is_jid_dying(jid):
                 # wait for death
-                continue
-            self.__jid = None
+                self.query_jid(refresh=True)
             yield jailRemoveEvent.end()
             return
         except Exception:
@@ -1687,15 +1779,17 @@ class JailGenerator(JailResource):
             devfs_ruleset.append("add path nmdm* unhide")
 
         # create if the final rule combination does not exist as ruleset
-        if devfs_ruleset not in self.host.devfs:
-            self.logger.verbose("New devfs ruleset combination")
-            # note: name and number of devfs_ruleset are both None
-            new_ruleset_number = self.host.devfs.new_ruleset(devfs_ruleset)
-            self.host.devfs.save()
-            return new_ruleset_number
-        else:
-            ruleset_line_position = self.host.devfs.index(devfs_ruleset)
-            return self.host.devfs[ruleset_line_position].number
+        with self.host.devfs.lock:
+            existing_ruleset = self.host.devfs.find_by_rules(devfs_ruleset)
+            if existing_ruleset is None:
+                self.logger.verbose("New devfs ruleset combination")
+                # note: name and number of devfs_ruleset are both None
+                new_ruleset_number = self.host.devfs.new_ruleset(devfs_ruleset)
+                self.host.devfs.load_ruleset(devfs_ruleset)
+                self.host.devfs.save()
+                return new_ruleset_number
+            else:
+                return existing_ruleset.number
 
     @property
     def _generated_hostuuid(self) -> uuid.UUID:
@@ -1705,65 +1799,7 @@ class JailGenerator(JailResource):
 
     @property
     def _launch_params(self) -> libjail.Jiov:
-        config = self.config
-        vnet = (config["vnet"] is True)
-        value: libjail.RawIovecValue
-        jail_params: typing.Dict[str, libioc.JailParams.JailParam] = {}
-        for sysctl_name, sysctl in libioc.JailParams.JailParams().items():
-            if sysctl_name == "security.jail.param.devfs_ruleset":
-                devfs_ruleset = self.devfs_ruleset
-                if devfs_ruleset is None:
-                    continue
-                value = int(devfs_ruleset)
-            elif sysctl_name == "security.jail.param.path":
-                value = self.root_dataset.mountpoint
-            elif sysctl_name == "security.jail.param.name":
-                value = self.identifier
-            elif sysctl_name == "security.jail.param.host.hostuuid":
-                value = str(self.hostuuid)
-            elif sysctl_name == "security.jail.param.allow.mount.zfs":
-                value = int(self._allow_mount_zfs)
-            elif sysctl_name == "security.jail.param.vnet":
-                if vnet is False:
-                    # vnet is only used when explicitly enabled
-                    # (friendly to Kernels without VIMAGE support)
-                    continue
-                value = 1
-            elif sysctl_name == "security.jail.param.ip4.addr":
-                if vnet is True:
-                    continue
-                value = []
-                for _, addresses in self.config["ip4_addr"].items():
-                    value += [x.ip for x in addresses]
-            elif sysctl_name == "security.jail.param.ip6.addr":
-                if vnet is True:
-                    continue
-                value = []
-                for _, addresses in self.config["ip6_addr"].items():
-                    value += [x.ip for x in addresses]
-            elif vnet and (sysctl_name.startswith("security.jail.param.ip")):
-                continue
-            else:
-                config_property_name = sysctl.iocage_name
-                if self.config.is_known_property(
-                    config_property_name,
-                    explicit=False
-                ) is True:
-                    value = config[config_property_name]
-                    if sysctl.ctl_type in (
-                        freebsd_sysctl.types.NODE,
-                        freebsd_sysctl.types.INT,
-                    ):
-                        sysctl_state_names = ["disable", "inherit", "new"]
-                        if value in sysctl_state_names:
-                            value = sysctl_state_names.index(value)
-                else:
-                    continue
-
-            jail_params[sysctl.jail_arg_name.rstrip(".")] = value
-
-        jail_params["persist"] = None
-        return jail_params
+        return self.host.launch_param_plan.build(self)
 
     def _exec_host_command(
         self,
@@ -1819,6 +1855,9 @@ class JailGenerator(JailResource):
         if nics is None:
             return []
 
+        # networks share the firewall to apply their rules at once
+        firewall = libioc.Firewall.Firewall(logger=self.logger)
+
         for nic in nics:
 
             bridge = nics[nic]
@@ -1839,7 +1878,8 @@ class JailGenerator(JailResource):
                 ipv4_addresses=ipv4_addresses,
                 ipv6_addresses=ipv6_addresses,
                 bridge=bridge,
-                logger=self.logger
+                logger=self.logger,
+                firewall=firewall
             )
             networks.append(net)
 
@@ -1888,8 +1928,18 @@ class JailGenerator(JailResource):
             scope=event_scope
         )
         yield event.begin()
-        for network in self.networks:
-            yield from network.setup(event_scope=event.scope)
+        plan = libioc.NetworkInterface.NetworkInterfacePlan(
+            logger=self.logger
+        )
+        networks = self.networks
+        for network in networks:
+            yield from network.setup(event_scope=event.scope, plan=plan)
+        try:
+            self.__apply_firewalls(networks)
+            plan.apply()
+        except Exception as e:
+            yield event.fail(e)
+            raise e
         yield event.end()
 
     def __start_network(
@@ -1986,11 +2036,29 @@ class JailGenerator(JailResource):
         )
         yield event.begin()
 
-        for network in self.networks:
-            yield from network.teardown(jid, event_scope=event.scope)
+        networks = self.networks
+        for network in networks:
+            yield from network.teardown(
+                jid,
+                event_scope=event.scope,
+                apply_firewall=False
+            )
+        try:
+            self.__apply_firewalls(networks)
+        except Exception as e:
+            yield event.fail(e)
+            raise e
 
         yield event.end()
 
+    def __apply_firewalls(
+        self,
+        networks: typing.List[libioc.Network.Network]
+    ) -> None:
+        firewalls = dict([(id(x.firewall), x.firewall) for x in networks])
+        for firewall in firewalls.values():
+            firewall.apply()
+
     def __configure_localhost_commands(
         self,
         event_scope: typing.Optional['libioc.events.Scope']=None
@@ -2022,30 +2090,18 @@ class JailGenerator(JailResource):
             yield event.skip("disabled")
             return
 
-        skipped = True
-        for key in libioc.Config.Jail.Properties.ResourceLimit.properties:
-            try:
-                rlimit_prop = self.config[key]
-                if rlimit_prop.is_unset is True:
-                    continue
-            except (KeyError, AttributeError):
-                continue
+        resource_limit = self.host.resource_limit
+        if len(resource_limit.get_rules(self)) == 0:
+            yield event.skip()
+            return
 
-            rule = f"jail:{self.identifier}:{key}:{rlimit_prop.limit_string}"
-            try:
-                libioc.helpers.exec(
-                    ["/usr/bin/rctl", "-a", rule],
-                    logger=self.logger
-                )
-                skipped = False
-            except Exception:
-                yield event.fail()
-                raise
+        try:
+            resource_limit.apply([self])
+        except Exception:
+            yield event.fail()
+            raise
 
-        if skipped is True:
-            yield event.skip()
-        else:
-            yield event.end()
+        yield event.end()
 
     @property
     def __resource_limits_enabled(self) -> bool:
@@ -2068,24 +2124,12 @@ class JailGenerator(JailResource):
             return
 
         self.logger.verbose("Clearing resource limits")
-        stdout, _, returncode = libioc.helpers.exec(
-            " ".join([
-                "/usr/bin/rctl",
-                "-r",
-                f"jail:{self.identifier}",
-                "2>&1"
-            ]),
-            ignore_error=True,
-            shell=True  # nosec: B604
-        )
-
-        if (returncode > 0) and ("No such process" not in stdout):
+        try:
+            self.host.resource_limit.clear([self])
+        except libioc.errors.ResourceLimitActionFailed:
             yield jailResourceLimitActionEvent.fail()
             if force is False:
-                raise libioc.errors.ResourceLimitActionFailed(
-                    action=f"clear resource limits of jail {self.full_name}",
-                    logger=self.logger
-                )
+                raise
 
         yield jailResourceLimitActionEvent.end()
 
@@ -2285,14 +2329,37 @@ class JailGenerator(JailResource):
             self.query_jid()
         return self.__jid
 
-    def query_jid(self) -> None:
-        """Invoke update of the jails JID."""
+    def query_jid(self, refresh: bool=False) -> None:
+        """
+        Invoke update of the jails JID.
+
+        Args:
+
+            refresh (bool): (default=False)
+                Query the kernel even when a RunningJails snapshot was
+                injected and update the jail's entry in the snapshot.
+        """
+        identifier = self.identifier
+        if (self.running_jails is not None) and (refresh is False):
+            self.__jid = self.running_jails.get_jid(identifier)
+            return
+
         try:
-            jid = int(libjail.get_jid_by_name(self.identifier))
+            jid = int(libjail.get_jid_by_name(identifier))
             self.__jid = jid if (jid > 0) else None
         except Exception:
             self.__jid = None
 
+        if self.running_jails is None:
+            return
+        if self.__jid is None:
+            self.running_jails.remove(identifier)
+        elif self.running_jails.get_jid(identifier) != self.__jid:
+            self.running_jails.add(libioc.RunningJails.RunningJail(
+                jid=self.__jid,
+                name=identifier
+            ))
+
     @property
     def env(self) -> typing.Dict[str, str]:
         """Return the environment variables for hook scripts."""
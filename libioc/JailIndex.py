@@ -0,0 +1,256 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# Copyright (c) 2014-2018, iocage
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""ioc index of jail metadata stored at the root dataset."""
+import typing
+import json
+import os
+import os.path
+import tempfile
+
+import libioc.errors
+import libioc.helpers
+import libioc.helpers_object
+
+# MyPy
+import libzfs  # noqa: F401
+import libioc.Datasets  # noqa: F401
+
+IndexEntry = typing.Dict[str, typing.Any]
+
+
+class JailIndex(dict):
+    """
+    Jail metadata of a root dataset indexed by jail id.
+
+    Reading the configuration of many jails is expensive, so that their
+    metadata is stored in a single file at the root dataset. An entry holds
+    the jail's config file data and the properties used to filter jails.
+    Entries are only valid as long as the modification time and size of the
+    jail's config file match, so that changes made without libioc result
+    in a full read of the jail config.
+
+    Only values set in the jail's config file are indexed, because values
+    inherited from the host defaults may change without touching the jail.
+    Filters on other properties load the jail.
+
+    Only jails with a JSON config file are indexed.
+    """
+
+    FILE_NAME = ".jails.index.json"
+    VERSION = 1
+
+    PROPERTIES = (
+        "name",
+        "release",
+        "tags",
+        "ip4_addr",
+        "ip6_addr",
+        "priority",
+        "basejail",
+        "basejail_type"
+    )
+
+    root_datasets: 'libioc.Datasets.RootDatasets'
+    changed: bool
+
+    def __init__(
+        self,
+        root_datasets: 'libioc.Datasets.RootDatasets',
+        logger: typing.Optional['libioc.Logger.Logger']=None
+    ) -> None:
+        self.logger = libioc.helpers_object.init_logger(self, logger)
+        self.root_datasets = root_datasets
+        dict.__init__(self, {})
+        self.read()
+
+    @property
+    def file(self) -> str:
+        """Return the absolute path of the index file."""
+        mountpoint = self.root_datasets.root.mountpoint
+        return str(os.path.join(mountpoint, self.FILE_NAME))
+
+    def read(self) -> None:
+        """Read the index file or start with an empty index."""
+        self.clear()
+        self.changed = False
+        try:
+            with open(self.file, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.logger.spam(f"Ignoring unreadable jail index: {e}")
+            return
+
+        if isinstance(data, dict) is False:
+            return
+        if data.get("version") != self.VERSION:
+            return
+        jails = data.get("jails")
+        if isinstance(jails, dict):
+            self.update(jails)
+
+    def save(self) -> None:
+        """Write the index file if entries have changed."""
+        if self.changed is False:
+            return
+
+        temporary_file: typing.Optional[str] = None
+        try:
+            fd, temporary_file = tempfile.mkstemp(
+                prefix=f"{self.FILE_NAME}.",
+                dir=os.path.dirname(self.file)
+            )
+            with os.fdopen(fd, "w") as f:
+                json.dump(dict(version=self.VERSION, jails=self), f)
+            os.chmod(temporary_file, 0o644)
+            os.rename(temporary_file, self.file)
+        except OSError as e:
+            self.logger.spam(f"Could not write jail index: {e}")
+            if temporary_file is not None:
+                try:
+                    os.remove(temporary_file)
+                except OSError:
+                    pass
+            return
+        self.changed = False
+
+    def lookup(
+        self,
+        jail_id: str,
+        dataset: libzfs.ZFSDataset
+    ) -> typing.Optional[IndexEntry]:
+        """
+        Return the index entry of a jail or None when it is missing or stale.
+
+        Args:
+
+            jail_id (str):
+                The id of the jail (last fragment of its dataset name).
+
+            dataset (libzfs.ZFSDataset):
+                The jail's dataset that contains the config file.
+        """
+        entry = self.get(jail_id)
+        if entry is None:
+            return None
+
+        config_file = os.path.join(dataset.mountpoint, entry["config_file"])
+        try:
+            stat = os.stat(config_file)
+        except OSError:
+            return None
+
+        if (stat.st_mtime_ns, stat.st_size) != (entry["mtime"], entry["size"]):
+            return None
+
+        return entry
+
+    def add(self, jail: 'libioc.Jail.JailGenerator') -> None:
+        """Add or replace the index entry of a jail."""
+        jail_id = str(jail.config["id"])
+        if jail.config_type != "json":
+            self.remove(jail_id)
+            return
+
+        config_file = str(jail.config_file)
+        try:
+            stat = os.stat(jail.abspath(config_file))
+        except OSError:
+            self.remove(jail_id)
+            return
+
+        self[jail_id] = dict(
+            config_file=config_file,
+            mtime=stat.st_mtime_ns,
+            size=stat.st_size,
+            config=json.loads(libioc.helpers.to_json(jail.config.data.nested)),
+            properties=self._get_properties(jail)
+        )
+        self.changed = True
+
+    def remove(self, jail_id: str) -> None:
+        """Remove the index entry of a jail."""
+        if jail_id in self.keys():
+            del self[jail_id]
+            self.changed = True
+
+    def _get_properties(
+        self,
+        jail: 'libioc.Jail.JailGenerator'
+    ) -> typing.Dict[str, typing.Any]:
+        """Return the jail properties in the form filters compare them."""
+        properties: typing.Dict[str, typing.Any] = {}
+        explicit_data = jail.config.data
+        for key in self.PROPERTIES:
+            if (key != "name") and (key not in explicit_data):
+                # values resolved from the host defaults might become stale
+                continue
+            try:
+                value = jail.get(key)
+            except Exception:
+                # unavailable properties are matched against the jail
+                continue
+            if isinstance(value, list):
+                properties[key] = [libioc.helpers.to_string(x) for x in value]
+            else:
+                properties[key] = libioc.helpers.to_string(value)
+        return properties
+
+
+def update_jail(
+    jail: 'libioc.Jail.JailGenerator',
+    jail_id: typing.Optional[str]=None,
+    remove: bool=False
+) -> None:
+    """
+    Update or remove the index entry of a jail in its root dataset index.
+
+    Args:
+
+        jail (libioc.Jail.JailGenerator):
+            The jail whose entry is updated.
+
+        jail_id (str): (optional)
+            Remove the entry with this id in addition (e.g. after renaming).
+
+        remove (bool): (default=False)
+            Only remove the entry of the jail.
+    """
+    try:
+        root_datasets = jail.host.datasets.find_root_datasets(
+            jail.dataset_name
+        )
+    except libioc.errors.IocException:
+        return
+
+    index = JailIndex(root_datasets=root_datasets, logger=jail.logger)
+    if jail_id is not None:
+        index.remove(jail_id)
+    if remove is True:
+        index.remove(str(jail.config["id"]))
+    else:
+        index.add(jail)
+    index.save()
@@ -0,0 +1,333 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# Copyright (c) 2014-2018, iocage
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""ioc module for starting and stopping jails along their dependencies."""
+import typing
+import concurrent.futures
+import queue
+
+import libioc.events
+import libioc.errors
+import libioc.helpers_object
+
+# MyPy
+import libioc.Jail  # noqa: F401
+
+DEFAULT_MAX_WORKERS = 4
+
+_JailActionMethod = typing.Callable[
+    ['libioc.Jail.JailGenerator', 'libioc.events.Scope'],
+    typing.Generator['libioc.events.IocEvent', None, None]
+]
+_JailSkipMethod = typing.Callable[
+    ['libioc.Jail.JailGenerator'],
+    typing.Optional[str]
+]
+_JailEventClass = typing.Callable[..., 'libioc.events.JailEvent']
+
+
+class JailDependencyGraph:
+    """
+    Directed graph of jails and the jails they depend on.
+
+    Jails are identified by their full name. The dependencies of a jail are
+    the jails matching the filter terms in its `depends` config property.
+    """
+
+    jails: typing.Dict[str, 'libioc.Jail.JailGenerator']
+    dependencies: typing.Dict[str, typing.Set[str]]
+    dependants: typing.Dict[str, typing.Set[str]]
+
+    def __init__(
+        self,
+        jails: typing.Iterable['libioc.Jail.JailGenerator'],
+        resolve_dependencies: bool=True,
+        logger: typing.Optional['libioc.Logger.Logger']=None
+    ) -> None:
+        """
+        Build the dependency graph of the given jails.
+
+        Args:
+
+            jails (iterable of libioc.Jail.JailGenerator):
+
+                The jails to schedule.
+
+            resolve_dependencies (bool): (default=True)
+
+                When enabled, jails that are depended on but not part of the
+                given jails are added to the graph. Otherwise dependencies
+                outside of the selection are ignored.
+        """
+        self.logger = libioc.helpers_object.init_logger(self, logger)
+        self.jails = {}
+        self.dependencies = {}
+        self.dependants = {}
+
+        pending: typing.List['libioc.Jail.JailGenerator'] = []
+        for jail in jails:
+            if self._add_jail(jail) is True:
+                pending.append(jail)
+
+        while len(pending) > 0:
+            jail = pending.pop(0)
+            for dependency in self._find_dependencies(jail):
+                if dependency.full_name == jail.full_name:
+                    self.logger.warn(f"The jail {jail.name} depends on itself")
+                    continue
+                if dependency.full_name not in self.jails:
+                    if resolve_dependencies is False:
+                        continue
+                    self._add_jail(dependency)
+                    pending.append(dependency)
+                self.dependencies[jail.full_name].add(dependency.full_name)
+                self.dependants[dependency.full_name].add(jail.full_name)
+
+    def _add_jail(self, jail: 'libioc.Jail.JailGenerator') -> bool:
+        if jail.full_name in self.jails:
+            return False
+        self.jails[jail.full_name] = jail
+        self.dependencies[jail.full_name] = set()
+        self.dependants[jail.full_name] = set()
+        return True
+
+    def _find_dependencies(
+        self,
+        jail: 'libioc.Jail.JailGenerator'
+    ) -> typing.Iterable['libioc.Jail.JailGenerator']:
+        depends = jail.config["depends"]
+        if len(depends) == 0:
+            return []
+        import libioc.Jails
+        return libioc.Jails.JailsGenerator(
+            filters=depends,
+            host=jail.host,
+            logger=self.logger,
+            zfs=jail.zfs,
+            running_jails=jail.running_jails
+        )
+
+    def priority(self, full_name: str) -> int:
+        """Return the configured priority of a jail in the graph."""
+        return int(self.jails[full_name].config["priority"])
+
+    def check_cycles(self) -> None:
+        """Raise JailDependencyCycle when the graph contains a cycle."""
+        remaining = {
+            name: len(dependencies)
+            for name, dependencies in self.dependencies.items()
+        }
+        ready = [name for name, count in remaining.items() if count == 0]
+        while len(ready) > 0:
+            name = ready.pop()
+            del remaining[name]
+            for dependant in self.dependants[name]:
+                remaining[dependant] -= 1
+                if remaining[dependant] == 0:
+                    ready.append(dependant)
+
+        if len(remaining) > 0:
+            raise libioc.errors.JailDependencyCycle(
+                jails=[self.jails[name] for name in sorted(remaining)],
+                logger=self.logger
+            )
+
+
+class JailScheduler:
+    """
+    Run an action on all jails of a JailDependencyGraph in parallel.
+
+    A jail is scheduled as soon as all jails it waits for have finished. When
+    running in reverse, jails wait for their dependants instead (for example
+    when stopping jails). Ready jails are scheduled in the order of their
+    priority, lowest first or highest first in reverse.
+
+    Each jail action runs in its own event scope, so that events of jails
+    running at the same time do not interfere. The events are passed to the
+    caller of run() in the order they occur.
+    """
+
+    _FINISHED = object()
+
+    graph: JailDependencyGraph
+    max_workers: int
+
+    def __init__(
+        self,
+        graph: JailDependencyGraph,
+        max_workers: int=DEFAULT_MAX_WORKERS,
+        logger: typing.Optional['libioc.Logger.Logger']=None
+    ) -> None:
+        self.logger = libioc.helpers_object.init_logger(self, logger)
+        self.graph = graph
+        self.max_workers = max(1, int(max_workers))
+
+    def run(
+        self,
+        method: _JailActionMethod,
+        event_class: _JailEventClass,
+        skip: typing.Optional[_JailSkipMethod]=None,
+        reverse: bool=False,
+        event_scope: typing.Optional['libioc.events.Scope']=None
+    ) -> typing.Generator['libioc.events.IocEvent', None, None]:
+        """
+        Run the action on all jails and yield their events.
+
+        Args:
+
+            method (callable):
+
+                Receives the jail and its event scope and returns the
+                generator of events performing the action.
+
+            event_class (libioc.events.JailEvent):
+
+                The event reported for jails that were skipped.
+
+            skip (callable): (default=None)
+
+                Returns a reason to skip a jail or None to run the action.
+                Skipped jails count as finished for their dependants.
+
+            reverse (bool): (default=False)
+
+                Jails wait for their dependants to finish instead of their
+                dependencies.
+
+            event_scope (libioc.events.Scope): (default=None)
+
+                The recorder attached to this scope is passed on to the
+                scopes of the jails.
+
+        When the action fails for a jail, jails that wait for it are skipped.
+        The first error is raised after all other jails were processed.
+        """
+        graph = self.graph
+        graph.check_cycles()
+
+        if reverse is False:
+            waits_for = graph.dependencies
+            unblocks = graph.dependants
+        else:
+            waits_for = graph.dependants
+            unblocks = graph.dependencies
+
+        blocked = {name: len(names) for name, names in waits_for.items()}
+        ready = [name for name, count in blocked.items() if count == 0]
+        failed: typing.Dict[str, str] = {}
+        errors: typing.List[BaseException] = []
+        running = 0
+        events: queue.Queue = queue.Queue()
+        recorder = None if (event_scope is None) else event_scope.recorder
+
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers
+        )
+        try:
+            while (len(ready) > 0) or (running > 0):
+                ready.sort(
+                    key=lambda name: (graph.priority(name), name),
+                    reverse=reverse
+                )
+                while (len(ready) > 0) and (running < self.max_workers):
+                    name = ready.pop(0)
+                    jail = graph.jails[name]
+                    reason = self._get_skip_reason(name, waits_for, failed)
+                    if (reason is None) and (skip is not None):
+                        reason = skip(jail)
+                    if reason is not None:
+                        event = event_class(
+                            jail=jail,
+                            scope=libioc.events.Scope(recorder=recorder)
+                        )
+                        yield event.begin()
+                        yield event.skip(reason)
+                        self._release(name, unblocks, blocked, ready)
+                        continue
+                    executor.submit(
+                        self._run_jail,
+                        jail,
+                        method,
+                        events,
+                        libioc.events.Scope(recorder=recorder)
+                    )
+                    running += 1
+
+                if running == 0:
+                    continue
+
+                name, event, error = events.get()
+                if event is not self._FINISHED:
+                    yield event
+                    continue
+
+                running -= 1
+                if error is not None:
+                    failed[name] = graph.jails[name].humanreadable_name
+                    errors.append(error)
+                self._release(name, unblocks, blocked, ready)
+        finally:
+            executor.shutdown(wait=True)
+
+        if len(errors) > 0:
+            raise errors[0]
+
+    def _get_skip_reason(
+        self,
+        name: str,
+        waits_for: typing.Dict[str, typing.Set[str]],
+        failed: typing.Dict[str, str]
+    ) -> typing.Optional[str]:
+        for other in sorted(waits_for[name]):
+            if other in failed:
+                failed[name] = failed[other]
+                return f"{failed[other]} failed"
+        return None
+
+    def _release(
+        self,
+        name: str,
+        unblocks: typing.Dict[str, typing.Set[str]],
+        blocked: typing.Dict[str, int],
+        ready: typing.List[str]
+    ) -> None:
+        for other in unblocks[name]:
+            blocked[other] -= 1
+            if blocked[other] == 0:
+                ready.append(other)
+
+    def _run_jail(
+        self,
+        jail: 'libioc.Jail.JailGenerator',
+        method: _JailActionMethod,
+        events: queue.Queue,
+        event_scope: 'libioc.events.Scope'
+    ) -> None:
+        error: typing.Optional[BaseException] = None
+        try:
+            for event in method(jail, event_scope):
+                events.put((jail.full_name, event, None))
+        except BaseException as e:
+            error = e
+        events.put((jail.full_name, self._FINISHED, error))
@@ -25,10 +25,22 @@
 """ioc module of jail collections."""
 import libzfs
 import typing
+import os.path
 
 import libioc.Jail
+import libioc.JailIndex
+import libioc.JailScheduler
+import libioc.MountTable
+import libioc.RunningJails
 import libioc.Filter
+import libioc.errors
+import libioc.events
+import libioc.Config.Jail.Globals
+import libioc.Config.Jail.JailConfig
+import libioc.Config.Jail.Properties
+import libioc.Config.Type.ZFS
 import libioc.ListableResource
+import libioc.helpers
 import libioc.helpers_object
 
 
@@ -44,7 +56,20 @@ class JailsGenerator(libioc.ListableResource.ListableResource):
         "ip6.addr"
     ]
 
+    # Keys that filters can match against the kernel state of a jail
+    STATE_KEYS = (
+        "jid",
+        "running"
+    )
+
     resource_args: typing.Dict[str, typing.Any]
+    running_jails: libioc.RunningJails.RunningJails
+    mount_table: libioc.MountTable.MountTable
+    _indexes: typing.Dict[str, libioc.JailIndex.JailIndex]
+    _zfs_property_readers: typing.Dict[
+        str,
+        libioc.Config.Type.ZFS.ZFSPropertyReader
+    ]
 
     def __init__(
         self,
@@ -52,6 +77,10 @@ class JailsGenerator(libioc.ListableResource.ListableResource):
         host: typing.Optional['libioc.Host.HostGenerator']=None,
         logger: typing.Optional['libioc.Logger.Logger']=None,
         zfs: typing.Optional['libioc.ZFS.ZFS']=None,
+        running_jails: typing.Optional[
+            libioc.RunningJails.RunningJails
+        ]=None,
+        mount_table: typing.Optional[libioc.MountTable.MountTable]=None,
         **resource_args: typing.Any
     ) -> None:
 
@@ -59,7 +88,19 @@ class JailsGenerator(libioc.ListableResource.ListableResource):
         self.zfs = libioc.helpers_object.init_zfs(self, zfs)
         self.host = libioc.helpers_object.init_host(self, host)
 
+        if running_jails is None:
+            running_jails = libioc.RunningJails.RunningJails(
+                logger=self.logger
+            )
+        self.running_jails = running_jails
+
+        if mount_table is None:
+            mount_table = libioc.MountTable.MountTable(logger=self.logger)
+        self.mount_table = mount_table
+
         self.resource_args = resource_args
+        self._indexes = {}
+        self._zfs_property_readers = {}
 
         libioc.ListableResource.ListableResource.__init__(
             self,
@@ -74,24 +115,367 @@ class JailsGenerator(libioc.ListableResource.ListableResource):
     def _class_jail(self) -> libioc.Jail.JailGenerator:
         return libioc.Jail.JailGenerator
 
+    def __iter__(
+        self
+    ) -> typing.Generator['libioc.Jail.JailGenerator', None, None]:
+        """Iterate over the jails and refresh stale index entries."""
+        self._indexes = {}
+        self._zfs_property_readers = {}
+        yield from libioc.ListableResource.ListableResource.__iter__(self)
+        for index in self._indexes.values():
+            index.save()
+        self._indexes = {}
+        self._zfs_property_readers = {}
+
+    def refresh_running_jails(self) -> None:
+        """
+        Enumerate the running jails again.
+
+        The snapshot of running jails is taken once and shared with all
+        jails yielded by this instance. Long-lived processes refresh it to
+        observe jails started or stopped by other processes.
+        """
+        self.running_jails.refresh()
+
+    def refresh_mount_table(self) -> None:
+        """
+        Enumerate the mounted filesystems again.
+
+        Like the running jails, the mounted filesystems are enumerated once
+        and shared by the start and stop operations of all jails yielded by
+        this instance.
+        """
+        self.mount_table.refresh()
+
+    def _get_index(
+        self,
+        dataset: libzfs.ZFSDataset
+    ) -> libioc.JailIndex.JailIndex:
+        root_datasets_name = self.sources.find_root_datasets_name(dataset.name)
+        try:
+            return self._indexes[root_datasets_name]
+        except KeyError:
+            pass
+        index = libioc.JailIndex.JailIndex(
+            root_datasets=self.sources[root_datasets_name],
+            logger=self.logger
+        )
+        self._indexes[root_datasets_name] = index
+        return index
+
     def _create_resource_instance(
         self,
         dataset: libzfs.ZFSDataset
     ) -> 'libioc.Jail.JailGenerator':
 
+        jail_id = self._get_asset_name_from_dataset(dataset)
+        index = self._get_index(dataset)
+        entry = index.lookup(jail_id, dataset)
+
+        resource_args: typing.Dict[str, typing.Any] = {}
+        if entry is not None:
+            resource_args["config_type"] = "json"
+            resource_args["config_data"] = entry["config"]
+        else:
+            config_zfs = self._get_zfs_config(dataset)
+            if (config_zfs is not None) and (config_zfs.exists is True):
+                resource_args["config_type"] = "zfs"
+                resource_args["config_data"] = config_zfs.read()
+        resource_args.update(self.resource_args)
+
         jail = self._class_jail(
-            data=dict(id=dataset.name.split("/").pop()),
+            data=dict(id=jail_id),
             root_datasets_name=self.sources.find_root_datasets_name(
                 dataset.name
             ),
             logger=self.logger,
             host=self.host,
             zfs=self.zfs,
-            **self.resource_args
+            running_jails=self.running_jails,
+            mount_table=self.mount_table,
+            **resource_args
         )
 
+        if entry is None:
+            index.add(jail)
+
         return jail
 
+    @property
+    def _state_keys(self) -> typing.Tuple[str, ...]:
+        return self.STATE_KEYS
+
+    def _get_source_values(
+        self,
+        source: int,
+        source_name: str,
+        dataset: libzfs.ZFSDataset
+    ) -> typing.Dict[str, typing.Any]:
+        if source == libioc.Filter.SOURCE_STATE:
+            return self._get_state_values(source_name, dataset)
+        if source == libioc.Filter.SOURCE_PROPERTIES:
+            return self._get_property_values(dataset)
+        return {}
+
+    def _get_state_values(
+        self,
+        source_name: str,
+        dataset: libzfs.ZFSDataset
+    ) -> typing.Dict[str, typing.Any]:
+        jail_id = self._get_asset_name_from_dataset(dataset)
+        identifier = f"{source_name}-{jail_id.replace('.', '*')}"
+        jid = self.running_jails.get_jid(identifier)
+        return dict(
+            jid=jid,
+            running=(jid is not None)
+        )
+
+    def _get_property_values(
+        self,
+        dataset: libzfs.ZFSDataset
+    ) -> typing.Dict[str, typing.Any]:
+        """
+        Return plain config values of jails configured in ZFS properties.
+
+        Jails with a JSON config file are answered from the JailIndex when
+        their entry is up to date. Otherwise jails with a JSON or UCL config
+        file do not use ZFS user properties, so that their config values are
+        not known before loading the jail. Values that JailConfig would
+        transform are omitted as well.
+        """
+        entry = self._get_index(dataset).lookup(
+            self._get_asset_name_from_dataset(dataset),
+            dataset
+        )
+        if entry is not None:
+            properties: typing.Dict[str, typing.Any] = entry["properties"]
+            return properties
+
+        config_zfs = self._get_zfs_config(dataset)
+        if config_zfs is None:
+            return {}
+
+        defaults = libioc.Config.Jail.Globals.DEFAULTS
+        values: typing.Dict[str, typing.Any] = {}
+        for key, value in config_zfs.read().items():
+            if self._is_plain_config_property(key) is False:
+                continue
+            if (key in defaults) and isinstance(defaults[key], list):
+                value = libioc.helpers.parse_list(value)
+            values[key] = value
+        return values
+
+    def _get_zfs_config(
+        self,
+        dataset: libzfs.ZFSDataset
+    ) -> typing.Optional[libioc.Config.Type.ZFS.DatasetConfigZFS]:
+        """
+        Return the ZFS property config of a jail without config file.
+
+        The iocage properties of all jails of a root dataset are read at
+        once and cached for the current iteration, unless the filters select
+        a single jail by its name.
+        """
+        _class_jail = self._class_jail
+        for config_file in (
+            _class_jail.DEFAULT_JSON_FILE,
+            _class_jail.DEFAULT_UCL_FILE
+        ):
+            if os.path.isfile(os.path.join(dataset.mountpoint, config_file)):
+                return None
+
+        filters = self._filters
+        if (filters is not None) and (filters.selects_single_name() is True):
+            return libioc.Config.Type.ZFS.DatasetConfigZFS(
+                dataset=dataset,
+                logger=self.logger,
+                properties=libioc.Config.Type.ZFS.read_iocage_properties(
+                    dataset
+                )
+            )
+
+        root_datasets_name = self.sources.find_root_datasets_name(dataset.name)
+        try:
+            reader = self._zfs_property_readers[root_datasets_name]
+        except KeyError:
+            reader = libioc.Config.Type.ZFS.ZFSPropertyReader(
+                self.sources[root_datasets_name].jails
+            )
+            self._zfs_property_readers[root_datasets_name] = reader
+
+        return libioc.Config.Type.ZFS.DatasetConfigZFS(
+            dataset=dataset,
+            logger=self.logger,
+            properties=reader.read(dataset.name)
+        )
+
+    def _is_plain_config_property(self, key: str) -> bool:
+        if key in libioc.Config.Jail.Properties.properties:
+            return False
+        JailConfig = libioc.Config.Jail.JailConfig.JailConfig
+        return (f"_get_{key}" in dir(JailConfig)) is False
+
+    def start_all(
+        self,
+        max_workers: int=libioc.JailScheduler.DEFAULT_MAX_WORKERS,
+        quick: bool=False,
+        env: typing.Dict[str, str]={},
+        event_scope: typing.Optional['libioc.events.Scope']=None
+    ) -> typing.Generator['libioc.events.IocEvent', None, None]:
+        """
+        Start all jails of the collection and the jails they depend on.
+
+        Jails are started in parallel as soon as the jails they depend on
+        are running. Circular dependencies are detected before any jail is
+        started. Jails that are running already are skipped.
+
+        Args:
+
+            max_workers (int): (default=4)
+
+                The maximum number of jails started at the same time.
+
+            quick (bool):
+
+                Skip several operations that are not required when a jail
+                was unchanged since its last start.
+
+            env (dict):
+
+                Environment variables that are available in all jail hooks.
+
+            event_scope (libioc.events.Scope): (optional)
+
+                The recorder attached to this scope receives the events of
+                all jails.
+        """
+        graph = libioc.JailScheduler.JailDependencyGraph(
+            jails=self,
+            resolve_dependencies=True,
+            logger=self.logger
+        )
+        scheduler = libioc.JailScheduler.JailScheduler(
+            graph=graph,
+            max_workers=max_workers,
+            logger=self.logger
+        )
+
+        # initialize the shared devfs rules before jails access it in parallel
+        devfs = self.host.devfs
+        resource_limit = self.host.resource_limit
+
+        def _start(
+            jail: 'libioc.Jail.JailGenerator',
+            event_scope: 'libioc.events.Scope'
+        ) -> typing.Generator['libioc.events.IocEvent', None, None]:
+            return libioc.Jail.JailGenerator.start(
+                jail,
+                quick=quick,
+                event_scope=event_scope,
+                start_dependant_jails=False,
+                env=env
+            )
+
+        def _skip(jail: 'libioc.Jail.JailGenerator') -> typing.Optional[str]:
+            return "already running" if (jail.running is True) else None
+
+        # new devfs rulesets are written to devfs.rules once for all jails
+        with devfs.batch(), resource_limit.batch():
+            stopped_jails = [jail for jail in self if jail.running is False]
+            try:
+                # resource limits of all jails are applied with one rctl call
+                resource_limit.apply(stopped_jails)
+            except libioc.errors.IocException:
+                # every jail applies and reports its own limits when starting
+                self.logger.verbose(
+                    "Applying the resource limits of all jails at once failed"
+                )
+            try:
+                yield from scheduler.run(
+                    method=_start,
+                    event_class=libioc.events.JailStart,
+                    skip=_skip,
+                    event_scope=event_scope
+                )
+            finally:
+                # remove limits of jails that failed to start
+                resource_limit.clear(
+                    [jail for jail in stopped_jails if jail.running is False]
+                )
+
+    def stop_all(
+        self,
+        max_workers: int=libioc.JailScheduler.DEFAULT_MAX_WORKERS,
+        force: bool=False,
+        env: typing.Dict[str, str]={},
+        event_scope: typing.Optional['libioc.events.Scope']=None
+    ) -> typing.Generator['libioc.events.IocEvent', None, None]:
+        """
+        Stop all jails of the collection.
+
+        Jails are stopped in parallel after the jails of the collection that
+        depend on them were stopped. Jails that are not running are skipped.
+
+        Args:
+
+            max_workers (int): (default=4)
+
+                The maximum number of jails stopped at the same time.
+
+            force (bool): (default=False)
+
+                Ignores failures and enforces teardown if True.
+
+            env (dict):
+
+                Environment variables that are available in all jail hooks.
+
+            event_scope (libioc.events.Scope): (optional)
+
+                The recorder attached to this scope receives the events of
+                all jails.
+        """
+        graph = libioc.JailScheduler.JailDependencyGraph(
+            jails=self,
+            resolve_dependencies=False,
+            logger=self.logger
+        )
+        scheduler = libioc.JailScheduler.JailScheduler(
+            graph=graph,
+            max_workers=max_workers,
+            logger=self.logger
+        )
+
+        def _stop(
+            jail: 'libioc.Jail.JailGenerator',
+            event_scope: 'libioc.events.Scope'
+        ) -> typing.Generator['libioc.events.IocEvent', None, None]:
+            return libioc.Jail.JailGenerator.stop(
+                jail,
+                force=force,
+                event_scope=event_scope,
+                env=env
+            )
+
+        def _skip(jail: 'libioc.Jail.JailGenerator') -> typing.Optional[str]:
+            if (force is True) or (jail.running is True):
+                return None
+            return "not running"
+
+        # resource limits of all jails are cleared with one rctl call
+        try:
+            with self.host.resource_limit.batch():
+                yield from scheduler.run(
+                    method=_stop,
+                    event_class=libioc.events.JailStop,
+                    skip=_skip,
+                    reverse=True,
+                    event_scope=event_scope
+                )
+        except libioc.errors.ResourceLimitActionFailed:
+            if force is False:
+                raise
+
     def __getitem__(self, index: int) -> 'libioc.Jail.JailGenerator':
         """Return the JailGenerator at a certain index position."""
         _getitem = libioc.ListableResource.ListableResource.__getitem__
@@ -106,6 +490,22 @@ class Jails(JailsGenerator):
     def _class_jail(self) -> libioc.Jail.Jail:
         return libioc.Jail.Jail
 
+    def start_all(  # noqa: T484
+        self,
+        *args,
+        **kwargs
+    ) -> typing.List['libioc.events.IocEvent']:
+        """Start all jails of the collection and their dependencies."""
+        return list(JailsGenerator.start_all(self, *args, **kwargs))
+
+    def stop_all(  # noqa: T484
+        self,
+        *args,
+        **kwargs
+    ) -> typing.List['libioc.events.IocEvent']:
+        """Stop all jails of the collection."""
+        return list(JailsGenerator.stop_all(self, *args, **kwargs))
+
     def __getitem__(self, index: int) -> 'libioc.Jail.Jail':
         """Return the Jail object at a certain index position."""
         _getitem = JailsGenerator.__getitem__
@@ -0,0 +1,260 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# Copyright (c) 2014-2018, iocage
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""ioc precompiled plan of the params passed to the kernel on jail start."""
+import typing
+import threading
+
+import freebsd_sysctl.types
+
+import libioc.JailParams
+import libioc.helpers_object
+
+JailParamsType = typing.Mapping[str, 'libioc.JailParams.JailParam']
+LaunchParamValue = typing.Any
+
+_PREFIX = "security.jail.param."
+
+# jail params of these types accept the state names at their list position
+_STATE_NAMES = ("disable", "inherit", "new",)
+_STATE_CTL_TYPES = (freebsd_sysctl.types.NODE, freebsd_sysctl.types.INT,)
+
+# returned by accessors when a param is not passed to the kernel
+SKIP = object()
+
+
+class LaunchParamAccessor:
+    """Return the value of a jail param for a certain jail."""
+
+    __slots__ = ("name",)
+
+    name: str
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def get(self, jail: 'libioc.Jail.JailGenerator') -> LaunchParamValue:
+        """Return the value of the param or SKIP."""
+        raise NotImplementedError("To be implemented by inheriting classes")
+
+    def __repr__(self) -> str:
+        """Return a string representation of the accessor."""
+        return f"<{self.__class__.__name__} {self.name}>"
+
+
+class ConstantParam(LaunchParamAccessor):
+    """Jail param with the same value for all jails."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, name: str, value: LaunchParamValue) -> None:
+        LaunchParamAccessor.__init__(self, name)
+        self.value = value
+
+    def get(self, jail: 'libioc.Jail.JailGenerator') -> LaunchParamValue:
+        """Return the constant value."""
+        return self.value
+
+
+class ConfigParam(LaunchParamAccessor):
+    """Jail param read from the jail config."""
+
+    __slots__ = ("key", "map_states",)
+
+    def __init__(self, name: str, key: str, map_states: bool) -> None:
+        LaunchParamAccessor.__init__(self, name)
+        self.key = key
+        self.map_states = map_states
+
+    def get(self, jail: 'libioc.Jail.JailGenerator') -> LaunchParamValue:
+        """Return the config value of the jail."""
+        value = jail.config[self.key]
+        if (self.map_states is True) and (value in _STATE_NAMES):
+            value = _STATE_NAMES.index(value)
+        return value
+
+
+class ComputedParam(LaunchParamAccessor):
+    """Jail param computed from properties of the jail."""
+
+    __slots__ = ("getter",)
+
+    def __init__(
+        self,
+        name: str,
+        getter: typing.Callable[['libioc.Jail.JailGenerator'], typing.Any]
+    ) -> None:
+        LaunchParamAccessor.__init__(self, name)
+        self.getter = getter
+
+    def get(self, jail: 'libioc.Jail.JailGenerator') -> LaunchParamValue:
+        """Return the computed value."""
+        return self.getter(jail)
+
+
+def _get_devfs_ruleset(jail: 'libioc.Jail.JailGenerator') -> typing.Any:
+    devfs_ruleset = jail.devfs_ruleset
+    if devfs_ruleset is None:
+        return SKIP
+    return int(devfs_ruleset)
+
+
+def _get_ip_addresses(
+    key: str
+) -> typing.Callable[['libioc.Jail.JailGenerator'], typing.List[str]]:
+    def _get(jail: 'libioc.Jail.JailGenerator') -> typing.List[str]:
+        value: typing.List[str] = []
+        for _, addresses in jail.config[key].items():
+            value += [x.ip for x in addresses]
+        return value
+    return _get
+
+
+_COMPUTED_PARAMS: typing.Dict[
+    str,
+    typing.Callable[['libioc.Jail.JailGenerator'], typing.Any]
+] = {
+    f"{_PREFIX}devfs_ruleset": _get_devfs_ruleset,
+    f"{_PREFIX}path": lambda jail: jail.root_dataset.mountpoint,
+    f"{_PREFIX}name": lambda jail: jail.identifier,
+    f"{_PREFIX}host.hostuuid": lambda jail: str(jail.hostuuid),
+    f"{_PREFIX}allow.mount.zfs": lambda jail: int(jail._allow_mount_zfs)
+}
+
+_ADDRESS_PARAMS: typing.Dict[
+    str,
+    typing.Callable[['libioc.Jail.JailGenerator'], typing.Any]
+] = {
+    f"{_PREFIX}ip4.addr": _get_ip_addresses("ip4_addr"),
+    f"{_PREFIX}ip6.addr": _get_ip_addresses("ip6_addr")
+}
+
+
+class LaunchParamPlan:
+    """
+    Plan of the jail params passed to the kernel when a jail is started.
+
+    The jail params supported by the host kernel are mapped to accessors
+    once, so that building the params of a jail is a single pass over the
+    accessors. Whether a jail param is a known config property only depends
+    on the config class, so that one plan is compiled for each config class
+    and for jails with and without VNET.
+    """
+
+    _jail_params: typing.Optional[JailParamsType]
+    _plans: typing.Dict[
+        typing.Tuple[type, bool],
+        typing.Tuple[LaunchParamAccessor, ...]
+    ]
+    lock: threading.Lock
+
+    def __init__(
+        self,
+        jail_params: typing.Optional[JailParamsType]=None,
+        logger: typing.Optional['libioc.Logger.Logger']=None
+    ) -> None:
+        self.logger = libioc.helpers_object.init_logger(self, logger)
+        self._jail_params = jail_params
+        self._plans = {}
+        self.lock = threading.Lock()
+
+    @property
+    def jail_params(self) -> JailParamsType:
+        """Return the memoized jail params of the host."""
+        if self._jail_params is None:
+            self._jail_params = libioc.JailParams.JailParams()
+        return self._jail_params
+
+    def invalidate(self) -> None:
+        """Compile the plans again on next use."""
+        with self.lock:
+            self._plans.clear()
+
+    def get_accessors(
+        self,
+        config: 'libioc.Config.Jail.BaseConfig.BaseConfig',
+        vnet: bool
+    ) -> typing.Tuple[LaunchParamAccessor, ...]:
+        """Return the accessors compiled for the config class."""
+        key = (type(config), vnet,)
+        try:
+            return self._plans[key]
+        except KeyError:
+            pass
+        with self.lock:
+            if key not in self._plans:
+                self._plans[key] = self._compile(config, vnet)
+            return self._plans[key]
+
+    def _compile(
+        self,
+        config: 'libioc.Config.Jail.BaseConfig.BaseConfig',
+        vnet: bool
+    ) -> typing.Tuple[LaunchParamAccessor, ...]:
+        accessors: typing.List[LaunchParamAccessor] = []
+        for sysctl_name, sysctl in self.jail_params.items():
+            name = sysctl.jail_arg_name.rstrip(".")
+            if sysctl_name in _COMPUTED_PARAMS:
+                getter = _COMPUTED_PARAMS[sysctl_name]
+                accessors.append(ComputedParam(name, getter))
+            elif sysctl_name == f"{_PREFIX}vnet":
+                if vnet is True:
+                    # vnet is only used when explicitly enabled
+                    # (friendly to Kernels without VIMAGE support)
+                    accessors.append(ConstantParam(name, 1))
+            elif (vnet is True) and sysctl_name.startswith(f"{_PREFIX}ip"):
+                continue
+            elif sysctl_name in _ADDRESS_PARAMS:
+                getter = _ADDRESS_PARAMS[sysctl_name]
+                accessors.append(ComputedParam(name, getter))
+            elif config.is_known_property(
+                sysctl.iocage_name,
+                explicit=False
+            ) is True:
+                accessors.append(ConfigParam(
+                    name,
+                    key=sysctl.iocage_name,
+                    map_states=(sysctl.ctl_type in _STATE_CTL_TYPES)
+                ))
+        accessors.append(ConstantParam("persist", None))
+
+        self.logger.spam(
+            f"Compiled {len(accessors)} launch params for "
+            f"{type(config).__name__} (vnet={vnet})"
+        )
+        return tuple(accessors)
+
+    def build(
+        self,
+        jail: 'libioc.Jail.JailGenerator'
+    ) -> typing.Dict[str, LaunchParamValue]:
+        """Return the jail params of a jail."""
+        config = jail.config
+        accessors = self.get_accessors(config, vnet=(config["vnet"] is True))
+        params: typing.Dict[str, LaunchParamValue] = {}
+        for accessor in accessors:
+            value = accessor.get(jail)
+            if value is not SKIP:
+                params[accessor.name] = value
+        return params
@@ -90,14 +90,26 @@ class ListableResource(list):
     def __iter__(
         self
     ) -> typing.Generator['libioc.Resource.Resource', None, None]:
-        """Return an iterator over the child datasets."""
+        """
+        Return an iterator over the child datasets.
+
+        Dataset lookups are cached until the iteration has finished.
+        """
         if self.namespace is None:
             raise libioc.errors.ListableResourceNamespaceUndefined(
                 logger=self.logger
             )
 
+        with self.zfs.cached():
+            yield from self._iter_resources()
+
+    def _iter_resources(
+        self
+    ) -> typing.Generator['libioc.Resource.Resource', None, None]:
         filters = self._filters
         has_filters = (filters is not None)
+        if has_filters is True:
+            plan = filters.plan(state_keys=self._state_keys)
 
         for root_name, root_datasets in self.sources.items():
             if (filters is not None):
@@ -111,11 +123,72 @@ class ListableResource(list):
                     # Skip all jails that do not even match the name
                     continue
 
-                # ToDo: Do not load jail if filters do not require to
+                if has_filters is False:
+                    yield self._get_resource_from_dataset(child_dataset)
+                    continue
+
+                unresolved_terms = self._match_dataset(
+                    plan,
+                    source_name=root_name,
+                    dataset=child_dataset
+                )
+                if unresolved_terms is None:
+                    # rejected without loading the resource
+                    continue
+
                 resource = self._get_resource_from_dataset(child_dataset)
-                if self._filters is not None:
-                    if self._filters.match_resource(resource):
-                        yield resource
+                if plan.match_resource(resource, unresolved_terms) is True:
+                    yield resource
+
+    def _match_dataset(
+        self,
+        plan: 'libioc.Filter.QueryPlan',
+        source_name: str,
+        dataset: libzfs.ZFSDataset
+    ) -> typing.Optional[typing.List['libioc.Filter.Term']]:
+        """
+        Evaluate the filter terms that do not require the loaded resource.
+
+        Returns None when the dataset was rejected or the list of terms that
+        need to be matched against the loaded resource.
+        """
+        unresolved_terms: typing.List['libioc.Filter.Term'] = []
+        for source in (
+            libioc.Filter.SOURCE_PROPERTIES,
+            libioc.Filter.SOURCE_STATE
+        ):
+            if plan.requires(source) is False:
+                continue
+            values = self._get_source_values(
+                source,
+                source_name=source_name,
+                dataset=dataset
+            )
+            _unresolved_terms = plan.match_values(plan.stages[source], values)
+            if _unresolved_terms is None:
+                return None
+            unresolved_terms += _unresolved_terms
+        return unresolved_terms + plan.stages[libioc.Filter.SOURCE_CONFIG]
+
+    @property
+    def _state_keys(self) -> typing.Tuple[str, ...]:
+        """Return the keys answered by the resource state."""
+        return ()
+
+    def _get_source_values(
+        self,
+        source: int,
+        source_name: str,
+        dataset: libzfs.ZFSDataset
+    ) -> typing.Dict[str, typing.Any]:
+        """
+        Return the values a cheap filter source knows about a dataset.
+
+        Implementing classes may provide values for SOURCE_PROPERTIES and
+        SOURCE_STATE. Terms with keys missing in the returned dictionary are
+        matched against the loaded resource instead.
+        """
+        return {}
 
     def __getitem__(  # noqa: T484
         self,
@@ -23,8 +23,12 @@
 # IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 """ioc logging module."""
+import collections
+import json
 import os
 import sys
+import threading
+import time
 import typing
 
 import libioc.errors
@@ -44,6 +48,7 @@ class LogEntry:
         self.level = level
         self.indent = indent
         self.logger = logger
+        self.timestamp = time.time()
 
     def edit(
         self,
@@ -69,8 +74,96 @@ class LogEntry:
         return len(self.message.splitlines())
 
 
+class LogSink:
+    """
+    Receive every log entry of a Logger as it is written.
+
+    Sinks stream log entries to their destination and do not retain them.
+    Entries with the level `screen` never reach a sink.
+    """
+
+    def __init__(self, level: str="spam") -> None:
+        if level not in Logger.LOG_LEVELS:
+            raise libioc.errors.InvalidLogLevel(log_level=level)
+        self.level = level
+
+    def accepts(self, log_entry: LogEntry) -> bool:
+        """Return True when the entry is within the sinks log level."""
+        if log_entry.level == "screen":
+            return False
+        max_level = Logger.LOG_LEVELS.index(self.level)
+        return Logger.LOG_LEVELS.index(log_entry.level) <= max_level
+
+    def write(self, log_entry: LogEntry) -> None:
+        """Write the log entry to the sink."""
+        raise NotImplementedError("To be implemented by inheriting classes")
+
+    def close(self) -> None:
+        """Release the resources held by the sink."""
+        pass
+
+
+class FileLogSink(LogSink):
+    """Append log entries as plain text lines to a file."""
+
+    def __init__(self, path: str, level: str="spam") -> None:
+        super().__init__(level=level)
+        self.path = path
+        self._lock = threading.Lock()
+        self._file: typing.Optional[typing.TextIO] = None
+
+    def _open(self) -> typing.TextIO:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="UTF-8")
+        return self._file
+
+    def format(self, log_entry: LogEntry) -> str:
+        """Return the log entry as line of text."""
+        timestamp = time.strftime(
+            "%Y-%m-%dT%H:%M:%S",
+            time.localtime(log_entry.timestamp)
+        )
+        message = log_entry.message.replace("\n", "\\n")
+        return f"{timestamp} [{log_entry.level}] {message}\n"
+
+    def write(self, log_entry: LogEntry) -> None:
+        """Append the log entry to the file."""
+        line = self.format(log_entry)
+        with self._lock:
+            f = self._open()
+            f.write(line)
+            f.flush()
+
+    def close(self) -> None:
+        """Close the file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class JSONLinesLogSink(FileLogSink):
+    """Append log entries as JSON objects, one per line, to a file."""
+
+    def format(self, log_entry: LogEntry) -> str:
+        """Return the log entry as JSON object on a single line."""
+        return json.dumps(dict(
+            timestamp=log_entry.timestamp,
+            level=log_entry.level,
+            indent=log_entry.indent,
+            message=log_entry.message
+        )) + "\n"
+
+
 class Logger:
-    """ioc Logger module."""
+    """
+    ioc Logger module.
+
+    Printed log entries are kept in a bounded history, so that entries of the
+    level `screen` can be redrawn later. Setting print_history_size to 0
+    disables the history (and redrawing) for non-interactive use. Log sinks
+    receive all entries, independent of the history and the print level.
+    """
 
     COLORS = (
         "black",
@@ -114,16 +207,47 @@ class Logger:
 
     __INDENT_PREFIX = "  "
 
-    PRINT_HISTORY: typing.List[LogEntry] = []
+    PRINT_HISTORY_SIZE = 1000
+
+    print_history: typing.Deque[LogEntry]
+    sinks: typing.List[LogSink]
 
     def __init__(
             self,
             print_level: typing.Optional[str]=None,
-            log_directory: str="/var/log/iocage"
+            log_directory: str="/var/log/iocage",
+            print_history_size: int=PRINT_HISTORY_SIZE,
+            sinks: typing.Optional[typing.List[LogSink]]=None
     ) -> None:
         self._print_level = print_level
+        self.print_history = collections.deque(
+            maxlen=max(0, int(print_history_size))
+        )
+        self.sinks = [] if (sinks is None) else list(sinks)
         self._set_log_directory(log_directory)
 
+    @property
+    def print_history_size(self) -> int:
+        """Return the maximum number of entries kept in the history."""
+        return int(self.print_history.maxlen or 0)
+
+    @print_history_size.setter
+    def print_history_size(self, value: int) -> None:
+        """Resize the history, dropping the oldest entries if necessary."""
+        self.print_history = collections.deque(
+            self.print_history,
+            maxlen=max(0, int(value))
+        )
+
+    def add_sink(self, sink: LogSink) -> None:
+        """Stream all following log entries to the sink."""
+        self.sinks.append(sink)
+
+    def remove_sink(self, sink: LogSink) -> None:
+        """Stop streaming log entries to the sink and close it."""
+        self.sinks.remove(sink)
+        sink.close()
+
     @property
     def default_print_level(self) -> str:
         """Return the static default print level."""
@@ -167,9 +291,14 @@ class Logger:
             logger=self
         )
 
+        for sink in self.sinks:
+            if sink.accepts(log_entry) is True:
+                sink.write(log_entry)
+
         if self._should_print_log_entry(log_entry):
             self._print_log_entry(log_entry)
-            self.PRINT_HISTORY.append(log_entry)
+            if self.print_history.maxlen != 0:
+                self.print_history.append(log_entry)
 
         return log_entry
 
@@ -223,7 +352,12 @@ class Logger:
 
     def redraw(self, log_entry: LogEntry) -> None:
         """Redraw and update a log entry that was already printed."""
-        if log_entry not in self.PRINT_HISTORY:
+        if self.print_history.maxlen == 0:
+            raise libioc.errors.CannotRedrawLine(
+                reason="The print history is disabled"
+            )
+
+        if log_entry not in self.print_history:
             raise libioc.errors.CannotRedrawLine(
                 reason="Log entry not found in history"
             )
@@ -237,11 +371,11 @@ class Logger:
             )
 
         # calculate the delta of messages printed since
-        i = self.PRINT_HISTORY.index(log_entry)
-        n = len(self.PRINT_HISTORY)
-        delta = sum(
-            map(lambda i: self.PRINT_HISTORY[i].__len__(), range(i, n))
-        )
+        delta = 0
+        for printed_entry in reversed(self.print_history):
+            delta += printed_entry.__len__()
+            if printed_entry is log_entry:
+                break
 
         output = "".join([
             "\r",
@@ -0,0 +1,229 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# Copyright (c) 2014-2018, iocage
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""ioc snapshot of the host's mounted filesystems."""
+import typing
+import ctypes
+import ctypes.util
+import os.path
+import re
+import threading
+
+import libioc.helpers_object
+
+# struct statfs of FreeBSD 12 and later (sys/mount.h)
+STATFS_VERSION = 0x20140518
+MNT_NOWAIT = 2
+MNT_RDONLY = 0x00000001
+
+_OCTAL_ESCAPE = re.compile(r"\\([0-7]{3})")
+
+
+class _Statfs(ctypes.Structure):
+
+    _fields_ = [
+        ("f_version", ctypes.c_uint32),
+        ("f_type", ctypes.c_uint32),
+        ("f_flags", ctypes.c_uint64),
+        ("f_bsize", ctypes.c_uint64),
+        ("f_iosize", ctypes.c_uint64),
+        ("f_blocks", ctypes.c_uint64),
+        ("f_bfree", ctypes.c_uint64),
+        ("f_bavail", ctypes.c_int64),
+        ("f_files", ctypes.c_uint64),
+        ("f_ffree", ctypes.c_int64),
+        ("f_syncwrites", ctypes.c_uint64),
+        ("f_asyncwrites", ctypes.c_uint64),
+        ("f_syncreads", ctypes.c_uint64),
+        ("f_asyncreads", ctypes.c_uint64),
+        ("f_spare", ctypes.c_uint64 * 10),
+        ("f_namemax", ctypes.c_uint32),
+        ("f_owner", ctypes.c_uint32),
+        ("f_fsid", ctypes.c_int32 * 2),
+        ("f_charspare", ctypes.c_char * 80),
+        ("f_fstypename", ctypes.c_char * 16),
+        ("f_mntfromname", ctypes.c_char * 1024),
+        ("f_mntonname", ctypes.c_char * 1024)
+    ]
+
+
+class Mount:
+    """A mounted filesystem."""
+
+    source: str
+    mountpoint: str
+    fstype: typing.Optional[str]
+    options: typing.List[str]
+
+    def __init__(
+        self,
+        source: str,
+        mountpoint: str,
+        fstype: typing.Optional[str]=None,
+        options: typing.List[str]=[]
+    ) -> None:
+        self.source = source
+        self.mountpoint = mountpoint
+        self.fstype = fstype
+        self.options = list(options)
+
+
+class MountTable(dict):
+    """
+    Snapshot of the mounted filesystems indexed by their mountpoint.
+
+    Checking every fstab line or basejail directory with os.path.ismount()
+    costs two stat syscalls each, so that all mounts are enumerated once
+    with getfsstat(2) when the table is first accessed. Mounting and
+    unmounting with libioc.helpers updates the table when it is passed, so
+    that a table can be shared during a start or stop operation.
+
+    When a file is given, the mounts are read from it in the format of
+    /proc/mounts or `mount -p` instead.
+    """
+
+    file: typing.Optional[str]
+    loaded: bool
+    lock: threading.Lock
+
+    def __init__(
+        self,
+        file: typing.Optional[str]=None,
+        logger: typing.Optional['libioc.Logger.Logger']=None
+    ) -> None:
+        self.logger = libioc.helpers_object.init_logger(self, logger)
+        self.file = file
+        self.loaded = False
+        self.lock = threading.Lock()
+        dict.__init__(self)
+
+    def refresh(self) -> None:
+        """Enumerate the mounted filesystems again."""
+        with self.lock:
+            self._refresh()
+
+    def load(self) -> None:
+        """Enumerate the mounted filesystems unless this already happened."""
+        if self.loaded is True:
+            return
+        with self.lock:
+            if self.loaded is False:
+                self._refresh()
+
+    def is_mounted(self, mountpoint: str) -> bool:
+        """Return True if a filesystem is mounted at the mountpoint."""
+        self.load()
+        return (os.path.normpath(mountpoint) in self.keys()) is True
+
+    def add(
+        self,
+        mountpoint: str,
+        source: str,
+        fstype: typing.Optional[str]=None,
+        options: typing.List[str]=[]
+    ) -> None:
+        """Add a filesystem that was mounted."""
+        self.load()
+        _mountpoint = os.path.normpath(mountpoint)
+        self[_mountpoint] = Mount(
+            source=source,
+            mountpoint=_mountpoint,
+            fstype=fstype,
+            options=options
+        )
+
+    def remove(self, mountpoint: str) -> None:
+        """Remove a filesystem that was unmounted."""
+        self.load()
+        self.pop(os.path.normpath(mountpoint), None)
+
+    def _refresh(self) -> None:
+        if self.file is None:
+            mounts = self._read_fsstat()
+        else:
+            with open(self.file, "r", encoding="utf-8") as f:
+                mounts = self._parse_lines(f.read().splitlines())
+        self.clear()
+        for mount in mounts:
+            self[os.path.normpath(mount.mountpoint)] = mount
+        self.loaded = True
+        self.logger.spam(f"{len(self)} mounted filesystems found")
+
+    def _read_fsstat(self) -> typing.List[Mount]:
+        # getmntinfo(3) returns a static buffer that is shared by all tables
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        getfsstat = libc.getfsstat
+        getfsstat.argtypes = [
+            ctypes.POINTER(_Statfs),
+            ctypes.c_long,
+            ctypes.c_int
+        ]
+        getfsstat.restype = ctypes.c_int
+
+        while True:
+            count = getfsstat(None, 0, MNT_NOWAIT)
+            if count < 0:
+                error_code = ctypes.get_errno()
+                raise OSError(error_code, os.strerror(error_code))
+            # leave room for filesystems mounted in the meantime
+            size = count + 16
+            buffer = (_Statfs * size)()
+            count = getfsstat(buffer, ctypes.sizeof(buffer), MNT_NOWAIT)
+            if count < 0:
+                error_code = ctypes.get_errno()
+                raise OSError(error_code, os.strerror(error_code))
+            if count < size:
+                break
+
+        mounts: typing.List[Mount] = []
+        for i in range(count):
+            statfs = buffer[i]
+            if statfs.f_version != STATFS_VERSION:
+                raise OSError(f"Unsupported statfs version {statfs.f_version}")
+            is_readonly = (statfs.f_flags & MNT_RDONLY) == MNT_RDONLY
+            mounts.append(Mount(
+                source=statfs.f_mntfromname.decode("UTF-8"),
+                mountpoint=statfs.f_mntonname.decode("UTF-8"),
+                fstype=statfs.f_fstypename.decode("UTF-8"),
+                options=["ro" if is_readonly else "rw"]
+            ))
+        return mounts
+
+    def _parse_lines(self, lines: typing.List[str]) -> typing.List[Mount]:
+        mounts: typing.List[Mount] = []
+        for line in lines:
+            fields = line.split()
+            if (len(fields) < 2) or line.lstrip().startswith("#"):
+                continue
+            fields = [self._unescape(x) for x in fields]
+            mounts.append(Mount(
+                source=fields[0],
+                mountpoint=fields[1],
+                fstype=fields[2] if (len(fields) > 2) else None,
+                options=fields[3].split(",") if (len(fields) > 3) else []
+            ))
+        return mounts
+
+    def _unescape(self, value: str) -> str:
+        return _OCTAL_ESCAPE.sub(lambda x: chr(int(x.group(1), 8)), value)
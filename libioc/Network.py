@@ -33,6 +33,7 @@ import libioc.MacAddress
 import libioc.NetworkInterface
 import libioc.Firewall
 import libioc.errors
+import libioc.helpers_ioctl
 import libioc.helpers_object
 
 CreatedCommandList = typing.List[str]
@@ -66,13 +67,14 @@ class Network:
         bridge: typing.Optional[
             'libioc.BridgeInterface.BridgeInterface'
         ]=None,
-        logger: 'libioc.Logger.Logger'=None
+        logger: 'libioc.Logger.Logger'=None,
+        firewall: typing.Optional['libioc.Firewall.Firewall']=None
     ) -> None:
 
         self.logger = libioc.helpers_object.init_logger(self, logger)
-        self.firewall = libioc.Firewall.Firewall(
-            logger=self.logger
-        )
+        if firewall is None:
+            firewall = libioc.Firewall.Firewall(logger=self.logger)
+        self.firewall = firewall
 
         if nic is not None:
             self.nic = nic
@@ -87,7 +89,10 @@ class Network:
 
     def setup(
         self,
-        event_scope: typing.Optional['libioc.events.Scope']=None
+        event_scope: typing.Optional['libioc.events.Scope']=None,
+        plan: typing.Optional[
+            'libioc.NetworkInterface.NetworkInterfacePlan'
+        ]=None
     ) -> typing.Generator['libioc.events.VnetInterfaceConfig', None, None]:
         """
         Apply the network configuration.
@@ -95,6 +100,17 @@ class Network:
         Jails call this method to create the network after being started
         and configure the interfaces on jail and host side according to the
         class attributes.
+
+        Args:
+
+            event_scope (libioc.events.Scope): (optional)
+                Pass on the IocEvent stack for use in higher order functions.
+
+            plan (libioc.NetworkInterface.NetworkInterfacePlan): (optional)
+                When a plan is given, the interface commands are only added
+                to it, so that the commands of multiple networks are applied
+                at once when the caller applies the plan. Firewall rules
+                remain queued as well until the caller applies the firewall.
         """
         if (self.vnet is True):
             self.__require_bridge()
@@ -106,7 +122,15 @@ class Network:
         yield event.begin()
 
         try:
-            self.__create_vnet_iface()
+            if plan is None:
+                _plan = libioc.NetworkInterface.NetworkInterfacePlan(
+                    logger=self.logger
+                )
+                self.__create_vnet_iface(_plan)
+                self.firewall.apply()
+                _plan.apply()
+            else:
+                self.__create_vnet_iface(plan)
         except Exception as e:
             yield event.fail(e)
             raise e
@@ -116,13 +140,26 @@ class Network:
     def teardown(
         self,
         jid: typing.Optional[int]=None,
-        event_scope: typing.Optional['libioc.events.Scope']=None
+        event_scope: typing.Optional['libioc.events.Scope']=None,
+        apply_firewall: bool=True
     ) -> typing.Generator['libioc.events.VnetInterfaceConfig', None, None]:
         """
         Teardown the applied changes.
 
         After Jails are stopped the devices that were used by it remain on the
         host. This method is called by jails after they terminated.
+
+        Args:
+
+            jid (int): (optional)
+                The JID the jail had when it was running.
+
+            event_scope (libioc.events.Scope): (optional)
+                Pass on the IocEvent stack for use in higher order functions.
+
+            apply_firewall (bool): (default=True)
+                When disabled, the deletion of firewall rules remains queued
+                until the caller applies the firewall.
         """
         event = libioc.events.VnetInterfaceConfig(
             jail=self.jail,
@@ -143,6 +180,8 @@ class Network:
             if self._is_secure_vnet_bridge is True:
                 self.__down_secure_mode_devices(jid)
                 self.firewall.delete_rule(jid)
+                if apply_firewall is True:
+                    self.firewall.apply()
         except Exception as e:
             yield event.fail(e)
             raise e
@@ -233,16 +272,27 @@ class Network:
         m.update(self.nic.encode("UTF-8", errors="ignore"))
         return abs(int(m.hexdigest(), 16)) % (2 << 14)
 
+    def __create_epair_interface(self) -> str:
+        """Create an epair interface and return the name of its a-side."""
+        try:
+            return libioc.helpers_ioctl.create_interface("epair")
+        except OSError:
+            self.logger.spam("Creating epair with SIOCIFCREATE2 failed")
+        nic = libioc.NetworkInterface.NetworkInterface(
+            name="epair",
+            create=True,
+            logger=self.logger
+        )
+        return str(nic.name)
+
     def __create_new_epair_interface(
         self,
+        plan: libioc.NetworkInterface.NetworkInterfacePlan,
         nic_suffix_a: str=":a",
         nic_suffix_b: str=":b",
         mac_addresses: typing.Optional[libioc.MacAddress.MacAddressPair]=None,
         **nic_args: typing.Any
-    ) -> typing.Tuple[
-        libioc.NetworkInterface.NetworkInterface,
-        libioc.NetworkInterface.NetworkInterface
-    ]:
+    ) -> typing.Tuple[str, str]:
 
         if mac_addresses is None:
             nic_a_mac = None
@@ -251,33 +301,32 @@ class Network:
             nic_a_mac = mac_addresses.a
             nic_b_mac = mac_addresses.b
 
-        nic_a = libioc.NetworkInterface.NetworkInterface(
-            name="epair",
-            create=True,
-            logger=self.logger
-        )
-        nic_b_name = nic_a.name[:-1] + "b"
+        nic_a_name = self.__create_epair_interface()
+        nic_b_name = nic_a_name[:-1] + "b"
 
-        nic_a = libioc.NetworkInterface.NetworkInterface(
-            name=nic_a.name,
+        nic_a_name = plan.add(libioc.NetworkInterface.NetworkInterface(
+            name=nic_a_name,
             rename=f"{self._escaped_nic_name}:{self.jail.jid}{nic_suffix_a}",
             logger=self.logger,
             mac=nic_a_mac,
+            auto_apply=False,
             **nic_args
-        )
+        ))
 
-        nic_b = libioc.NetworkInterface.NetworkInterface(
+        nic_b_name = plan.add(libioc.NetworkInterface.NetworkInterface(
             name=nic_b_name,
             rename=f"{self._escaped_nic_name}:{self.jail.jid}{nic_suffix_b}",
             logger=self.logger,
             mac=nic_b_mac,
+            auto_apply=False,
             **nic_args
-        )
+        ))
 
-        return nic_a, nic_b
+        return nic_a_name, nic_b_name
 
     def __create_vnet_iface(
-        self
+        self,
+        plan: libioc.NetworkInterface.NetworkInterfacePlan
     ) -> None:
 
         if self._is_secure_vnet_bridge is True:
@@ -300,7 +349,8 @@ class Network:
                 logger=self.logger
             )
 
-        nic_a, nic_b = self.__create_new_epair_interface(
+        nic_a_name, nic_b_name = self.__create_new_epair_interface(
+            plan,
             nic_suffix_a="",
             nic_suffix_b=":j",
             mac_addresses=mac_address_pair,
@@ -312,13 +362,15 @@ class Network:
         bridge = self.bridge  # type: libioc.BridgeInterface.BridgeInterface
 
         if self._is_secure_vnet_bridge is False:
-            libioc.NetworkInterface.NetworkInterface(
+            plan.add(libioc.NetworkInterface.NetworkInterface(
                 name=bridge.name,
-                addm=nic_a.name,
-                logger=self.logger
-            )
+                addm=nic_a_name,
+                logger=self.logger,
+                auto_apply=False
+            ))
         else:
-            nic_c, nic_d = self.__create_new_epair_interface(
+            nic_c_name, nic_d_name = self.__create_new_epair_interface(
+                plan,
                 nic_suffix_a=":a",
                 nic_suffix_b=":b",
                 mtu=self.mtu
@@ -333,52 +385,58 @@ class Network:
                 name="bridge",
                 create=True,
                 destroy=True,
-                rename=f"{self._escaped_nic_name}:{self.jail.jid}:net"
+                rename=f"{self._escaped_nic_name}:{self.jail.jid}:net",
+                auto_apply=False
             )
+            sec_bridge_name = plan.add(sec_bridge)
 
-            # ToDo: merge with above step by moving addm
             # add nic to secure bridge
-            libioc.NetworkInterface.NetworkInterface(
-                name=sec_bridge.name,
+            plan.add(libioc.NetworkInterface.NetworkInterface(
+                name=sec_bridge_name,
                 addm=[
-                    nic_a.name,
-                    nic_d.name
+                    nic_a_name,
+                    nic_d_name
                 ],
-                logger=self.logger
-            )
+                logger=self.logger,
+                auto_apply=False
+            ))
 
             # add nic to jail bridge
-            libioc.NetworkInterface.NetworkInterface(
+            plan.add(libioc.NetworkInterface.NetworkInterface(
                 name=bridge.name,
-                addm=nic_c.name,
-                logger=self.logger
-            )
+                addm=nic_c_name,
+                logger=self.logger,
+                auto_apply=False
+            ))
 
         # up host if
-        libioc.NetworkInterface.NetworkInterface(
-            name=nic_a.name,
-            logger=self.logger
-        )
+        plan.add(libioc.NetworkInterface.NetworkInterface(
+            name=nic_a_name,
+            logger=self.logger,
+            auto_apply=False
+        ))
 
         # assign epair_b to jail
-        libioc.NetworkInterface.NetworkInterface(
-            name=nic_b.name,
+        plan.add(libioc.NetworkInterface.NetworkInterface(
+            name=nic_b_name,
             vnet=self.jail.identifier,
             extra_settings=[],
-            logger=self.logger
-        )
+            logger=self.logger,
+            auto_apply=False
+        ))
 
         # configure network inside the jail
-        libioc.NetworkInterface.NetworkInterface(
-            name=f"{self._escaped_nic_name}:{self.jail.jid}:j",
+        plan.add(libioc.NetworkInterface.NetworkInterface(
+            name=nic_b_name,
             mac=str(mac_address_pair.b),
             mtu=self.mtu,
             rename=self._escaped_nic_name,
             jail=self.jail,
             ipv4_addresses=self.ipv4_addresses,
             ipv6_addresses=self.ipv6_addresses,
-            logger=self.logger
-        )
+            logger=self.logger,
+            auto_apply=False
+        ))
 
     def __configure_firewall(self, mac_address: str) -> None:
 
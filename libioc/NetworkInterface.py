@@ -143,6 +143,8 @@ class NetworkInterface:
 
         values: typing.List[str]
         for key in self.settings:
+            if key == "vnet":
+                continue
             value = self.settings[key]
             if isinstance(value, list) is True:
                 _value: typing.Any = value
@@ -156,6 +158,10 @@ class NetworkInterface:
         if self.extra_settings:
             command += self.extra_settings
 
+        # the interface is not accessible after moving it to another vnet
+        if "vnet" in self.settings:
+            command += ["vnet", str(self.settings["vnet"])]
+
         has_name = "name" in self.settings
         if self.destroy and has_name and not self.rename:
             self.destroy_interface()
@@ -200,6 +206,46 @@ class NetworkInterface:
         """Return the current NIC reference for usage in shell scripts."""
         return str(self.name)
 
+    @property
+    def target_nic_name(self) -> str:
+        """Return the NIC name after the settings were applied."""
+        if self.rename is True:
+            return str(self.settings["name"])
+        return self.current_nic_name
+
+    def merge(self, nic: 'NetworkInterface') -> None:
+        """
+        Add the operations of another NetworkInterface to this one.
+
+        The other NetworkInterface must refer to the same interface, either
+        by its current name or by the name it has after being renamed. Bridge
+        members are appended, other settings are overridden.
+        """
+        for key, value in nic.settings.items():
+            if key == "addm":
+                self.settings["addm"] = self.__as_list(
+                    self.settings.get("addm", [])
+                ) + self.__as_list(value)
+            else:
+                self.settings[key] = value
+        if nic.rename is True:
+            self.rename = True
+        self.create = self.create or nic.create
+        for extra_setting in nic.extra_settings:
+            if extra_setting not in self.extra_settings:
+                self.extra_settings.append(extra_setting)
+        self.ipv4_addresses = list(self.ipv4_addresses) + list(
+            nic.ipv4_addresses
+        )
+        self.ipv6_addresses = list(self.ipv6_addresses) + list(
+            nic.ipv6_addresses
+        )
+
+    def __as_list(self, value: typing.Any) -> typing.List[typing.Any]:
+        if isinstance(value, list) is True:
+            return list(value)
+        return [value]
+
     def __apply_addresses(
         self,
         addresses: typing.Union[
@@ -244,3 +290,77 @@ class NetworkInterface:
     def _handle_exec_stdout(self, stdout: str) -> None:
         if (self.create or self.rename) is True:
             self.name = stdout.strip()
+
+
+class NetworkInterfacePlan:
+    """
+    Planner that applies the operations of many NICs with few commands.
+
+    Every ifconfig call is a process spawn, so that NetworkInterface
+    operations referring to the same interface are merged into a single
+    command. Operations are identified by the current interface name or
+    the name an interface is renamed to by an earlier planned operation.
+
+    The planned commands are applied in three phases: interfaces on the
+    host first, then bridges so that their members already have their final
+    names, and finally the interfaces inside of jails that were moved there
+    in the first phase.
+    """
+
+    interfaces: typing.List[NetworkInterface]
+    _names: typing.Dict[typing.Tuple[typing.Optional[str], str], int]
+
+    def __init__(
+        self,
+        logger: typing.Optional['libioc.Logger.Logger']=None
+    ) -> None:
+        self.logger = libioc.helpers_object.init_logger(self, logger)
+        self.interfaces = []
+        self._names = {}
+
+    def add(self, nic: NetworkInterface) -> str:
+        """
+        Plan the operations of a NetworkInterface without applying them.
+
+        Returns the name of the interface after the plan was applied.
+        """
+        jail_key = self.__get_jail_key(nic)
+        key = (jail_key, nic.current_nic_name)
+        if (nic.create is False) and (key in self._names):
+            planned_nic = self.interfaces[self._names[key]]
+            planned_nic.merge(nic)
+            position = self._names[key]
+        else:
+            # created interfaces (e.g. `bridge`) are distinct even when
+            # their names match, so they are only known by the new name
+            planned_nic = nic
+            position = len(self.interfaces)
+            self.interfaces.append(nic)
+            if nic.create is False:
+                self._names[key] = position
+        target_key = (jail_key, planned_nic.target_nic_name)
+        self._names[target_key] = position
+        return planned_nic.target_nic_name
+
+    def apply(self) -> None:
+        """Apply all planned operations."""
+        interfaces = sorted(self.interfaces, key=self.__get_phase)
+        self.logger.spam(
+            f"Applying {len(interfaces)} planned network interface commands"
+        )
+        self.interfaces = []
+        self._names = {}
+        for nic in interfaces:
+            nic.apply()
+
+    def __get_phase(self, nic: NetworkInterface) -> int:
+        if nic.jail is not None:
+            return 2
+        if "addm" in nic.settings:
+            return 1
+        return 0
+
+    def __get_jail_key(self, nic: NetworkInterface) -> typing.Optional[str]:
+        if nic.jail is None:
+            return None
+        return str(nic.jail.full_name)
@@ -36,8 +36,10 @@ reasonable to seed newly created jails from latest packages, rather than
 managing a template, that tempts to outdate.
 """
 import typing
+import concurrent.futures
 import math
 import os.path
+import queue
 import re
 
 import libzfs
@@ -53,6 +55,12 @@ _PkgConfDataType = typing.Union[
     typing.List[typing.Union[str, int, bool]],
     typing.Dict[str, typing.Union[str, int, bool]]
 ]
+_PkgProvisioningJob = typing.Tuple[
+    'libioc.Jail.JailGenerator',
+    typing.Union[str, typing.List[str]]
+]
+
+DEFAULT_MAX_WORKERS = 4
 
 
 class Pkg:
@@ -293,9 +301,18 @@ class Pkg:
         packages: typing.Union[str, typing.List[str]],
         jail: 'libioc.Jail.JailGenerator',
         event_scope: typing.Optional['libioc.events.Scope']=None,
-        postinstall: typing.List[str]=[]
+        postinstall: typing.List[str]=[],
+        force_update: bool=True
     ) -> typing.Generator[libioc.events.PkgEvent, None, None]:
-        """Install locally mirrored packages to a jail."""
+        """
+        Install locally mirrored packages to a jail.
+
+        Args:
+
+            force_update (bool): (default=True)
+                Download the full catalogue of the local mirror, even when
+                pkg in the jail considers its copy as up to date.
+        """
         _packages = self._normalize_packages(packages)
 
         packageInstallEvent = libioc.events.PackageInstall(
@@ -309,8 +326,8 @@ class Pkg:
             command = "\n".join([
                 " ".join([
                     "/usr/sbin/pkg",
-                    "update",
-                    "--force",
+                    "update"
+                ] + (["--force"] if (force_update is True) else []) + [
                     "--repository", "libioc"
                 ]),
                 " ".join([
@@ -427,6 +444,161 @@ class Pkg:
             postinstall=postinstall
         )
 
+    def provision(
+        self,
+        jobs: typing.Iterable[_PkgProvisioningJob],
+        event_scope: typing.Optional['libioc.events.Scope']=None,
+        postinstall: typing.List[str]=[],
+        max_workers: int=DEFAULT_MAX_WORKERS
+    ) -> typing.Generator[libioc.events.PkgEvent, None, None]:
+        """
+        Mirror and install packages to many jails at once.
+
+        Jails are grouped by the major version of their release. The union of
+        the packages wanted by the jails of a group is mirrored at once, so
+        that the remote repository is updated and the local index is built
+        only once per ABI. Afterwards the packages are installed to the jails
+        in parallel from the shared mirror. Each jail runs in its own event
+        scope.
+
+        Args:
+
+            jobs (iterable of (libioc.Jail.JailGenerator, list of str)):
+                Pairs of a jail and the packages to install to it. Packages
+                of multiple pairs of the same jail are installed together.
+
+            postinstall (list of str): (optional)
+                Commands run in each jail after the packages were installed.
+
+            max_workers (int): (default=4)
+                The maximum number of jails installed to simultaneously.
+
+        When the installation fails for a jail, the other jails are still
+        processed. The first error is raised afterwards.
+        """
+        batches = self._get_provisioning_batches(jobs)
+
+        for release, jail_packages in batches.values():
+            packages: typing.List[str] = sorted(set(
+                package
+                for _, _packages in jail_packages.values()
+                for package in _packages
+            ))
+            yield from self.fetch(
+                packages=packages,
+                release=release,
+                event_scope=event_scope
+            )
+
+        installations = [
+            installation
+            for _, jail_packages in batches.values()
+            for installation in jail_packages.values()
+        ]
+        if len(installations) == 0:
+            return
+
+        events: queue.Queue = queue.Queue()
+        errors: typing.List[BaseException] = []
+        recorder = None if (event_scope is None) else event_scope.recorder
+
+        def _run(
+            jail: 'libioc.Jail.JailGenerator',
+            packages: typing.List[str]
+        ) -> None:
+            error: typing.Optional[BaseException] = None
+            try:
+                for event in self._provision_jail(
+                    jail=jail,
+                    packages=packages,
+                    postinstall=postinstall,
+                    event_scope=libioc.events.Scope(recorder=recorder)
+                ):
+                    events.put((event, False))
+            except BaseException as e:
+                error = e
+            events.put((error, True))
+
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(installations)))
+        )
+        try:
+            for jail, packages in installations:
+                executor.submit(_run, jail, packages)
+            pending = len(installations)
+            while pending > 0:
+                item, finished = events.get()
+                if finished is False:
+                    yield item
+                    continue
+                pending -= 1
+                if item is not None:
+                    errors.append(item)
+        finally:
+            executor.shutdown(wait=True)
+
+        if len(errors) > 0:
+            raise errors[0]
+
+    def _get_provisioning_batches(
+        self,
+        jobs: typing.Iterable[_PkgProvisioningJob]
+    ) -> typing.Dict[int, typing.Tuple[
+        'libioc.Release.ReleaseGenerator',
+        typing.Dict[str, typing.Tuple[
+            'libioc.Jail.JailGenerator',
+            typing.List[str]
+        ]]
+    ]]:
+        """Group the jobs by release major version and merge them by jail."""
+        batches: typing.Dict[int, typing.Tuple[
+            'libioc.Release.ReleaseGenerator',
+            typing.Dict[str, typing.Tuple[
+                'libioc.Jail.JailGenerator',
+                typing.List[str]
+            ]]
+        ]] = {}
+        for jail, packages in jobs:
+            release_major_version = self.__get_release_major_version(
+                jail.release
+            )
+            if release_major_version not in batches:
+                batches[release_major_version] = (jail.release, {})
+            jail_packages = batches[release_major_version][1]
+            if jail.full_name not in jail_packages:
+                jail_packages[jail.full_name] = (jail, [])
+            merged_packages = jail_packages[jail.full_name][1]
+            for package in self._normalize_packages(packages):
+                if package not in merged_packages:
+                    merged_packages.append(package)
+        return batches
+
+    def _provision_jail(
+        self,
+        jail: 'libioc.Jail.JailGenerator',
+        packages: typing.List[str],
+        postinstall: typing.List[str]=[],
+        event_scope: typing.Optional['libioc.events.Scope']=None
+    ) -> typing.Generator[libioc.events.PkgEvent, None, None]:
+        if event_scope is None:
+            event_scope = libioc.events.Scope()
+        yield from self.configure(
+            jail=jail,
+            event_scope=event_scope
+        )
+        yield from self.bootstrap(
+            jail=jail,
+            event_scope=event_scope
+        )
+        # the mirror index was rebuilt before, so pkg detects the change
+        yield from self.install(
+            packages=packages,
+            jail=jail,
+            event_scope=event_scope,
+            postinstall=postinstall,
+            force_update=False
+        )
+
     def _normalize_packages(
         self,
         packages: typing.Union[str, typing.List[str]]
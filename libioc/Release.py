@@ -34,6 +34,7 @@ import re
 import libzfs
 
 import libioc.ZFS
+import libioc.AssetDownload
 import libioc.errors
 import libioc.helpers
 import libioc.helpers_object
@@ -41,7 +42,7 @@ import libioc.events
 import libioc.LaunchableResource
 import libioc.ResourceSelector
 import libioc.Jail
-import libioc.SecureTarfile
+import libioc.AssetExtraction
 
 # MyPy
 import libioc.Resource
@@ -240,6 +241,7 @@ class ReleaseGenerator(ReleaseResource):
     host: 'libioc.Host.HostGenerator'
     _resource: libioc.Resource.Resource
     _assets: typing.List[str]
+    _asset_hashes: typing.Dict[str, str]
     _mirror_url: typing.Optional[str]
 
     def __init__(
@@ -284,6 +286,7 @@ class ReleaseGenerator(ReleaseResource):
         self._mirror_url = None
 
         self._hashes = None
+        self._asset_hashes = {}
         self.check_hashes = check_hashes is True
         self.check_eol = check_eol is True
 
@@ -655,7 +658,8 @@ class ReleaseGenerator(ReleaseResource):
         update: bool=False,
         fetch_updates: bool=False,
         event_scope: typing.Optional['libioc.events.Scope']=None,
-        update_base: typing.Optional[bool]=None
+        update_base: typing.Optional[bool]=None,
+        parallelism: typing.Optional[int]=None
     ) -> typing.Generator['libioc.events.IocEvent', None, None]:
         """
         Fetch the release from the remote.
@@ -684,6 +688,13 @@ class ReleaseGenerator(ReleaseResource):
                 Those ZFS basejail datasets are required to start basejails
                 created with iocage_legacy.
                 A boolean value overrides the configuration from /etc/rc.conf.
+
+            parallelism (int): (optional)
+
+                The maximum number of assets that are downloaded or
+                extracted at the same time. Downloads default to
+                libioc.AssetDownload.DEFAULT_MAX_WORKERS and extractions to
+                the number of CPUs.
         """
         release_changed: typing.Optional[bool] = None
         self._require_release_supported()
@@ -730,7 +741,13 @@ class ReleaseGenerator(ReleaseResource):
             yield releasePrepareStorageEvent.end()
             yield releaseDownloadEvent.begin()
             try:
-                yield from self._fetch_assets(releaseDownloadEvent.scope)
+                yield from self._fetch_assets(
+                    releaseDownloadEvent.scope,
+                    max_workers=(
+                        libioc.AssetDownload.DEFAULT_MAX_WORKERS
+                        if parallelism is None else parallelism
+                    )
+                )
             except Exception:
                 yield releaseDownloadEvent.fail()
                 raise
@@ -739,7 +756,10 @@ class ReleaseGenerator(ReleaseResource):
             yield releaseExtractionEvent.begin()
 
             try:
-                self._extract_assets()
+                yield from self._extract_assets(
+                    releaseExtractionEvent.scope,
+                    max_workers=parallelism
+                )
             except Exception as e:
                 yield releaseExtractionEvent.fail(e)
                 raise
@@ -879,7 +899,7 @@ class ReleaseGenerator(ReleaseResource):
             self.logger.verbose(
                 f"Deleting release snapshot {self.name}@{identifier}"
             )
-            existing_snapshot.delete()
+            self.zfs.delete_snapshot(existing_snapshot)
             existing_snapshot = None
 
         self.root_dataset.snapshot(snapshot_name)
@@ -900,11 +920,26 @@ class ReleaseGenerator(ReleaseResource):
     def _fetch_assets(
         self,
         event_scope: typing.Optional['libioc.events.Scope']=None,
+        max_workers: int=libioc.AssetDownload.DEFAULT_MAX_WORKERS
     ) -> typing.Generator['libioc.events.IocEvent', None, None]:
+        """
+        Download the release assets in parallel.
+
+        Partially downloaded assets are resumed. The SHA-256 hashes of the
+        assets are computed during the download and memoized for the hash
+        verification before their extraction.
+        """
+        downloads: typing.List[libioc.AssetDownload.AssetDownload] = []
+        download_events: typing.Dict[
+            str,
+            libioc.events.ReleaseAssetDownload
+        ] = {}
+
         for asset in self.assets:
 
             releaseAssetDownloadEvent = libioc.events.ReleaseAssetDownload(
                 release=self,
+                asset_name=asset,
                 scope=event_scope
             )
             yield releaseAssetDownloadEvent.begin()
@@ -912,20 +947,40 @@ class ReleaseGenerator(ReleaseResource):
             path = self._get_asset_location(asset)
 
             if os.path.isfile(path):
-                yield releaseAssetDownloadEvent.skip("{path} already exists")
-            else:
-                try:
-                    self.logger.debug(f"Starting download of {url}")
-                    urllib.request.urlretrieve(url, path)  # nosec: validated
-                    self.logger.verbose(f"{url} was saved to {path}")
-                    yield releaseAssetDownloadEvent.end()
-                except urllib.error.HTTPError as http_error:
-                    yield releaseAssetDownloadEvent.fail()
-                    raise libioc.errors.DownloadFailed(
-                        url=url,
-                        code=http_error.code,
-                        logger=self.logger
-                    )
+                yield releaseAssetDownloadEvent.skip(f"{path} already exists")
+                continue
+
+            downloads.append(libioc.AssetDownload.AssetDownload(
+                url=url,
+                path=path,
+                logger=self.logger
+            ))
+            download_events[path] = releaseAssetDownloadEvent
+
+        asset_names = dict([
+            (self._get_asset_location(asset), asset) for asset in self.assets
+        ])
+        for asset_download, finished in libioc.AssetDownload.download(
+            downloads,
+            max_workers=max_workers
+        ):
+            releaseAssetDownloadEvent = download_events[asset_download.path]
+            yield releaseAssetDownloadEvent.progress(
+                bytes_received=asset_download.bytes_received,
+                total_bytes=asset_download.total_bytes,
+                throughput=asset_download.throughput
+            )
+            if finished is False:
+                continue
+
+            if asset_download.error is not None:
+                yield releaseAssetDownloadEvent.fail(asset_download.error)
+                raise asset_download.error
+
+            if asset_download.sha256 is not None:
+                asset_name = asset_names[asset_download.path]
+                self._asset_hashes[asset_name] = asset_download.sha256
+            yield releaseAssetDownloadEvent.end()
 
     def read_hashes(self) -> typing.Dict[str, str]:
         """Read the release asset hashes."""
@@ -956,19 +1011,67 @@ class ReleaseGenerator(ReleaseResource):
     def _get_asset_location(self, asset_name: str) -> str:
         return f"{self.download_directory}/{asset_name}.txz"
 
-    def _extract_assets(self) -> None:
+    def _extract_assets(
+        self,
+        event_scope: typing.Optional['libioc.events.Scope']=None,
+        max_workers: typing.Optional[int]=None
+    ) -> typing.Generator['libioc.events.IocEvent', None, None]:
+        """
+        Extract the release assets in parallel worker processes.
+
+        The assets contain disjoint parts of the release tree, so that
+        decompressing them simultaneously makes use of multiple CPUs.
+        """
+        extractions: typing.List[
+            libioc.AssetExtraction.AssetExtraction
+        ] = []
+        extraction_events: typing.Dict[
+            str,
+            libioc.events.ReleaseAssetExtraction
+        ] = {}
 
         for asset in self.assets:
 
             if self.check_hashes:
                 self._check_asset_hash(asset)
 
-            libioc.SecureTarfile.extract(
-                file=self._get_asset_location(asset),
-                compression_format="xz",
+            releaseAssetExtractionEvent = libioc.events.ReleaseAssetExtraction(
+                release=self,
+                asset_name=asset,
+                scope=event_scope
+            )
+            yield releaseAssetExtractionEvent.begin()
+            path = self._get_asset_location(asset)
+            extractions.append(libioc.AssetExtraction.AssetExtraction(
+                file=path,
                 destination=self.root_dir,
-                logger=self.logger
+                compression_format="xz"
+            ))
+            extraction_events[path] = releaseAssetExtractionEvent
+
+        for asset_extraction, finished in libioc.AssetExtraction.extract(
+            extractions,
+            max_workers=max_workers
+        ):
+            releaseAssetExtractionEvent = extraction_events[
+                asset_extraction.file
+            ]
+            yield releaseAssetExtractionEvent.progress(
+                bytes_read=asset_extraction.bytes_read,
+                total_bytes=asset_extraction.total_bytes,
+                throughput=asset_extraction.throughput
             )
+            if finished is False:
+                continue
+
+            if asset_extraction.error is not None:
+                yield releaseAssetExtractionEvent.fail(asset_extraction.error)
+                raise asset_extraction.error
+
+            self.logger.verbose(
+                f"{asset_extraction.file} was extracted to {self.root_dir}"
+            )
+            yield releaseAssetExtractionEvent.end()
 
     def _set_default_rc_conf(self) -> bool:
 
@@ -1011,6 +1114,7 @@ class ReleaseGenerator(ReleaseResource):
         self.logger.debug(f"Base release '{self.name}' updated")
 
     def _cleanup(self) -> None:
+        self._asset_hashes = {}
         for asset in self.assets:
             asset_location = self._get_asset_location(asset)
             if os.path.isfile(asset_location):
@@ -1037,6 +1141,8 @@ class ReleaseGenerator(ReleaseResource):
         )
 
     def _read_asset_hash(self, asset_name: str) -> str:
+        if asset_name in self._asset_hashes.keys():
+            return self._asset_hashes[asset_name]
         asset_location = self._get_asset_location(asset_name)
         sha256 = hashlib.sha256()
         with open(asset_location, "rb") as f:
@@ -1077,14 +1183,16 @@ class Release(ReleaseGenerator):
         self,
         update: bool=False,
         fetch_updates: bool=False,
-        event_scope: typing.Optional['libioc.events.Scope']=None
+        event_scope: typing.Optional['libioc.events.Scope']=None,
+        parallelism: typing.Optional[int]=None
     ) -> typing.List['libioc.events.IocEvent']:
         """Fetch the release from the remote synchronously."""
         return list(ReleaseGenerator.fetch(
             self,
             update=update,
             fetch_updates=fetch_updates,
-            event_scope=event_scope
+            event_scope=event_scope,
+            parallelism=parallelism
         ))
 
     def destroy(  # noqa: T484
@@ -24,15 +24,20 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """ioc Resource extension that managed exporting and importing backups."""
 import typing
-import tarfile
+import subprocess
 import tempfile
 import os
 import os.path
 import enum
 import libzfs
 
+import libioc.BackupBundle
+import libioc.DatasetDelta
 import libioc.events
 
+# paths deleted from the release are listed in this file of a backup
+ROOT_DELETIONS_MANIFEST = "root.deleted.json"
+
 
 class Format(enum.Enum):
     """Enum of the backup formats."""
@@ -49,11 +54,15 @@ class LaunchableResourceBackup:
     instance uses a global temp directory that is deleted when the lock is
     removed. In fact the existence of a temp directory indicates the locked
     state.
+
+    Archive exports are streamed into the bundle while the assets are
+    exported, so that the temp directory is only used as fallback.
     """
 
     resource: 'libioc.LaunchableResource.LaunchableResource'
     _work_dir: typing.Optional[typing.Union[str, tempfile.TemporaryDirectory]]
     _snapshot_name: typing.Optional[str]
+    _bundle: typing.Optional['libioc.BackupBundle.BundleWriter']
 
     def __init__(
         self,
@@ -62,6 +71,7 @@ class LaunchableResourceBackup:
         self.resource = resource
         self._work_dir = None
         self._snapshot_name = None
+        self._bundle = None
 
     @property
     def logger(self) -> 'libioc.Logger.Logger':
@@ -158,7 +168,8 @@ class LaunchableResourceBackup:
 
             source (str):
 
-                The path to the exported archive file (tar.gz)
+                The path to the exported archive file (tar.gz, txz or
+                tar.zst) or directory
         """
         if os.path.exists(source) is False:
             raise libioc.errors.BackupSourceDoesNotExist(
@@ -166,11 +177,16 @@ class LaunchableResourceBackup:
                 logger=self.logger
             )
 
+        compression_format: typing.Optional[str] = None
         if os.path.isdir(source) is True:
             backup_format = Format.DIRECTORY
-        elif (source.endswith(".txz") or source.endswith(".tar.gz")) is True:
-            backup_format = Format.TAR
         else:
+            backup_format = Format.TAR
+            compression_format = libioc.BackupBundle.detect_compression_format(
+                source
+            )
+
+        if (backup_format == Format.TAR) and (compression_format is None):
             raise libioc.errors.BackupSourceUnknownFormat(
                 source=source,
                 logger=self.logger
@@ -193,7 +209,11 @@ class LaunchableResourceBackup:
         resourceBackupEvent.add_rollback_step(_unlock_resource_backup)
 
         if (backup_format == Format.TAR):
-            yield from self._extract_bundle(source, event_scope=scope)
+            yield from self._extract_bundle(
+                source,
+                compression_format=str(compression_format),
+                event_scope=scope
+            )
 
         def _destroy_failed_import() -> None:
             try:
@@ -209,7 +229,10 @@ class LaunchableResourceBackup:
             logger=self.logger
         ).read()
 
-        is_standalone = os.path.isfile(f"{self.work_dir}/root.zfs") is True
+        is_standalone = len(libioc.BackupBundle.list_stream_parts(
+            self.work_dir,
+            "root.zfs"
+        )) > 0
         has_release = ("release" in archived_config.keys()) is True
 
         try:
@@ -243,6 +266,7 @@ class LaunchableResourceBackup:
     def _extract_bundle(
         self,
         source: str,
+        compression_format: str="gz",
         event_scope: typing.Optional['libioc.events.Scope']=None
     ) -> typing.Generator['libioc.events.IocEvent', None, None]:
 
@@ -256,7 +280,7 @@ class LaunchableResourceBackup:
         try:
             libioc.SecureTarfile.extract(
                 file=source,
-                compression_format="gz",
+                compression_format=compression_format,
                 destination=self.work_dir,
                 logger=self.logger
             )
@@ -328,6 +352,7 @@ class LaunchableResourceBackup:
 
         The file structure is imported using using rsync. All assets that
         already exist in the resources root dataset will be overwritten.
+        Files that were deleted from the release are removed beforehand.
         """
         importRootDatasetEvent = libioc.events.ImportRootDataset(
             self.resource,
@@ -337,6 +362,17 @@ class LaunchableResourceBackup:
 
         try:
             temp_root_dir = f"{self.work_dir}/root"
+            root_mountpoint = self.resource.root_dataset.mountpoint
+            manifest_file = f"{self.work_dir}/{ROOT_DELETIONS_MANIFEST}"
+            if os.path.isfile(manifest_file) is True:
+                deleted_count = libioc.DatasetDelta.remove_deleted_files(
+                    root=root_mountpoint,
+                    manifest_file=manifest_file,
+                    logger=self.logger
+                )
+                self.logger.verbose(
+                    f"{deleted_count} files deleted from {root_mountpoint}"
+                )
             self.logger.verbose(
                 f"Importing root dataset data from {temp_root_dir}"
             )
@@ -347,7 +383,7 @@ class LaunchableResourceBackup:
                 "--hard-links",
                 "--safe-links",
                 f"{temp_root_dir}/",
-                f"{self.resource.root_dataset.mountpoint}/"
+                f"{root_mountpoint}/"
             ])
         except libioc.errors.IocException as e:
             yield importRootDatasetEvent.fail(e)
@@ -367,7 +403,10 @@ class LaunchableResourceBackup:
         hasImportedOtherDatasets = False
 
         for dataset_name in self._list_importable_datasets():
-            absolute_asset_name = f"{self.work_dir}/{dataset_name}.zfs"
+            asset_files = libioc.BackupBundle.list_stream_parts(
+                self.work_dir,
+                f"{dataset_name}.zfs"
+            )
             importOtherDatasetEvent = libioc.events.ImportOtherDataset(
                 dataset_name=dataset_name,
                 resource=self.resource,
@@ -375,12 +414,11 @@ class LaunchableResourceBackup:
             )
             yield importOtherDatasetEvent.begin()
             try:
-                with open(absolute_asset_name, "r", encoding="utf-8") as f:
-                    dataset = self.resource.zfs.get_or_create_dataset(
-                        f"{self.resource.dataset.name}/{dataset_name}"
-                    )
-                    dataset.receive(f.fileno(), force=True)
-                    hasImportedOtherDatasets = True
+                dataset = self.resource.zfs.get_or_create_dataset(
+                    f"{self.resource.dataset.name}/{dataset_name}"
+                )
+                self._receive_dataset(dataset, asset_files)
+                hasImportedOtherDatasets = True
             except libioc.errors.IocException as e:
                 yield importOtherDatasetEvent.fail(e)
                 raise e
@@ -391,6 +429,31 @@ class LaunchableResourceBackup:
         else:
             yield importOtherDatasetsEvent.end()
 
+    def _receive_dataset(
+        self,
+        dataset: libzfs.ZFSDataset,
+        asset_files: typing.List[str]
+    ) -> None:
+        """Receive a ZFS stream that may be split into multiple files."""
+        if len(asset_files) == 1:
+            with open(asset_files[0], "r", encoding="utf-8") as f:
+                dataset.receive(f.fileno(), force=True)
+            return
+
+        # the parts are concatenated to a single stream by cat
+        process = subprocess.Popen(  # nosec: B603
+            ["/bin/cat"] + asset_files,
+            stdout=subprocess.PIPE
+        )
+        stdout = process.stdout
+        if stdout is None:
+            raise ValueError("cat has no stdout")
+        try:
+            dataset.receive(stdout.fileno(), force=True)
+        finally:
+            stdout.close()
+            process.wait()
+
     def _list_importable_datasets(
         self,
         current_directory: typing.Optional[str]=None
@@ -400,6 +463,7 @@ class LaunchableResourceBackup:
             current_directory = self.work_dir
 
         suffix = ".zfs"
+        first_part_suffix = f"{suffix}.{0:06d}"
 
         files: typing.List[str] = []
         current_files = os.listdir(current_directory)
@@ -413,6 +477,8 @@ class LaunchableResourceBackup:
                 files = files + [f"{current_file}/{x}" for x in nested_files]
             elif current_file.endswith(suffix):
                 files.append(current_file[:-len(suffix)])
+            elif current_file.endswith(first_part_suffix):
+                files.append(current_file[:-len(first_part_suffix)])
         return files
 
     def export(
@@ -421,6 +487,8 @@ class LaunchableResourceBackup:
         standalone: typing.Optional[bool]=None,
         recursive: bool=False,
         backup_format: Format=Format.TAR,
+        codec: str="gzip",
+        threads: typing.Optional[int]=None,
         event_scope: typing.Optional['libioc.events.Scope']=None
     ) -> typing.Generator['libioc.events.IocEvent', None, None]:
         """
@@ -441,15 +509,34 @@ class LaunchableResourceBackup:
                 The default depends on whether the resource is forked from a
                 release or not. If there is a origin release, the export will
                 contain the changed files relative to the release. Enabling
-                this option will enforce ZFS dataset exports instead of rsync
-                compare-dest diffs.
+                this option will enforce ZFS dataset exports instead of
+                zfs diff or rsync compare-dest deltas.
                 Standalone exports will cause duplicated data on the importing
                 host, but are independent of any release.
 
             recursive (bool):
 
                     Includes snapshots of all exported ZFS datasets.
+
+            codec (str): (default="gzip")
+
+                    Compression of archive exports: gzip, xz or zstd when
+                    the zstd command is installed.
+
+            threads (int): (optional)
+
+                    Number of threads compressing the archive. Defaults to
+                    the number of CPUs.
         """
+        bundle: typing.Optional[libioc.BackupBundle.BundleWriter] = None
+        if backup_format == Format.TAR:
+            bundle = libioc.BackupBundle.BundleWriter(
+                destination=destination,
+                codec=codec,
+                threads=threads,
+                logger=self.logger
+            )
+
         resourceBackupEvent = libioc.events.ResourceBackup(
             self.resource,
             scope=event_scope
@@ -458,7 +545,7 @@ class LaunchableResourceBackup:
         yield resourceBackupEvent.begin()
 
         if backup_format == Format.TAR:
-            self._lock(None)  # use temporary directory and tar later
+            self._lock(None)  # temporary directory is only used as fallback
         else:
             if os.path.exists(destination) is True:
                 raise libioc.errors.ExportDestinationExists(
@@ -481,34 +568,96 @@ class LaunchableResourceBackup:
 
         resourceBackupEvent.add_rollback_step(_unlock_resource_backup)
 
-        if "config" in self.resource.__dir__():
-            # only export config when the resource has one
-            yield from self._export_config(event_scope=_scope)
-            yield from self._export_fstab(event_scope=_scope)
+        bundleBackupEvent: typing.Optional[libioc.events.BundleBackup] = None
+        if bundle is not None:
+            bundleBackupEvent = libioc.events.BundleBackup(
+                destination=destination,
+                resource=self.resource,
+                scope=_scope
+            )
+            yield bundleBackupEvent.begin()
+            self.logger.verbose(
+                f"Bundling backup to {destination} ({bundle.codec.name})"
+            )
+            bundle.open()
+            self._bundle = bundle
+
+            def _remove_incomplete_bundle() -> None:
+                try:
+                    self._close_bundle()
+                except Exception as e:
+                    # do not hide the error that caused the rollback
+                    self.logger.warn(f"Closing the backup bundle failed: {e}")
+                finally:
+                    if os.path.isfile(destination) is True:
+                        os.remove(destination)
+
+            resourceBackupEvent.add_rollback_step(_remove_incomplete_bundle)
 
-        if is_standalone is False:
-            yield from self._export_root_dataset(
+        try:
+            if "config" in self.resource.__dir__():
+                # only export config when the resource has one
+                yield from self._export_config(event_scope=_scope)
+                yield from self._export_fstab(event_scope=_scope)
+                yield from self._report_bundle_progress(bundleBackupEvent)
+
+            if is_standalone is False:
+                yield from self._export_root_dataset(
+                    flags=zfs_send_flags,
+                    event_scope=_scope
+                )
+                yield from self._report_bundle_progress(bundleBackupEvent)
+
+            # other datasets include `root` when the resource is no basejail
+            yield from self._export_other_datasets_recursive(
                 flags=zfs_send_flags,
-                event_scope=_scope
+                standalone=is_standalone,
+                limit_depth=(recursive is True),
+                event_scope=_scope,
+                bundle_event=bundleBackupEvent
             )
 
-        # other datasets include `root` when the resource is no basejail
-        yield from self._export_other_datasets_recursive(
-            flags=zfs_send_flags,
-            standalone=is_standalone,
-            limit_depth=(recursive is True),
-            event_scope=_scope
-        )
+            self._close_bundle()
+        except Exception as e:
+            if bundleBackupEvent is not None:
+                yield bundleBackupEvent.fail(e)
+            yield resourceBackupEvent.fail(e)
+            raise e
 
-        if backup_format == Format.TAR:
-            yield from self._bundle_backup(
-                destination=destination,
-                event_scope=_scope
+        if (bundle is not None) and (bundleBackupEvent is not None):
+            self.logger.verbose(
+                f"Backup bundled to {destination}: "
+                f"{bundle.bytes_written} bytes compressed to "
+                f"{bundle.compressed_bytes} bytes"
             )
+            bundleBackupEvent.bytes_written = bundle.bytes_written
+            bundleBackupEvent.compressed_bytes = bundle.compressed_bytes
+            bundleBackupEvent.throughput = bundle.throughput
+            yield bundleBackupEvent.end()
 
         _unlock_resource_backup()
         yield resourceBackupEvent.end()
 
+    def _close_bundle(self) -> None:
+        if self._bundle is None:
+            return
+        try:
+            self._bundle.close()
+        finally:
+            self._bundle = None
+
+    def _report_bundle_progress(
+        self,
+        bundle_event: typing.Optional['libioc.events.BundleBackup']
+    ) -> typing.Generator['libioc.events.IocEvent', None, None]:
+        if (self._bundle is None) or (bundle_event is None):
+            return
+        yield bundle_event.progress(
+            bytes_written=self._bundle.bytes_written,
+            compressed_bytes=self._bundle.compressed_bytes,
+            throughput=self._bundle.throughput
+        )
+
     def _take_resource_snapshot(self) -> None:
         self.resource.dataset.snapshot(
             self.full_snapshot_name,
@@ -516,7 +665,10 @@ class LaunchableResourceBackup:
         )
 
     def _delete_resource_snapshot(self) -> None:
-        self.zfs.get_snapshot(self.full_snapshot_name).delete(recursive=True)
+        self.zfs.delete_snapshot(
+            self.zfs.get_snapshot(self.full_snapshot_name),
+            recursive=True
+        )
 
     def _export_config(
         self,
@@ -535,8 +687,17 @@ class LaunchableResourceBackup:
                 logger=self.logger
             )
             temp_config.data = self.resource.config.data
-            temp_config.write(temp_config.data)
-            self.logger.verbose(f"Config duplicated to {temp_config.file}")
+            if self._bundle is not None:
+                self._bundle.add_bytes(
+                    "config.json",
+                    temp_config.map_output(temp_config.data).encode("UTF-8")
+                )
+                self.logger.verbose("Config added to the backup bundle")
+            else:
+                temp_config.write(temp_config.data)
+                self.logger.verbose(
+                    f"Config duplicated to {temp_config.file}"
+                )
         except libioc.errors.IocException as e:
             yield exportConfigEvent.fail(e)
             raise e
@@ -565,8 +726,12 @@ class LaunchableResourceBackup:
                 self.resource.dataset.mountpoint,
                 "backup:///"
             )
-            fstab.save()
-            self.logger.verbose(f"Fstab saved to {fstab.file}")
+            if self._bundle is not None:
+                self._bundle.add_bytes("fstab", str(fstab).encode("UTF-8"))
+                self.logger.verbose("Fstab added to the backup bundle")
+            else:
+                fstab.save()
+                self.logger.verbose(f"Fstab saved to {fstab.file}")
         except libioc.errors.IocException as e:
             yield exportFstabEvent.fail(e)
             raise e
@@ -586,47 +751,110 @@ class LaunchableResourceBackup:
 
         try:
             temp_root_dir = f"{self.work_dir}/root"
-            compare_dest = "/".join([
-                self.resource.release.root_dataset.mountpoint,
-                f".zfs/snapshot/{self.resource.release_snapshot.snapshot_name}"
-            ])
-            os.mkdir(temp_root_dir)
-
-            excludes: typing.List[str] = []
             basedirs = libioc.helpers.get_basedir_list(
                 distribution_name=self.resource.host.distribution.name
             )
-            for basedir in basedirs:
-                _exclude = f"{self.resource.root_dataset.mountpoint}/{basedir}"
-                excludes.append("--exclude")
-                excludes.append(_exclude)
-
-            self.logger.verbose(
-                f"Writing root dataset delta to {temp_root_dir}"
-            )
-            libioc.helpers.exec([
-                "rsync",
-                "-av",
-                "--checksum",
-                "--links",
-                "--hard-links",
-                "--safe-links"
-            ] + excludes + [
-                f"--compare-dest={compare_dest}/",
-                f"{self.resource.root_dataset.mountpoint}/",
-                temp_root_dir,
-            ], logger=self.logger)
+            try:
+                self._export_root_dataset_delta(temp_root_dir, basedirs)
+            except libioc.errors.DatasetDiffUnavailable:
+                self.logger.verbose("Falling back to rsync compare-dest")
+                os.mkdir(temp_root_dir)
+                self._export_root_dataset_rsync(temp_root_dir, basedirs)
+                if self._bundle is not None:
+                    # rsync cannot write to the bundle directly
+                    self._bundle.add_path("root", temp_root_dir)
         except libioc.errors.IocException as e:
             yield exportRootDatasetEvent.fail(e)
             raise e
         yield exportRootDatasetEvent.end()
 
+    def _export_root_dataset_delta(
+        self,
+        temp_root_dir: str,
+        basedirs: typing.List[str]
+    ) -> None:
+        """Copy the files changed since the root dataset was cloned."""
+        root_dataset = self.resource.root_dataset
+        release_snapshot_name = self.resource.release_snapshot.name
+        backup_snapshot_name = f"{root_dataset.name}@{self.snapshot_name}"
+        origin = root_dataset.properties["origin"].value
+        if origin != release_snapshot_name:
+            raise libioc.errors.DatasetDiffUnavailable(
+                from_snapshot=release_snapshot_name,
+                to_snapshot=backup_snapshot_name,
+                reason="the root dataset is no clone of the release",
+                logger=self.logger
+            )
+
+        delta = libioc.DatasetDelta.DatasetDelta(
+            from_snapshot=origin,
+            to_snapshot=backup_snapshot_name,
+            mountpoint=root_dataset.mountpoint,
+            excludes=basedirs,
+            logger=self.logger
+        )
+
+        if self._bundle is None:
+            self.logger.verbose(
+                f"Writing root dataset delta to {temp_root_dir}"
+            )
+            os.mkdir(temp_root_dir)
+            delta.export(
+                destination=temp_root_dir,
+                manifest_file=f"{self.work_dir}/{ROOT_DELETIONS_MANIFEST}"
+            )
+            return
+
+        self.logger.verbose("Adding root dataset delta to the backup bundle")
+        changed_paths, deleted_paths = delta.read_delta()
+        self._bundle.add_path("root", delta.source_root, recursive=False)
+        for path, recursive in changed_paths:
+            source_path = f"{delta.source_root}/{path}"
+            if os.path.lexists(source_path) is False:
+                continue
+            self._bundle.add_path(f"root/{path}", source_path, recursive)
+        self._bundle.add_bytes(
+            ROOT_DELETIONS_MANIFEST,
+            libioc.DatasetDelta.get_manifest(deleted_paths).encode("UTF-8")
+        )
+
+    def _export_root_dataset_rsync(
+        self,
+        temp_root_dir: str,
+        basedirs: typing.List[str]
+    ) -> None:
+        """Copy all files that differ from the release with rsync."""
+        compare_dest = "/".join([
+            self.resource.release.root_dataset.mountpoint,
+            f".zfs/snapshot/{self.resource.release_snapshot.snapshot_name}"
+        ])
+
+        excludes: typing.List[str] = []
+        for basedir in basedirs:
+            _exclude = f"{self.resource.root_dataset.mountpoint}/{basedir}"
+            excludes.append("--exclude")
+            excludes.append(_exclude)
+
+        libioc.helpers.exec([
+            "rsync",
+            "-av",
+            "--checksum",
+            "--links",
+            "--hard-links",
+            "--safe-links"
+        ] + excludes + [
+            f"--compare-dest={compare_dest}/",
+            f"{self.resource.root_dataset.mountpoint}/",
+            temp_root_dir,
+        ], logger=self.logger)
+
     def _export_other_datasets_recursive(
         self,
         standalone: bool,
         flags: typing.Set[libzfs.SendFlag],
         event_scope: typing.Optional['libioc.events.Scope'],
         limit_depth: bool=False,
+        bundle_event: typing.Optional['libioc.events.BundleBackup']=None
     ) -> typing.Generator['libioc.events.IocEvent', None, None]:
 
         exportOtherDatasetsEvent = libioc.events.ExportOtherDatasets(
@@ -660,6 +888,7 @@ class LaunchableResourceBackup:
                 yield exportOtherDatasetEvent.fail(e)
                 raise e
             yield exportOtherDatasetEvent.end()
+            yield from self._report_bundle_progress(bundle_event)
 
         if hasExportedOtherDatasets is False:
             yield exportOtherDatasetsEvent.skip()
@@ -675,6 +904,16 @@ class LaunchableResourceBackup:
         name_fragments = relative_name.split("/")
         minor_dataset_name = name_fragments.pop()
         relative_dir_name = "/".join(name_fragments)
+        full_snapshot_name = f"{dataset.name}@{self.snapshot_name}"
+
+        if self._bundle is not None:
+            asset_name = f"{relative_name}.zfs"
+            self.logger.verbose(
+                f"Adding dataset {dataset.name} to the backup bundle"
+            )
+            self._bundle.add_snapshot(asset_name, full_snapshot_name, flags)
+            return
+
         absolute_dir_name = f"{self.work_dir}/{relative_dir_name}".rstrip("/")
         absolute_asset_name = f"{absolute_dir_name}/{minor_dataset_name}.zfs"
 
@@ -682,7 +921,6 @@ class LaunchableResourceBackup:
             os.makedirs(absolute_dir_name)
             # ToDo: manually set permissions
 
-        full_snapshot_name = f"{dataset.name}@{self.snapshot_name}"
         snapshot = self.zfs.get_snapshot(full_snapshot_name)
 
         self.logger.verbose(
@@ -692,29 +930,5 @@ class LaunchableResourceBackup:
         with open(absolute_asset_name, "w", encoding="utf-8") as f:
             snapshot.send(f.fileno(), fromname=None, flags=flags)
 
-    def _bundle_backup(
-        self,
-        destination: str,
-        event_scope: typing.Optional['libioc.events.Scope']
-    ) -> typing.Generator['libioc.events.IocEvent', None, None]:
-        """Create the an archive file from the backup assets."""
-        bundleBackupEvent = libioc.events.BundleBackup(
-            destination=destination,
-            resource=self.resource,
-            scope=event_scope
-        )
-        yield bundleBackupEvent.begin()
-
-        try:
-            self.logger.verbose(f"Bundling backup to {destination}")
-            tar = tarfile.open(destination, "w:gz")
-            tar.add(self.work_dir, arcname=".")
-            tar.close()
-        except libioc.errors.IocException as e:
-            yield bundleBackupEvent.fail(e)
-            raise e
-
-        yield bundleBackupEvent.end()
-
     def _get_relative_dataset_name(self, dataset: libzfs.ZFSDataset) -> str:
         return str(dataset.name[(len(self.resource.dataset.name) + 1):])
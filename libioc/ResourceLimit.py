@@ -0,0 +1,311 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# Copyright (c) 2014-2018, iocage
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""ioc resource limit engine and resource usage sampler."""
+import typing
+import array
+import contextlib
+import re
+import threading
+import time
+
+import libioc.Config.Jail.Properties.ResourceLimit
+import libioc.RunningJails
+import libioc.errors
+import libioc.helpers
+import libioc.helpers_object
+
+# Maximum number of rules or filters passed to a single rctl invocation
+_MAX_ARGUMENTS = 256
+
+_FAILED_FILTER_PATTERN = re.compile(r"'jail:(?P<name>[^']+)'")
+
+
+def _chunks(
+    values: typing.List[str]
+) -> typing.Iterator[typing.List[str]]:
+    for i in range(0, len(values), _MAX_ARGUMENTS):
+        yield values[i:i + _MAX_ARGUMENTS]
+
+
+class ResourceLimit:
+    """
+    Apply and clear the rctl resource limits of jails.
+
+    The rules of many jails are added or removed with as few rctl calls as
+    possible. Within a batch() the rules that were applied are remembered, so
+    that a jail does not apply them again when they were applied in advance.
+    Clearing resource limits is deferred until the batch has ended.
+    """
+
+    RCTL_COMMAND: str = "/usr/bin/rctl"
+
+    _batch_depth: int
+    _applied_rules: typing.Dict[str, typing.Tuple[str, ...]]
+    _pending_clear: typing.Dict[str, None]
+    lock: threading.RLock
+
+    def __init__(
+        self,
+        logger: typing.Optional['libioc.Logger.Logger']=None
+    ) -> None:
+        self.logger = libioc.helpers_object.init_logger(self, logger)
+        self.lock = threading.RLock()
+        self._batch_depth = 0
+        self._applied_rules = {}
+        self._pending_clear = {}
+
+    @staticmethod
+    def get_rules(jail: 'libioc.Jail.JailGenerator') -> typing.List[str]:
+        """Return the rctl rules of a jail with enabled resource limits."""
+        if jail.config["rlimits"] is not True:
+            return []
+
+        rules: typing.List[str] = []
+        for key in libioc.Config.Jail.Properties.ResourceLimit.properties:
+            try:
+                rlimit_prop = jail.config[key]
+                if rlimit_prop.is_unset is True:
+                    continue
+            except (KeyError, AttributeError):
+                continue
+            limit_string = rlimit_prop.limit_string
+            rules.append(f"jail:{jail.identifier}:{key}:{limit_string}")
+        return rules
+
+    @contextlib.contextmanager
+    def batch(self) -> typing.Iterator['ResourceLimit']:
+        """
+        Batch resource limit changes of many jails.
+
+        The resource limits of all jails that were cleared within the
+        context are removed with a single rctl call when the outermost batch
+        context is left.
+        """
+        with self.lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._applied_rules.clear()
+                    identifiers = list(self._pending_clear.keys())
+                    self._pending_clear.clear()
+                    self._clear(identifiers)
+
+    def apply(
+        self,
+        jails: typing.Iterable['libioc.Jail.JailGenerator']
+    ) -> None:
+        """Add the resource limits of the jails with one rctl call."""
+        with self.lock:
+            batched = (self._batch_depth > 0)
+            rules: typing.List[str] = []
+            applied_rules: typing.Dict[str, typing.Tuple[str, ...]] = {}
+            identifiers_to_clear: typing.List[str] = []
+            for jail in jails:
+                identifier = jail.identifier
+                jail_rules = tuple(self.get_rules(jail))
+                if len(jail_rules) == 0:
+                    continue
+                if identifier in self._pending_clear:
+                    # the jail was stopped earlier in this batch
+                    del self._pending_clear[identifier]
+                    identifiers_to_clear.append(identifier)
+                elif self._applied_rules.get(identifier) == jail_rules:
+                    continue
+                rules.extend(jail_rules)
+                applied_rules[identifier] = jail_rules
+
+            self._clear(identifiers_to_clear)
+            for chunk in _chunks(rules):
+                libioc.helpers.exec(
+                    [self.RCTL_COMMAND, "-a"] + chunk,
+                    logger=self.logger
+                )
+            if batched is True:
+                self._applied_rules.update(applied_rules)
+
+    def clear(
+        self,
+        jails: typing.Iterable['libioc.Jail.JailGenerator']
+    ) -> None:
+        """Remove all resource limits of the jails."""
+        identifiers = [jail.identifier for jail in jails]
+        with self.lock:
+            for identifier in identifiers:
+                self._applied_rules.pop(identifier, None)
+            if self._batch_depth > 0:
+                for identifier in identifiers:
+                    self._pending_clear[identifier] = None
+                return
+            self._clear(identifiers)
+
+    def _clear(self, identifiers: typing.List[str]) -> None:
+        filters = [f"jail:{identifier}" for identifier in identifiers]
+        for chunk in _chunks(filters):
+            _, stderr, returncode = libioc.helpers.exec(
+                [self.RCTL_COMMAND, "-r"] + chunk,
+                logger=self.logger,
+                ignore_error=True
+            )
+            if returncode == 0:
+                continue
+            # jails without any rule cannot be cleared
+            errors = [
+                line for line in (stderr or "").splitlines()
+                if "No such process" not in line
+            ]
+            if (len(errors) > 0) or (stderr is None) or (stderr == ""):
+                raise libioc.errors.ResourceLimitActionFailed(
+                    action="clear resource limits of " + ", ".join(chunk),
+                    logger=self.logger
+                )
+
+
+class ResourceUsage(dict):
+    """
+    Snapshot of the resource usage of many jails indexed by their name.
+
+    The usage of all requested jails is read with a single rctl call and
+    stored in a compact array per jail, that holds the values in the order of
+    RESOURCES. Monitoring agents call refresh() to take a new sample.
+    """
+
+    RCTL_COMMAND: str = "/usr/bin/rctl"
+    RESOURCES: typing.Tuple[str, ...] = tuple(
+        libioc.Config.Jail.Properties.ResourceLimit.properties
+    )
+    RESOURCE_INDEX: typing.Dict[str, int] = dict(
+        zip(RESOURCES, range(len(RESOURCES)))
+    )
+
+    sampled_at: typing.Optional[float]
+    lock: threading.Lock
+
+    def __init__(
+        self,
+        logger: typing.Optional['libioc.Logger.Logger']=None
+    ) -> None:
+        self.logger = libioc.helpers_object.init_logger(self, logger)
+        self.sampled_at = None
+        self.lock = threading.Lock()
+        dict.__init__(self)
+
+    def get_value(self, name: str, resource: str) -> int:
+        """Return the sampled usage of a resource by a jail."""
+        return int(self[name][self.RESOURCE_INDEX[resource]])
+
+    def refresh(
+        self,
+        names: typing.Optional[typing.Iterable[str]]=None,
+        running_jails: typing.Optional[
+            'libioc.RunningJails.RunningJails'
+        ]=None
+    ) -> None:
+        """
+        Sample the resource usage of jails.
+
+        Args:
+
+            names (list of str): (optional)
+                The names of the jails to sample. All running jails are
+                sampled when no names are given.
+
+            running_jails (libioc.RunningJails.RunningJails): (optional)
+                The snapshot of running jails that is sampled when no names
+                were given.
+        """
+        if names is None:
+            if running_jails is None:
+                running_jails = libioc.RunningJails.RunningJails(
+                    logger=self.logger
+                )
+                running_jails.refresh()
+            else:
+                running_jails.load()
+            names = list(running_jails.keys())
+        names = list(names)
+
+        usage: typing.Dict[str, array.array] = {}
+        for chunk in _chunks(names):
+            usage.update(self._sample(chunk))
+
+        with self.lock:
+            self.clear()
+            self.update(usage)
+            self.sampled_at = time.time()
+        self.logger.spam(f"Resource usage of {len(usage)} jails sampled")
+
+    def _sample(
+        self,
+        names: typing.List[str]
+    ) -> typing.Dict[str, array.array]:
+        stdout, stderr, _ = libioc.helpers.exec(
+            [self.RCTL_COMMAND, "-u"] + [f"jail:{name}" for name in names],
+            logger=self.logger,
+            ignore_error=True
+        )
+
+        # jails that stopped in the meantime have no usage block
+        failed_names = set(_FAILED_FILTER_PATTERN.findall(stderr or ""))
+        sampled_names = [name for name in names if name not in failed_names]
+        blocks = self._parse_usage(stdout or "")
+        if len(blocks) == len(sampled_names):
+            return dict(zip(sampled_names, blocks))
+
+        # the blocks cannot be assigned to the jails unambiguously
+        usage: typing.Dict[str, array.array] = {}
+        for name in sampled_names:
+            stdout, _, returncode = libioc.helpers.exec(
+                [self.RCTL_COMMAND, "-u", f"jail:{name}"],
+                logger=self.logger,
+                ignore_error=True
+            )
+            blocks = self._parse_usage(stdout or "")
+            if (returncode == 0) and (len(blocks) == 1):
+                usage[name] = blocks[0]
+        return usage
+
+    def _parse_usage(self, output: str) -> typing.List[array.array]:
+        """Parse the concatenated rctl -u output of one or many jails."""
+        resource_index = self.RESOURCE_INDEX
+        blocks: typing.List[array.array] = []
+        seen: typing.Set[str] = set()
+        for line in output.splitlines():
+            key, separator, value = line.strip().partition("=")
+            if (separator == "") or (key not in resource_index):
+                continue
+            if (len(blocks) == 0) or (key in seen):
+                # a known resource repeats when the next jail begins
+                blocks.append(array.array("q", [0] * len(self.RESOURCES)))
+                seen = set()
+            seen.add(key)
+            try:
+                blocks[-1][resource_index[key]] = int(value)
+            except ValueError:
+                continue
+        return blocks
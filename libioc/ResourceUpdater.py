@@ -374,7 +374,7 @@ class Updater:
             self.logger.spam(f"Rolling back to snapshot {snapshot_name}")
             snapshot = self.resource.zfs.get_snapshot(snapshot_name)
             snapshot.rollback(force=True)
-            snapshot.delete()
+            self.resource.zfs.delete_snapshot(snapshot)
 
         runResourceUpdateEvent.add_rollback_step(_rollback_updates_snapshot)
 
@@ -0,0 +1,153 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# Copyright (c) 2014-2018, iocage
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""ioc snapshot of the jails running on the host."""
+import typing
+import shlex
+import threading
+
+import libioc.helpers
+import libioc.helpers_object
+
+
+class RunningJail:
+    """Kernel state of a running jail."""
+
+    jid: int
+    name: str
+    path: typing.Optional[str]
+    ip4_addresses: typing.List[str]
+    ip6_addresses: typing.List[str]
+
+    def __init__(
+        self,
+        jid: int,
+        name: str,
+        path: typing.Optional[str]=None,
+        ip4_addresses: typing.List[str]=[],
+        ip6_addresses: typing.List[str]=[]
+    ) -> None:
+        self.jid = jid
+        self.name = name
+        self.path = path
+        self.ip4_addresses = list(ip4_addresses)
+        self.ip6_addresses = list(ip6_addresses)
+
+
+class RunningJails(dict):
+    """
+    Snapshot of all running jails indexed by their name.
+
+    Looking up the JID of every jail with an individual kernel query is
+    expensive when many jails are listed or filtered by their state, so that
+    all live jails are enumerated with a single jls call when the snapshot is
+    first accessed. The snapshot is not updated by itself, but jails starting
+    or stopping update their own entry. Long-lived processes call refresh()
+    to observe changes made by other processes.
+    """
+
+    JLS_COMMAND = ["/usr/sbin/jls", "-n", "-q"]
+
+    loaded: bool
+    lock: threading.Lock
+
+    def __init__(
+        self,
+        logger: typing.Optional['libioc.Logger.Logger']=None
+    ) -> None:
+        self.logger = libioc.helpers_object.init_logger(self, logger)
+        self.loaded = False
+        self.lock = threading.Lock()
+        dict.__init__(self)
+
+    def refresh(self) -> None:
+        """Enumerate the running jails again."""
+        with self.lock:
+            self._refresh()
+
+    def load(self) -> None:
+        """Enumerate the running jails unless this already happened."""
+        if self.loaded is True:
+            return
+        with self.lock:
+            if self.loaded is False:
+                self._refresh()
+
+    def _refresh(self) -> None:
+        stdout, _, _ = libioc.helpers.exec(
+            self.JLS_COMMAND,
+            logger=self.logger
+        )
+        self.clear()
+        for line in (stdout or "").splitlines():
+            running_jail = self._parse_line(line)
+            if running_jail is not None:
+                self.add(running_jail)
+        self.loaded = True
+        self.logger.spam(f"{len(self)} running jails found")
+
+    @property
+    def jids(self) -> typing.Dict[str, int]:
+        """Return a dict of the running jail names and their JIDs."""
+        self.load()
+        return dict([(name, x.jid) for name, x in self.items()])
+
+    def get_jid(self, name: str) -> typing.Optional[int]:
+        """Return the JID of a running jail or None."""
+        self.load()
+        try:
+            return int(self[name].jid)
+        except KeyError:
+            return None
+
+    def add(self, running_jail: RunningJail) -> None:
+        """Add or replace a running jail in the snapshot."""
+        self[running_jail.name] = running_jail
+
+    def remove(self, name: str) -> None:
+        """Remove a jail from the snapshot when it is present."""
+        self.pop(name, None)
+
+    def _parse_line(self, line: str) -> typing.Optional[RunningJail]:
+        params: typing.Dict[str, str] = {}
+        for token in shlex.split(line):
+            # boolean parameters like persist are listed without a value
+            if "=" not in token:
+                continue
+            key, value = token.split("=", maxsplit=1)
+            params[key] = value
+
+        if ("jid" not in params) or ("name" not in params):
+            return None
+
+        return RunningJail(
+            jid=int(params["jid"]),
+            name=params["name"],
+            path=params.get("path", None),
+            ip4_addresses=self._parse_addresses(params.get("ip4.addr", "")),
+            ip6_addresses=self._parse_addresses(params.get("ip6.addr", ""))
+        )
+
+    def _parse_addresses(self, value: str) -> typing.List[str]:
+        return [x for x in value.split(",") if x != ""]
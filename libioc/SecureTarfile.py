@@ -24,6 +24,8 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """Secure tarfile wrapper that prevents extraction of insecure paths."""
 import typing
+import os
+import subprocess  # nosec: B404
 import tarfile
 
 import libioc.errors
@@ -32,6 +34,11 @@ import libioc.errors
 class SecureTarfile:
     """Secure tarfile wrapper that mitigates extraction of unsafe paths."""
 
+    # compression formats that tarfile cannot read are piped through these
+    DECOMPRESSION_COMMANDS: typing.Dict[str, typing.List[str]] = dict(
+        zst=["zstd", "-d", "-c", "-q"]
+    )
+
     file: str
     file_open_mode: str = "r"
     compression_format: typing.Optional[str]
@@ -60,22 +67,128 @@ class SecureTarfile:
         else:
             return self.file_open_mode
 
-    def extract(self, destination: str) -> None:
+    @property
+    def stream_mode(self) -> str:
+        """Return the file mode for reading the archive as stream."""
+        compression_format = self.compression_format
+        if compression_format is None:
+            compression_format = "*"
+        return f"{self.file_open_mode}|{compression_format}"
+
+    def extract(
+        self,
+        destination: str,
+        progress: typing.Optional[typing.Callable[[int], None]]=None
+    ) -> None:
         """
         Extract the tar file.
 
+        The archive is read as stream and decompressed only once. Every
+        member is verified right before it gets extracted, so that neither
+        the archive is read twice nor all members are held in memory. When
+        an illegal member is found, the members before it remain extracted.
+
         Args:
 
             destination (str):
 
                 Path to the archive file that is going to be extracted.
+
+            progress (callable): (optional)
+
+                Called with the number of bytes read from the archive file
+                after each extracted member.
         """
-        with tarfile.open(self.file, self.mode) as tar:
-            self._log(f"Verifying file structure in {self.file}")
-            self._check_tar_members(tar.getmembers())
-            self._log(f"Extracting {self.file}")
-            tar.extractall(destination)
-            self._log(f"{self.file} was extracted to {destination}")
+        self._log(f"Extracting {self.file}")
+        directories: typing.List[tarfile.TarInfo] = []
+        with open(self.file, "rb") as f:
+            decompression_command = self.DECOMPRESSION_COMMANDS.get(
+                str(self.compression_format)
+            )
+            decompressor: typing.Optional[subprocess.Popen] = None
+            fileobj: typing.Any = f
+            mode = self.stream_mode
+            if decompression_command is not None:
+                decompressor = subprocess.Popen(  # nosec: B603
+                    decompression_command,
+                    stdin=f,
+                    stdout=subprocess.PIPE
+                )
+                fileobj = decompressor.stdout
+                mode = f"{self.file_open_mode}|"
+            try:
+                with tarfile.open(fileobj=fileobj, mode=mode) as tar:
+                    while True:
+                        tar_info = tar.next()
+                        if tar_info is None:
+                            break
+                        # extracted members are not required anymore
+                        tar.members = []
+
+                        self._check_tar_info(tar_info)
+                        self._extract_member(tar, tar_info, destination)
+                        if tar_info.isdir() is True:
+                            directories.append(tar_info)
+                        if progress is not None:
+                            progress(f.tell())
+
+                    self._set_directory_attributes(
+                        tar,
+                        directories,
+                        destination
+                    )
+                if decompressor is not None:
+                    decompressor.communicate()
+                    if decompressor.returncode > 0:
+                        raise libioc.errors.CommandFailure(
+                            returncode=decompressor.returncode,
+                            logger=self.logger
+                        )
+            finally:
+                if decompressor is not None:
+                    if decompressor.stdout is not None:
+                        decompressor.stdout.close()
+                    if decompressor.returncode is None:
+                        # extraction failed before the stream was read
+                        decompressor.kill()
+                        decompressor.wait()
+        self._log(f"{self.file} was extracted to {destination}")
+
+    def _extract_member(
+        self,
+        tar: tarfile.TarFile,
+        tar_info: tarfile.TarInfo,
+        destination: str
+    ) -> None:
+        if tar_info.isdir() is True:
+            # set attributes after the contents were extracted
+            tar.extract(tar_info, destination, set_attrs=False)
+            return
+        # other archives may be extracted to the same destination at once
+        parent_directory = os.path.dirname(tar_info.name)
+        if parent_directory not in ("", "."):
+            os.makedirs(
+                os.path.join(destination, parent_directory),
+                exist_ok=True
+            )
+        tar.extract(tar_info, destination)
+
+    def _set_directory_attributes(
+        self,
+        tar: tarfile.TarFile,
+        directories: typing.List[tarfile.TarInfo],
+        destination: str
+    ) -> None:
+        # like TarFile.extractall() the deepest directories come first
+        directories.sort(key=lambda x: x.name, reverse=True)
+        for tar_info in directories:
+            path = os.path.join(destination, tar_info.name)
+            try:
+                tar.chown(tar_info, path, numeric_owner=False)
+                tar.utime(tar_info, path)
+                tar.chmod(tar_info, path)
+            except tarfile.ExtractError as e:
+                self._log(f"Failed to set attributes of {path}: {e}", "warn")
 
     def _check_tar_members(
         self,
@@ -105,7 +218,8 @@ def extract(
     file: str,
     destination: str,
     compression_format: typing.Optional[str]=None,
-    logger: typing.Optional['libioc.Logger.Logger']=None
+    logger: typing.Optional['libioc.Logger.Logger']=None,
+    progress: typing.Optional[typing.Callable[[int], None]]=None
 ) -> None:
     """
     Instantiate SecureTarfile and extract the archive files content.
@@ -123,6 +237,15 @@ def extract(
         logger (libioc.Logger.Logger):
 
             Logging is enabled when a Logger instance is provided.
+
+        progress (callable): (optional)
+
+            Called with the number of bytes read from the archive file
+            after each extracted member.
     """
-    secure_tarfile = SecureTarfile(file, logger=logger)
-    secure_tarfile.extract(destination)
+    secure_tarfile = SecureTarfile(
+        file,
+        compression_format=compression_format,
+        logger=logger
+    )
+    secure_tarfile.extract(destination, progress=progress)
@@ -24,12 +24,12 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """ioc NullFS basejail storage backend."""
 import typing
-import os.path
 
 import libioc.Storage
 import libioc.Storage.Basejail
 import libioc.Storage.Standalone
 import libioc.helpers
+import libioc.MountTable
 
 BasejailStorage = libioc.Storage.Basejail.BasejailStorage
 
@@ -40,9 +40,12 @@ class NullFSBasejailStorage(libioc.Storage.Basejail.BasejailStorage):
     def apply(
         self,
         release: 'libioc.Release.ReleaseGenerator'=None,
-        event_scope: typing.Optional['libioc.events.Scope']=None
+        event_scope: typing.Optional['libioc.events.Scope']=None,
+        mount_table: typing.Optional['libioc.MountTable.MountTable']=None
     ) -> typing.Generator['libioc.events.IocEvent', None, None]:
         """Attach the jail storage."""
+        if mount_table is None:
+            mount_table = libioc.MountTable.MountTable(logger=self.logger)
         event = libioc.events.BasejailStorageConfig(
             jail=self.jail,
             scope=event_scope
@@ -58,13 +61,17 @@ class NullFSBasejailStorage(libioc.Storage.Basejail.BasejailStorage):
         try:
             mounts = BasejailStorage._get_basejail_mounts(self)
             for source, destination in mounts:
-                if os.path.ismount(destination) is True:
-                    libioc.helpers.umount(destination)
+                if mount_table.is_mounted(destination) is True:
+                    libioc.helpers.umount(
+                        destination,
+                        mount_table=mount_table
+                    )
                 libioc.helpers.mount(
                     source=source,
                     destination=destination,
                     fstype="nullfs",
-                    opts=["ro"]
+                    opts=["ro"],
+                    mount_table=mount_table
                 )
         except Exception:
             yield event.fail("Failed to mount NullFS basedirs")
@@ -74,9 +81,12 @@ class NullFSBasejailStorage(libioc.Storage.Basejail.BasejailStorage):
 
     def teardown(
         self,
-        event_scope: typing.Optional['libioc.events.Scope']=None
+        event_scope: typing.Optional['libioc.events.Scope']=None,
+        mount_table: typing.Optional['libioc.MountTable.MountTable']=None
     ) -> typing.Generator['libioc.events.IocEvent', None, None]:
         """Unmount NullFS basejail mounts."""
+        if mount_table is None:
+            mount_table = libioc.MountTable.MountTable(logger=self.logger)
         event = libioc.events.BasejailStorageConfig(
             jail=self.jail,
             scope=event_scope
@@ -87,9 +97,13 @@ class NullFSBasejailStorage(libioc.Storage.Basejail.BasejailStorage):
         try:
             mounts = BasejailStorage._get_basejail_mounts(self)
             for _, destination in mounts:
-                if os.path.ismount(destination) is False:
+                if mount_table.is_mounted(destination) is False:
                     continue
-                libioc.helpers.umount(destination, force=True)
+                libioc.helpers.umount(
+                    destination,
+                    force=True,
+                    mount_table=mount_table
+                )
                 has_unmounted_any = True
         except Exception:
             yield event.fail("Failed to mount NullFS basedirs")
@@ -102,7 +116,8 @@ class NullFSBasejailStorage(libioc.Storage.Basejail.BasejailStorage):
 
         yield from libioc.Storage.Storage.teardown(
             self,
-            event_scope=event_scope
+            event_scope=event_scope,
+            mount_table=mount_table
         )
 
     def setup(
@@ -34,7 +34,8 @@ class StandaloneJailStorage(libioc.Storage.Storage):
     def apply(
         self,
         release: 'libioc.Release.ReleaseGenerator'=None,
-        event_scope: typing.Optional['libioc.events.Scope']=None
+        event_scope: typing.Optional['libioc.events.Scope']=None,
+        mount_table: typing.Optional['libioc.MountTable.MountTable']=None
     ) -> typing.Generator['libioc.events.IocEvent', None, None]:
         """Attach the jail storage."""
         message = "Standalone jails do not require storage operations to start"
@@ -31,6 +31,7 @@ import typing
 import libioc.events
 import libioc.helpers
 import libioc.helpers_object
+import libioc.MountTable
 
 
 class Storage:
@@ -103,17 +104,43 @@ class Storage:
 
     def teardown(
         self,
-        event_scope: typing.Optional['libioc.events.Scope']=None
+        event_scope: typing.Optional['libioc.events.Scope']=None,
+        mount_table: typing.Optional['libioc.MountTable.MountTable']=None
     ) -> typing.Generator['libioc.events.TeardownSystemMounts', None, None]:
-        """Unmount system mountpoints and devices from a jail."""
+        """
+        Unmount system mountpoints and devices from a jail.
 
-        system_mountpoints = list(filter(
-            os.path.isdir,
+        Args:
+
+            event_scope (libioc.events.Scope): (optional)
+                Pass on the IocEvent stack for use in higher order functions.
+
+            mount_table (libioc.MountTable.MountTable): (optional)
+                Share a snapshot of the mounted filesystems with other
+                operations. A new snapshot is taken when none is given.
+        """
+        if mount_table is None:
+            mount_table = libioc.MountTable.MountTable(logger=self.logger)
+
+        # devfs and fdescfs are mounted by libioc and recorded in the table
+        libioc_mountpoints = list(filter(
+            mount_table.is_mounted,
             map(
                 self.__get_absolute_path_from_jail_asset,
                 [
                     "/dev/fd",
-                    "/dev",
+                    "/dev"
+                ]
+            )
+        ))
+
+        # mounted from within the jail or by the user after the mount table
+        # snapshot might have been taken, so that they are checked live
+        other_mountpoints = list(filter(
+            os.path.ismount,
+            map(
+                self.__get_absolute_path_from_jail_asset,
+                [
                     "/proc",
                     "/root/compat/linux/proc",
                     "/root/etcupdate",
@@ -123,6 +150,7 @@ class Storage:
                 ]
             )
         ))
+        system_mountpoints = libioc_mountpoints + other_mountpoints
 
         event = libioc.events.TeardownSystemMounts(
             jail=self.jail,
@@ -139,14 +167,21 @@ class Storage:
 
         has_unmounted_any = False
         try:
-            for mountpoint in system_mountpoints:
-                if os.path.ismount(mountpoint) is False:
-                    continue
+            for mountpoint in libioc_mountpoints:
+                libioc.helpers.umount(
+                    mountpoint=mountpoint,
+                    force=True,
+                    logger=self.logger,
+                    mount_table=mount_table
+                )
+                has_unmounted_any = True
+            for mountpoint in other_mountpoints:
                 libioc.helpers.umount(
                     mountpoint=mountpoint,
                     force=True,
                     logger=self.logger
                 )
+                mount_table.remove(mountpoint)
                 has_unmounted_any = True
         except Exception:
             yield event.fail("Failed to unmount system mountpoints")
@@ -182,7 +217,7 @@ class Storage:
                 new_name
             ])
             dataset = self.jail.dataset
-            dataset.rename(new_dataset_name)
+            self.zfs.rename_dataset(dataset, new_dataset_name)
             self.jail._dataset = self.zfs.get_dataset(new_dataset_name)
             self.jail.dataset_name = new_dataset_name
             self.logger.verbose(
@@ -220,7 +255,7 @@ class Storage:
 
         try:
             new_snapshot_name = f"{snapshot.parent.name}@{new_name}"
-            snapshot.rename(new_snapshot_name)
+            self.zfs.rename_snapshot(snapshot, new_snapshot_name)
             yield renameSnapshotEvent.end()
         except BaseException as e:
             yield renameSnapshotEvent.fail(e)
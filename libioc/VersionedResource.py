@@ -62,7 +62,7 @@ class ResourceSnapshots:
         self._ensure_dataset_unlocked()
         snapshot = self._get_snapshot(snapshot_name)
         try:
-            snapshot.delete(recursive=True)
+            self.resource.zfs.delete_snapshot(snapshot, recursive=True)
         except libzfs.ZFSException as e:
             raise libioc.errors.SnapshotDeletion(
                 reason=str(e),
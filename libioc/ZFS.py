@@ -24,19 +24,88 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """ioc libzfs enhancement module."""
 import typing
+import contextlib
 import libzfs
 import datetime
+import threading
 
 import libioc.Logger
 import libioc.helpers_object
 import libioc.errors
 
 
+_ZFSResource = typing.Union[libzfs.ZFSDataset, libzfs.ZFSSnapshot]
+
+
+class DatasetCache:
+    """
+    Map names to the datasets and snapshots looked up during an operation.
+
+    Failed lookups are not cached. The ZFS methods that destroy, rename or
+    promote datasets and snapshots invalidate the affected names.
+    """
+
+    hits: int
+    misses: int
+
+    def __init__(self) -> None:
+        self._resources: typing.Dict[str, _ZFSResource] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def lookups(self) -> int:
+        """Return the number of lookups answered by the cache or libzfs."""
+        return self.hits + self.misses
+
+    def get(
+        self,
+        name: str,
+        lookup: typing.Callable[[str], _ZFSResource]
+    ) -> _ZFSResource:
+        """Return the cached resource or look it up and cache it."""
+        with self._lock:
+            if name in self._resources:
+                self.hits += 1
+                return self._resources[name]
+            self.misses += 1
+        resource = lookup(name)
+        with self._lock:
+            self._resources[name] = resource
+        return resource
+
+    def invalidate(self, name: typing.Optional[str]=None) -> None:
+        """
+        Forget a dataset with its children and snapshots.
+
+        All entries are forgotten when no name is given.
+        """
+        with self._lock:
+            if name is None:
+                self._resources.clear()
+                return
+            prefixes = (f"{name}/", f"{name}@")
+            for key in list(self._resources.keys()):
+                if (key == name) or key.startswith(prefixes):
+                    del self._resources[key]
+
+    def __len__(self) -> int:
+        """Return the number of cached datasets and snapshots."""
+        return len(self._resources)
+
+
 class ZFS(libzfs.ZFS):
     """libzfs enhancement module."""
 
     _logger: typing.Optional['libioc.Logger.Logger']
 
+    # number of dataset and snapshot lookups that reached libzfs
+    lookup_count: int = 0
+    dataset_cache: typing.Optional[DatasetCache] = None
+    _dataset_cache_users: int = 0
+    _dataset_cache_lock = threading.Lock()
+
     @property
     def logger(self) -> 'libioc.Logger.Logger':
         """Return logger or raise an exception when it is unavailable."""
@@ -50,6 +119,70 @@ class ZFS(libzfs.ZFS):
         """Set the ZFS objects logger."""
         self._logger = logger
 
+    @contextlib.contextmanager
+    def cached(self) -> typing.Iterator[DatasetCache]:
+        """
+        Cache dataset and snapshot lookups until the context is left.
+
+        Nested and concurrent contexts share the same cache, which is
+        discarded when the last context was left.
+        """
+        with self._dataset_cache_lock:
+            if self.dataset_cache is None:
+                self.dataset_cache = DatasetCache()
+            self._dataset_cache_users += 1
+            cache = self.dataset_cache
+        try:
+            yield cache
+        finally:
+            with self._dataset_cache_lock:
+                self._dataset_cache_users -= 1
+                if self._dataset_cache_users == 0:
+                    self.dataset_cache = None
+                    if self._has_logger:
+                        self.logger.spam(
+                            f"ZFS dataset cache answered {cache.hits} "
+                            f"of {cache.lookups} lookups"
+                        )
+
+    def cached_events(
+        self,
+        events: typing.Iterable['libioc.events.IocEvent']
+    ) -> typing.Generator['libioc.events.IocEvent', None, None]:
+        """Pass on the events of an operation running with a cache."""
+        with self.cached():
+            yield from events
+
+    def invalidate_cache(self, name: typing.Optional[str]=None) -> None:
+        """Forget a cached dataset with its children and snapshots."""
+        cache = self.dataset_cache
+        if cache is not None:
+            cache.invalidate(name)
+
+    def get_dataset(self, name: str) -> libzfs.ZFSDataset:
+        """Get a dataset by its name."""
+        cache = self.dataset_cache
+        if cache is None:
+            return self._get_dataset(name)
+        dataset: libzfs.ZFSDataset = cache.get(name, self._get_dataset)
+        return dataset
+
+    def _get_dataset(self, name: str) -> libzfs.ZFSDataset:
+        self.lookup_count += 1
+        return libzfs.ZFS.get_dataset(self, name)
+
+    def get_snapshot(self, name: str) -> libzfs.ZFSSnapshot:
+        """Get a snapshot by its name."""
+        cache = self.dataset_cache
+        if cache is None:
+            return self._get_snapshot(name)
+        snapshot: libzfs.ZFSSnapshot = cache.get(name, self._get_snapshot)
+        return snapshot
+
+    def _get_snapshot(self, name: str) -> libzfs.ZFSSnapshot:
+        self.lookup_count += 1
+        return libzfs.ZFS.get_snapshot(self, name)
+
     def create_dataset(  # noqa: T484
         self,
         dataset_name: str
@@ -57,6 +190,7 @@ class ZFS(libzfs.ZFS):
         """Automatically get the pool and create a dataset from its name."""
         pool = self.get_pool(dataset_name)
         pool.create(dataset_name, {}, create_ancestors=True)
+        self.invalidate_cache(dataset_name)
 
         dataset = self.get_dataset(dataset_name)
         dataset.mount()
@@ -121,13 +255,51 @@ class ZFS(libzfs.ZFS):
             self.logger.spam(f"Dataset {dataset.name} unmounted")
         except libzfs.ZFSException:
             pass
+        dataset_name = dataset.name
         dataset.delete()
+        self.invalidate_cache(dataset_name)
 
         if origin is not None:
             if self._has_logger:
                 self.logger.verbose(f"Deleting snapshot {origin}")
             origin_snapshot = self.get_snapshot(origin.value)
-            origin_snapshot.delete()
+            self.delete_snapshot(origin_snapshot)
+
+    def delete_snapshot(
+        self,
+        snapshot: libzfs.ZFSSnapshot,
+        recursive: bool=False
+    ) -> None:
+        """Delete a snapshot and forget it in the dataset cache."""
+        snapshot_name = snapshot.name
+        snapshot.delete(recursive=recursive)
+        if recursive is True:
+            # snapshots of child datasets with the same name are gone as well
+            self.invalidate_cache()
+        else:
+            self.invalidate_cache(snapshot_name)
+
+    def rename_dataset(
+        self,
+        dataset: libzfs.ZFSDataset,
+        new_name: str
+    ) -> None:
+        """Rename a dataset and forget the old name in the dataset cache."""
+        current_name = dataset.name
+        dataset.rename(new_name)
+        self.invalidate_cache(current_name)
+        self.invalidate_cache(new_name)
+
+    def rename_snapshot(
+        self,
+        snapshot: libzfs.ZFSSnapshot,
+        new_name: str
+    ) -> None:
+        """Rename a snapshot and forget the old name in the dataset cache."""
+        current_name = snapshot.name
+        snapshot.rename(new_name)
+        self.invalidate_cache(current_name)
+        self.invalidate_cache(new_name)
 
     def clone_dataset(
         self,
@@ -153,6 +325,7 @@ class ZFS(libzfs.ZFS):
                 existing_dataset.umount()
             existing_dataset.delete()
             del existing_dataset
+            self.invalidate_cache(target)
 
         snapshot_name = append_snapshot_datetime("clone")
         snapshot_identifier = f"{source.name}@{snapshot_name}"
@@ -171,7 +344,7 @@ class ZFS(libzfs.ZFS):
             snapshot_error = e
 
         if delete_snapshot is True:
-            snapshot.delete(recursive=True)
+            self.delete_snapshot(snapshot, recursive=True)
 
         if snapshot_error is not None:
             raise libioc.errors.SnapshotCreation(
@@ -226,11 +399,15 @@ class ZFS(libzfs.ZFS):
                 error = e
                 break
 
+        # snapshots move between the origin and the promoted datasets
+        self.invalidate_cache()
+
         if error is not None:
             if logger is not None:
                 self.logger.verbose("Promotion failed: Reverting changes.")
             for dataset_name in promoted_source_datasets:
                 self.get_dataset(dataset_name).promote()
+            self.invalidate_cache()
             raise error
 
     def _promote(
@@ -268,6 +445,7 @@ class ZFS(libzfs.ZFS):
         )
         for _snapshot in snapshots_recursive:
             _snapshot.rename(new_name)
+        self.invalidate_cache()
 
     @property
     def _has_logger(self) -> bool:
@@ -289,6 +467,26 @@ def get_zfs(
     return zfs
 
 
+_shared_zfs: typing.Optional[ZFS] = None
+_shared_zfs_lock = threading.Lock()
+
+
+def get_shared_zfs(
+    logger: typing.Optional['libioc.Logger.Logger']=None
+) -> ZFS:
+    """
+    Get the ZFS instance shared by all objects of the process.
+
+    Objects created without an explicit ZFS instance use this handle, so that
+    they also share its dataset cache.
+    """
+    global _shared_zfs
+    with _shared_zfs_lock:
+        if _shared_zfs is None:
+            _shared_zfs = get_zfs(logger=logger)
+        return _shared_zfs
+
+
 def append_snapshot_datetime(text: str) -> str:
     """Append the current datetime string to a snapshot name."""
     now = datetime.datetime.utcnow()
@@ -282,6 +282,22 @@ class JailExecutionAborted(JailException):
         JailException.__init__(self, message=msg, jail=jail, logger=logger)
 
 
+class JailDependencyCycle(IocException):
+    """Raised when jails depend on each other in a cycle."""
+
+    jails: typing.List['libioc.Jail.JailGenerator']
+
+    def __init__(
+        self,
+        jails: typing.List['libioc.Jail.JailGenerator'],
+        logger: typing.Optional['libioc.Logger.Logger']=None
+    ) -> None:
+        self.jails = jails
+        jail_names = ", ".join([jail.humanreadable_name for jail in jails])
+        msg = f"Circular dependency between the jails {jail_names}"
+        IocException.__init__(self, message=msg, logger=logger)
+
+
 # Jail State
 
 
@@ -370,9 +386,15 @@ class IllegalArchiveContent(IocException):
         reason: str,
         logger: typing.Optional['libioc.Logger.Logger']=None
     ) -> None:
+        self.asset_name = asset_name
+        self.reason = reason
         msg = f"Asset {asset_name} contains illegal files - {reason}"
         super().__init__(message=msg, logger=logger)
 
+    def __reduce__(self) -> typing.Tuple[typing.Any, typing.Tuple[str, str]]:
+        """Pickle the exception when raised in an extraction process."""
+        return (self.__class__, (self.asset_name, self.reason,))
+
 
 # JailConfig
 
@@ -617,6 +639,39 @@ class BackupSourceUnknownFormat(IocException):
         IocException.__init__(self, message=msg, logger=logger)
 
 
+class BackupCodecUnavailable(IocException):
+    """Raised when a backup compression codec cannot be used."""
+
+    def __init__(
+        self,
+        codec: str,
+        reason: typing.Optional[str]=None,
+        logger: typing.Optional['libioc.Logger.Logger']=None
+    ) -> None:
+
+        msg = f"The backup codec {codec} is not available"
+        if reason is not None:
+            msg += f": {reason}"
+        IocException.__init__(self, message=msg, logger=logger)
+
+
+class DatasetDiffUnavailable(IocException):
+    """Raised when the changes between two snapshots cannot be listed."""
+
+    def __init__(
+        self,
+        from_snapshot: str,
+        to_snapshot: str,
+        reason: typing.Optional[str]=None,
+        logger: typing.Optional['libioc.Logger.Logger']=None
+    ) -> None:
+
+        msg = f"Cannot list changes from {from_snapshot} to {to_snapshot}"
+        if reason is not None:
+            msg += f": {reason}"
+        IocException.__init__(self, message=msg, level="warn", logger=logger)
+
+
 # ListableResource
 
 
@@ -39,12 +39,22 @@ EVENT_STATUS = (
 
 
 class Scope(list):
-    """An independent event history scope."""
+    """
+    An independent event history scope.
+
+    When a recorder is attached, the events of the scope report to it when
+    they finish.
+    """
 
     PENDING_COUNT: int
+    recorder: typing.Optional['libioc.EventRecorder.EventRecorder']
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        recorder: typing.Optional['libioc.EventRecorder.EventRecorder']=None
+    ) -> None:
         self.PENDING_COUNT = 0
+        self.recorder = recorder
         super().__init__([])
 
 
@@ -200,6 +210,9 @@ class IocEvent:
         self._pending = new_state
         self.scope.PENDING_COUNT += 1 if (state is True) else -1
 
+        if (new_state is False) and (self.scope.recorder is not None):
+            self.scope.recorder.record(self)
+
     @property
     def duration(self) -> typing.Optional[float]:
         """Return the duration of finished events."""
@@ -628,7 +641,43 @@ class ReleaseDownload(FetchRelease):
 class ReleaseAssetDownload(FetchRelease):
     """Download release assets."""
 
-    pass
+    asset_name: typing.Optional[str]
+    bytes_received: int
+    total_bytes: typing.Optional[int]
+    throughput: typing.Optional[float]
+
+    def __init__(
+        self,
+        release: 'libioc.Release.ReleaseGenerator',
+        asset_name: typing.Optional[str]=None,
+        message: typing.Optional[str]=None,
+        scope: typing.Optional[Scope]=None
+    ) -> None:
+
+        self.asset_name = asset_name
+        self.bytes_received = 0
+        self.total_bytes = None
+        self.throughput = None
+        FetchRelease.__init__(
+            self,
+            release=release,
+            message=message,
+            scope=scope
+        )
+        if asset_name is not None:
+            self.identifier = f"{self.identifier}/{asset_name}"
+
+    def progress(
+        self,
+        bytes_received: int,
+        total_bytes: typing.Optional[int]=None,
+        throughput: typing.Optional[float]=None
+    ) -> 'IocEvent':
+        """Reflect the download progress and throughput in bytes/s."""
+        self.bytes_received = bytes_received
+        self.total_bytes = total_bytes
+        self.throughput = throughput
+        return self.step()
 
 
 class ReleaseExtraction(FetchRelease):
@@ -637,6 +686,48 @@ class ReleaseExtraction(FetchRelease):
     pass
 
 
+class ReleaseAssetExtraction(ReleaseExtraction):
+    """Extract a single release asset."""
+
+    asset_name: typing.Optional[str]
+    bytes_read: int
+    total_bytes: typing.Optional[int]
+    throughput: typing.Optional[float]
+
+    def __init__(
+        self,
+        release: 'libioc.Release.ReleaseGenerator',
+        asset_name: typing.Optional[str]=None,
+        message: typing.Optional[str]=None,
+        scope: typing.Optional[Scope]=None
+    ) -> None:
+
+        self.asset_name = asset_name
+        self.bytes_read = 0
+        self.total_bytes = None
+        self.throughput = None
+        ReleaseExtraction.__init__(
+            self,
+            release=release,
+            message=message,
+            scope=scope
+        )
+        if asset_name is not None:
+            self.identifier = f"{self.identifier}/{asset_name}"
+
+    def progress(
+        self,
+        bytes_read: int,
+        total_bytes: typing.Optional[int]=None,
+        throughput: typing.Optional[float]=None
+    ) -> 'IocEvent':
+        """Reflect the archive bytes read and the throughput in bytes/s."""
+        self.bytes_read = bytes_read
+        self.total_bytes = total_bytes
+        self.throughput = throughput
+        return self.step()
+
+
 class ReleaseCopyBase(FetchRelease):
     """Copy the basejail folders of a release into individual ZFS datasets."""
 
@@ -889,6 +980,9 @@ class BundleBackup(ResourceBackup):
     """Bundle exported data into a backup archive."""
 
     destination: str
+    bytes_written: int
+    compressed_bytes: int
+    throughput: typing.Optional[float]
 
     def __init__(
         self,
@@ -899,6 +993,9 @@ class BundleBackup(ResourceBackup):
     ) -> None:
 
         self.destination = destination
+        self.bytes_written = 0
+        self.compressed_bytes = 0
+        self.throughput = None
         ResourceBackup.__init__(
             self,
             resource=resource,
@@ -906,6 +1003,18 @@ class BundleBackup(ResourceBackup):
             scope=scope
         )
 
+    def progress(
+        self,
+        bytes_written: int,
+        compressed_bytes: int,
+        throughput: typing.Optional[float]=None
+    ) -> 'IocEvent':
+        """Reflect the bytes bundled and the throughput in bytes/s."""
+        self.bytes_written = bytes_written
+        self.compressed_bytes = compressed_bytes
+        self.throughput = throughput
+        return self.step()
+
 
 # Backup import/restore
 
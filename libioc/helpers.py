@@ -32,7 +32,9 @@ import re
 import subprocess  # nosec: B404
 import sys
 import pty
-import select
+import codecs
+import errno
+import selectors
 
 import jail as libjail
 
@@ -44,31 +46,47 @@ import libioc.Types
 CommandOutput = typing.Tuple[typing.Optional[str], typing.Optional[str], int]
 
 
+_OSVersion = typing.Dict[str, typing.Union[str, int, float]]
+
+_OS_VERSION_PATTERN = re.compile(
+    r"USERLAND_VERSION=\""
+    r"(?P<userland>\d{1,2}(?:\.\d)?)"
+    r"\-"
+    r"(?P<name>[A-z0-9\-]+?)"
+    r"(?:-"
+    r"p(?P<patch>\d+)"
+    r")?\""
+)
+
+# parsed versions by file path together with the file mtime
+_os_version_cache: typing.Dict[str, typing.Tuple[int, _OSVersion]] = {}
+
+
 def get_os_version(
     version_file: str="/bin/freebsd-version"
-) -> typing.Dict[str, typing.Union[str, int, float]]:
-    """Get the hosts userland version."""
-    f = open(version_file, "r", re.MULTILINE, encoding="utf-8")
-    # ToDo: move out of the function
-    pattern = re.compile(
-        r"USERLAND_VERSION=\""
-        r"(?P<userland>\d{1,2}(?:\.\d)?)"
-        r"\-"
-        r"(?P<name>[A-z0-9\-]+?)"
-        r"(?:-"
-        r"p(?P<patch>\d+)"
-        r")?\""
-    )
-    content = f.read()
-    match = pattern.search(content)  # type: typing.Optional[typing.Match[str]]
+) -> _OSVersion:
+    """
+    Get the hosts userland version.
+
+    The result is cached until the modification time of the file changes.
+    """
+    mtime = os.stat(version_file).st_mtime_ns
+    cached = _os_version_cache.get(version_file)
+    if (cached is not None) and (cached[0] == mtime):
+        return dict(cached[1])
+
+    with open(version_file, "r", encoding="utf-8") as f:
+        content = f.read()
+    match = _OS_VERSION_PATTERN.search(content)
     if match is None:
         raise libioc.errors.HostUserlandVersionUnknown()
-    output: typing.Dict[str, typing.Union[str, int, float]] = {
+    output: _OSVersion = {
         "userland": float(match["userland"]),
         "name": match["name"],
         "patch": int(match["patch"] if (match["patch"] is not None) else 0)
     }
-    return output
+    _os_version_cache[version_file] = (mtime, output)
+    return dict(output)
 
 
 def exec(
@@ -442,6 +460,13 @@ def to_string(
     return str(parsed_data)
 
 
+# Bytes read from the pseudo terminal at once
+_EXEC_READ_SIZE = 65536
+
+# Seconds to wait for output before the child process state is checked
+_EXEC_POLL_INTERVAL = 0.5
+
+
 def exec_generator(
     command: typing.List[str],
     buffer_lines: bool=True,
@@ -457,7 +482,12 @@ def exec_generator(
     None,
     CommandOutput
 ]:
-    """Execute a command in an interactive shell."""
+    """
+    Execute a command in an interactive shell.
+
+    The output is read from a pseudo terminal that blocks until data is
+    available, so that waiting for a quiet command does not consume CPU time.
+    """
     if isinstance(command, str):
         command = [command]
 
@@ -471,8 +501,11 @@ def exec_generator(
     if stdin is None:
         stdin = delegate_pts
 
-    stdout_result = b""
-    stdout_line_buf = b""
+    stdout_result = bytearray()
+    stdout_line_buf = bytearray()
+    stdout_decoder = codecs.getincrementaldecoder("UTF-8")(errors="replace")
+    selector = selectors.DefaultSelector()
+    delegate_pts_closed = False
     try:
         child = subprocess.Popen(  # nosec: TODO: #113
             command,
@@ -484,38 +517,61 @@ def exec_generator(
             universal_newlines=universal_newlines,
             env=env
         )
-        while child.poll() is None:
-            read, _, _ = select.select([controller_pts], [], [], 0)
-            if read:
-                stdout_chunk = os.read(controller_pts, 512)
-
-                if summarize is True:
-                    stdout_result += stdout_chunk
-
-                # pipe to stdout if it was set
-                if stdout is not None:
-                    stdout.write(stdout_chunk.decode("UTF-8"))
-
-                if buffer_lines is False:
-                    # unbuffered chunk output
-                    yield stdout_chunk
-                else:
-                    # line buffered output
-                    stdout_line_buf += stdout_chunk
-                    while b"\n" in stdout_line_buf:
-                        lines = stdout_line_buf.split(b"\n", maxsplit=1)
-                        stdout_line_buf = lines.pop()
-                        yield from lines
+        # the child holds its own copy; closing ours signals EOF on exit
+        os.close(delegate_pts)
+        delegate_pts_closed = True
+        selector.register(controller_pts, selectors.EVENT_READ)
+
+        while True:
+            exited = child.poll() is not None
+            # drain remaining output without blocking once the child exited
+            timeout = 0 if exited else _EXEC_POLL_INTERVAL
+            if len(selector.select(timeout)) == 0:
+                if exited is True:
+                    break
+                continue
+
+            try:
+                stdout_chunk = os.read(controller_pts, _EXEC_READ_SIZE)
+            except OSError as e:
+                if e.errno != errno.EIO:
+                    raise
+                # all writers of the pseudo terminal are gone
+                stdout_chunk = b""
+
+            if len(stdout_chunk) == 0:
+                child.wait()
+                break
+
+            if summarize is True:
+                stdout_result += stdout_chunk
+
+            # pipe to stdout if it was set
+            if stdout is not None:
+                stdout.write(stdout_decoder.decode(stdout_chunk))
+
+            if buffer_lines is False:
+                # unbuffered chunk output
+                yield stdout_chunk
+            else:
+                # line buffered output
+                stdout_line_buf += stdout_chunk
+                if b"\n" in stdout_chunk:
+                    lines = stdout_line_buf.split(b"\n")
+                    stdout_line_buf = lines.pop()
+                    yield from (bytes(line) for line in lines)
 
     except KeyboardInterrupt:
         child.terminate()
         raise
     finally:
+        selector.close()
         os.close(controller_pts)
-        os.close(delegate_pts)
+        if delegate_pts_closed is False:
+            os.close(delegate_pts)
         # push last line when buffering lines
         if len(stdout_line_buf) > 0:
-            yield stdout_line_buf
+            yield bytes(stdout_line_buf)
 
     _stdout = stdout_result.decode(encoding) if (summarize is True) else None
     return _stdout, None, child.returncode
@@ -545,9 +601,14 @@ def mount(
     fstype: str="nullfs",
     opts: typing.List[str]=[],
     logger: typing.Optional['libioc.Logger.Logger']=None,
+    mount_table: typing.Optional['libioc.MountTable.MountTable']=None,
     **iov_data: typing.Any
 ) -> None:
-    """Mount a filesystem using libc."""
+    """
+    Mount a filesystem using libc.
+
+    The mount is added to the mount_table when one is passed.
+    """
     data: typing.Dict[str, typing.Optional[str]] = dict(
         fstype=fstype,
         fspath=destination
@@ -568,6 +629,13 @@ def mount(
             reason=jiov.errmsg.value.decode("UTF-8"),
             logger=logger
         )
+    if mount_table is not None:
+        mount_table.add(
+            mountpoint=destination,
+            source=str(source),
+            fstype=fstype,
+            options=opts
+        )
 
 
 def umount(
@@ -578,9 +646,16 @@ def umount(
     options: typing.Optional[typing.List[str]]=None,
     force: bool=False,
     ignore_error: bool=False,
-    logger: typing.Optional['libioc.Logger.Logger']=None
+    logger: typing.Optional['libioc.Logger.Logger']=None,
+    mount_table: typing.Optional['libioc.MountTable.MountTable']=None
 ) -> None:
-    """Unmount a mountpoint using libc."""
+    """
+    Unmount a mountpoint using libc.
+
+    When a mount_table is passed, it is used to check whether the mountpoint
+    is mounted instead of querying the filesystem, and it is updated after
+    the mountpoint was unmounted.
+    """
     if isinstance(mountpoint, list) is True:
         for entry in typing.cast(
             typing.List[libioc.Types.AbsolutePath],
@@ -592,7 +667,8 @@ def umount(
                     options=options,
                     force=force,
                     ignore_error=ignore_error,
-                    logger=logger
+                    logger=logger,
+                    mount_table=mount_table
                 )
             except (
                 libioc.errors.UnmountFailed,
@@ -609,7 +685,11 @@ def umount(
     else:
         umount_flags = ctypes.c_ulonglong(0x80000)
 
-    if os.path.ismount(str(mountpoint_path)) is False:
+    if mount_table is None:
+        is_mounted = os.path.ismount(str(mountpoint_path))
+    else:
+        is_mounted = mount_table.is_mounted(str(mountpoint_path))
+    if is_mounted is False:
         raise libioc.errors.InvalidMountpoint(
             mountpoint=mountpoint,
             logger=logger
@@ -617,6 +697,8 @@ def umount(
 
     _mountpoint = str(mountpoint_path).encode("utf-8")
     if libjail.dll.unmount(_mountpoint, umount_flags) == 0:
+        if mount_table is not None:
+            mount_table.remove(str(mountpoint_path))
         if logger is not None:
             logger.debug(
                 f"Jail mountpoint {mountpoint} umounted"
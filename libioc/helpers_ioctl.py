@@ -35,6 +35,7 @@ class SOCKIO_IOCTLS(Enum):
 
     SIOCGIFADDR = -1071617759
     SIOCGIFMTU = -1071617741
+    SIOCIFCREATE2 = -1071617668
 
 
 def get_sockio_ioctl(nic_name: str, ioctl: SOCKIO_IOCTLS) -> bytes:
@@ -62,3 +63,7 @@ def get_interface_mtu(nic_name: str) -> int:
     return int(struct.unpack('<H', ifconf[16:18])[0])
 
 
+def create_interface(cloner_name: str) -> str:
+    """Create a cloned interface like `ifconfig <cloner> create`."""
+    ifconf = get_sockio_ioctl(cloner_name, SOCKIO_IOCTLS.SIOCIFCREATE2)
+    return str(ifconf[:16].split(b"\0", maxsplit=1)[0].decode("UTF-8"))
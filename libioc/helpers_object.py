@@ -42,7 +42,7 @@ def init_zfs(
     if (zfs is not None) and isinstance(zfs, libioc.ZFS.ZFS):
         object.__setattr__(self, 'zfs', zfs)
     else:
-        new_zfs = libioc.ZFS.get_zfs(logger=self.logger)
+        new_zfs = libioc.ZFS.get_shared_zfs(logger=self.logger)
         object.__setattr__(self, 'zfs', new_zfs)
 
     return object.__getattribute__(self, 'zfs')
@@ -22,6 +22,9 @@
 # IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 """Helper utilities for tests."""
+import typing
+
+import libioc.helpers
 
 
 def _delete_dataset_recursive(dataset):
@@ -34,3 +37,22 @@ def unmount_and_destroy_dataset_recursive(dataset):
     """Unmount and destroy a dataset recursively."""
     dataset.umount_recursive()
     _delete_dataset_recursive(dataset)
+
+
+class FakeVnetJail(object):
+    """Minimal stand-in for a running VNET jail."""
+
+    def __init__(self, name: str="example", jid: int=4) -> None:
+        self.name = name
+        self.full_name = name
+        self.humanreadable_name = name
+        self.identifier = f"ioc-{name}"
+        self.jid = jid
+        self.config = dict(mac_prefix="02ff60")
+
+    def exec(
+        self,
+        command: typing.List[str]
+    ) -> typing.Tuple[typing.Optional[str], typing.Optional[str], int]:
+        """Run the command on the host instead of inside the jail."""
+        return libioc.helpers.exec(command)
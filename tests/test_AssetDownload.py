@@ -0,0 +1,192 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the AssetDownload module."""
+import hashlib
+import http.server
+import os
+import threading
+import typing
+
+import pytest
+
+import libioc.AssetDownload
+import libioc.errors
+
+
+class AssetRequestHandler(http.server.BaseHTTPRequestHandler):
+	"""Serve in-memory assets and optionally honor Range requests."""
+
+	assets: typing.Dict[str, bytes] = {}
+	ranges: typing.List[typing.Optional[str]] = []
+	support_ranges = True
+
+	def do_GET(self) -> None:
+		content = self.assets.get(self.path)
+		if content is None:
+			self.send_error(404)
+			return
+
+		requested_range = self.headers.get("Range")
+		self.ranges.append(requested_range)
+		if (requested_range is not None) and (self.support_ranges is True):
+			start = int(requested_range[len("bytes="):].rstrip("-"))
+			if start >= len(content):
+				self.send_error(416)
+				return
+			self.send_response(206)
+			content = content[start:]
+		else:
+			self.send_response(200)
+
+		self.send_header("Content-Length", str(len(content)))
+		self.end_headers()
+		self.wfile.write(content)
+
+	def log_message(self, *args: typing.Any) -> None:
+		pass
+
+
+@pytest.fixture
+def asset_server() -> typing.Generator[str, None, None]:
+	AssetRequestHandler.assets = {
+		"/base.txz": os.urandom(3 * 1024 * 1024 + 17),
+		"/lib32.txz": os.urandom(1024 * 1024)
+	}
+	AssetRequestHandler.ranges = []
+	AssetRequestHandler.support_ranges = True
+	server = http.server.ThreadingHTTPServer(
+		("127.0.0.1", 0),
+		AssetRequestHandler
+	)
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+	yield f"http://127.0.0.1:{server.server_address[1]}"
+	server.shutdown()
+	server.server_close()
+
+
+def _sha256(data: bytes) -> str:
+	return hashlib.sha256(data).hexdigest()
+
+
+class TestAssetDownload(object):
+	"""Run AssetDownload unit tests."""
+
+	def test_parallel_downloads_compute_hashes(
+		self,
+		asset_server: str,
+		tmp_path: typing.Any
+	) -> None:
+		downloads = [
+			libioc.AssetDownload.AssetDownload(
+				url=f"{asset_server}/{name}.txz",
+				path=str(tmp_path / f"{name}.txz")
+			)
+			for name in ["base", "lib32"]
+		]
+		results = list(libioc.AssetDownload.download(downloads))
+
+		assert len([x for x in results if x[1] is True]) == 2
+		for download in downloads:
+			asset_path = "/" + download.url.split("/").pop()
+			content = AssetRequestHandler.assets[asset_path]
+			assert download.done is True
+			assert download.sha256 == _sha256(content)
+			assert download.throughput is not None
+			with open(download.path, "rb") as f:
+				assert f.read() == content
+			assert os.path.exists(download.partial_path) is False
+
+	def test_partial_downloads_are_resumed(
+		self,
+		asset_server: str,
+		tmp_path: typing.Any
+	) -> None:
+		content = AssetRequestHandler.assets["/base.txz"]
+		download = libioc.AssetDownload.AssetDownload(
+			url=f"{asset_server}/base.txz",
+			path=str(tmp_path / "base.txz")
+		)
+		with open(download.partial_path, "wb") as f:
+			f.write(content[:1000000])
+
+		download.run()
+
+		assert AssetRequestHandler.ranges == ["bytes=1000000-"]
+		assert download.bytes_resumed == 1000000
+		assert download.bytes_received == len(content) - 1000000
+		assert download.sha256 == _sha256(content)
+
+	def test_restarts_when_ranges_are_unsupported(
+		self,
+		asset_server: str,
+		tmp_path: typing.Any
+	) -> None:
+		AssetRequestHandler.support_ranges = False
+		content = AssetRequestHandler.assets["/lib32.txz"]
+		download = libioc.AssetDownload.AssetDownload(
+			url=f"{asset_server}/lib32.txz",
+			path=str(tmp_path / "lib32.txz")
+		)
+		with open(download.partial_path, "wb") as f:
+			f.write(b"stale data")
+
+		download.run()
+
+		assert download.bytes_resumed == 0
+		assert download.sha256 == _sha256(content)
+		with open(download.path, "rb") as f:
+			assert f.read() == content
+
+	def test_complete_partial_files_are_finished(
+		self,
+		asset_server: str,
+		tmp_path: typing.Any
+	) -> None:
+		content = AssetRequestHandler.assets["/lib32.txz"]
+		download = libioc.AssetDownload.AssetDownload(
+			url=f"{asset_server}/lib32.txz",
+			path=str(tmp_path / "lib32.txz")
+		)
+		with open(download.partial_path, "wb") as f:
+			f.write(content)
+
+		download.run()
+
+		assert download.bytes_received == 0
+		assert download.sha256 == _sha256(content)
+
+	def test_missing_assets_fail(
+		self,
+		asset_server: str,
+		tmp_path: typing.Any
+	) -> None:
+		download = libioc.AssetDownload.AssetDownload(
+			url=f"{asset_server}/src.txz",
+			path=str(tmp_path / "src.txz")
+		)
+		results = list(libioc.AssetDownload.download([download]))
+
+		assert results == [(download, True)]
+		assert isinstance(download.error, libioc.errors.DownloadFailed)
@@ -0,0 +1,120 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the parallel extraction of release assets."""
+import io
+import os
+import tarfile
+import typing
+
+import pytest
+
+import libioc.AssetExtraction
+import libioc.errors
+
+
+def _create_asset(
+	path: str,
+	files: typing.Dict[str, bytes],
+	directories: typing.List[str]=[]
+) -> None:
+	with tarfile.open(path, "w:xz") as tar:
+		for name in directories:
+			tar_info = tarfile.TarInfo(name)
+			tar_info.type = tarfile.DIRTYPE
+			tar_info.mode = 0o755
+			tar.addfile(tar_info)
+		for name, content in files.items():
+			tar_info = tarfile.TarInfo(name)
+			tar_info.size = len(content)
+			tar.addfile(tar_info, io.BytesIO(content))
+
+
+class TestAssetExtraction(object):
+	"""Run AssetExtraction unit tests."""
+
+	def test_extracts_assets_in_parallel(
+		self,
+		tmp_path: typing.Any
+	) -> None:
+		base = str(tmp_path / "base.txz")
+		_create_asset(
+			base,
+			{"./usr/bin/true": b"base", "./etc/rc.conf": b""},
+			directories=["./usr", "./usr/lib32"]
+		)
+		lib32 = str(tmp_path / "lib32.txz")
+		_create_asset(lib32, {"./usr/lib32/libc.so.7": b"lib32"})
+
+		destination = str(tmp_path / "root")
+		os.mkdir(destination)
+		extractions = [
+			libioc.AssetExtraction.AssetExtraction(
+				file=file,
+				destination=destination,
+				compression_format="xz"
+			) for file in [base, lib32]
+		]
+		updates = list(libioc.AssetExtraction.extract(
+			extractions,
+			max_workers=2
+		))
+
+		finished = [x for x, is_finished in updates if is_finished is True]
+		assert sorted(x.file for x in finished) == [base, lib32]
+		for extraction in extractions:
+			assert extraction.done is True
+			assert extraction.error is None
+			assert extraction.bytes_read == extraction.total_bytes
+			assert extraction.duration is not None
+		with open(f"{destination}/usr/lib32/libc.so.7", "rb") as f:
+			assert f.read() == b"lib32"
+		with open(f"{destination}/usr/bin/true", "rb") as f:
+			assert f.read() == b"base"
+
+	def test_reports_illegal_archive_content(
+		self,
+		tmp_path: typing.Any
+	) -> None:
+		asset = str(tmp_path / "base.txz")
+		_create_asset(asset, {"./etc/rc.conf": b"", "../passwd": b""})
+
+		destination = str(tmp_path / "root")
+		os.mkdir(destination)
+		extraction = libioc.AssetExtraction.AssetExtraction(
+			file=asset,
+			destination=destination,
+			compression_format="xz"
+		)
+		updates = list(libioc.AssetExtraction.extract([extraction]))
+
+		assert updates[-1] == (extraction, True)
+		assert extraction.done is False
+		assert isinstance(
+			extraction.error,
+			libioc.errors.IllegalArchiveContent
+		)
+		assert extraction.error.asset_name == asset
+		with pytest.raises(libioc.errors.IllegalArchiveContent):
+			raise extraction.error
+		assert os.path.exists(str(tmp_path / "passwd")) is False
@@ -0,0 +1,148 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for BackupBundle module."""
+import gzip
+import os
+import tarfile
+import typing
+
+import pytest
+
+import libioc.BackupBundle
+
+ZFS = """#!/bin/sh
+echo "$@" >> "$0.log"
+cat "$0.stream"
+"""
+
+
+@pytest.fixture
+def zfs(
+	tmp_path: typing.Any,
+	monkeypatch: typing.Any
+) -> str:
+	"""Replace the zfs command with a script that prints a send stream."""
+	zfs_path = str(tmp_path / "zfs")
+	with open(zfs_path, "w") as f:
+		f.write(ZFS)
+	os.chmod(zfs_path, 0o755)
+	monkeypatch.setattr(
+		libioc.BackupBundle.BundleWriter,
+		"ZFS_COMMAND",
+		zfs_path
+	)
+	return zfs_path
+
+
+class TestBackupBundle(object):
+	"""Run BackupBundle unit tests."""
+
+	def test_parallel_gzip_is_a_single_gzip_member(
+		self,
+		tmp_path: typing.Any
+	) -> None:
+		"""Test that blocks compressed in parallel decompress as one."""
+		data = b"".join([
+			f"line {i} of the example data\n".encode("UTF-8")
+			for i in range(200000)
+		]) + os.urandom(100000)
+		archive_file = str(tmp_path / "data.gz")
+		with open(archive_file, "wb") as f:
+			writer = libioc.BackupBundle.ParallelGzipWriter(
+				f,
+				level=6,
+				threads=4
+			)
+			for i in range(0, len(data), 100000):
+				writer.write(data[i:(i + 100000)])
+			writer.close()
+
+		with open(archive_file, "rb") as f:
+			compressed = f.read()
+		assert len(compressed) < len(data)
+		assert gzip.decompress(compressed) == data
+
+	def test_assets_are_streamed_into_the_archive(
+		self,
+		zfs: str,
+		tmp_path: typing.Any,
+		monkeypatch: typing.Any
+	) -> None:
+		"""Test that send streams are split into archive members."""
+		monkeypatch.setattr(libioc.BackupBundle, "SEND_STREAM_PART_SIZE", 1000)
+		stream = os.urandom(2500)
+		with open(f"{zfs}.stream", "wb") as f:
+			f.write(stream)
+		source_dir = str(tmp_path / "source")
+		os.makedirs(f"{source_dir}/etc")
+		with open(f"{source_dir}/etc/rc.conf", "w") as f:
+			f.write("sshd_enable=YES\n")
+
+		archive_file = str(tmp_path / "backup.tar.gz")
+		with libioc.BackupBundle.BundleWriter(
+			archive_file,
+			codec="gzip",
+			threads=2
+		) as bundle:
+			bundle.add_bytes("config.json", b"{}")
+			bundle.add_path("root", source_dir)
+			parts = bundle.add_snapshot(
+				"data.zfs",
+				"zroot/iocage/jails/example/data@backup"
+			)
+		assert parts == 3
+		assert bundle.throughput is not None
+		assert bundle.bytes_written > len(stream)
+		assert libioc.BackupBundle.detect_compression_format(
+			archive_file
+		) == "gz"
+
+		with open(f"{zfs}.log", "r") as f:
+			assert f.read().split() == [
+				"send",
+				"zroot/iocage/jails/example/data@backup"
+			]
+
+		extract_dir = str(tmp_path / "extract")
+		with tarfile.open(archive_file, "r|gz") as tar:
+			tar.extractall(extract_dir)
+		with open(f"{extract_dir}/config.json", "r") as f:
+			assert f.read() == "{}"
+		with open(f"{extract_dir}/root/etc/rc.conf", "r") as f:
+			assert f.read() == "sshd_enable=YES\n"
+
+		part_files = libioc.BackupBundle.list_stream_parts(
+			extract_dir,
+			"data.zfs"
+		)
+		assert [os.path.basename(x) for x in part_files] == [
+			"data.zfs.000000",
+			"data.zfs.000001",
+			"data.zfs.000002"
+		]
+		restored_stream = b""
+		for part_file in part_files:
+			with open(part_file, "rb") as f:
+				restored_stream += f.read()
+		assert restored_stream == stream
@@ -28,11 +28,16 @@ import json
 import os
 import uuid
 import hashlib
+import time
 
 import libzfs
 
 import libioc.Jail
+import libioc.helpers
+import libioc.Config.Data
+import libioc.Config.Jail.Globals
 import libioc.Config.Type.JSON
+import libioc.Config.Type.ZFS
 import libioc.Config.Jail.Properties.Interfaces
 
 class TestJailConfig(object):
@@ -380,3 +385,99 @@ class TestBrokenConfig(object):
             logger=logger,
             zfs=zfs
         ))
+
+
+class TestConfigData(object):
+
+    def test_flat_key_index_follows_nested_changes(self) -> None:
+        data = libioc.Config.Data.Data(dict(
+            foo="bar",
+            user=dict(a="1", b=dict(c="2"))
+        ))
+        assert set(data.keys()) == set(["foo", "user.a", "user.b.c"])
+        assert len(data) == 3
+
+        data["user"]["b"]["d"] = "3"
+        assert "user.b.d" in data.keys()
+
+        del data["user.b.c"]
+        del data["user.b.d"]
+        assert "user.b" not in data
+        assert set(data.keys()) == set(["foo", "user.a"])
+
+        data["user"] = "flat"
+        assert set(data.keys()) == set(["foo", "user"])
+        assert len(data) == 2
+
+    def test_clone_and_read_full_default_config(
+        self,
+        new_jail: 'libioc.Jail.Jail'
+    ) -> None:
+        defaults = libioc.Config.Jail.Globals.DEFAULTS
+        iterations = 20
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            new_jail.config.clone(defaults, skip_on_error=True)
+            for key in defaults.keys():
+                new_jail.config.get(key, None)
+        duration = (time.perf_counter() - start) / iterations
+        print(f"clone/read of {len(defaults)} properties: {duration:.4f}s")
+
+
+class TestConfigZFS(object):
+
+    def test_properties_of_all_children_are_read_at_once(
+        self,
+        existing_jail: 'libioc.Jail.Jail'
+    ) -> None:
+        dataset = existing_jail.dataset
+        prop_name = f"{libioc.Config.Type.ZFS.ZFS_PROPERTY_PREFIX}notes"
+        dataset.properties[prop_name] = libzfs.ZFSUserProperty("legacy")
+
+        reader = libioc.Config.Type.ZFS.ZFSPropertyReader(
+            existing_jail.host.datasets.main.jails
+        )
+        assert reader.read(dataset.name)["notes"] == "legacy"
+        assert reader.read("unknown/dataset") == {}
+
+    def test_write_sets_changed_properties_at_once(self) -> None:
+        class FakeProperty(object):
+
+            def __init__(self, value: str) -> None:
+                self.value = value
+
+        class FakeDataset(object):
+
+            name = "zroot/iocage/jails/legacy"
+
+            def __init__(self) -> None:
+                self.properties: typing.Dict[str, FakeProperty] = {}
+                self.updates: typing.List[typing.List[str]] = []
+
+            def update_properties(
+                self,
+                properties: typing.Dict[str, typing.Any]
+            ) -> None:
+                self.updates.append(sorted(properties.keys()))
+                for name, prop in properties.items():
+                    self.properties[name] = FakeProperty(prop.value)
+
+        dataset = FakeDataset()
+        config = libioc.Config.Type.ZFS.DatasetConfigZFS(
+            dataset=dataset
+        )
+        config.write(dict(notes="legacy", priority=5, basejail=True))
+        prefix = libioc.Config.Type.ZFS.ZFS_PROPERTY_PREFIX
+        assert dataset.updates == [[
+            f"{prefix}basejail",
+            f"{prefix}notes",
+            f"{prefix}priority"
+        ]]
+
+        config.write(dict(notes="legacy", priority=5, basejail=True))
+        assert len(dataset.updates) == 1
+
+        data = config.read()
+        assert data["priority"] == "5"
+        assert data["basejail"] is True
@@ -0,0 +1,168 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for DatasetDelta module."""
+import json
+import os
+import typing
+
+import pytest
+
+import libioc.DatasetDelta
+
+ZFS = """#!/bin/sh
+echo "$@" >> "$0.log"
+cat "$0.diff"
+"""
+
+MOUNTPOINT = "/iocage/jails/example/root"
+
+DIFF = "\n".join([
+	f"M\t/\t{MOUNTPOINT}/etc",
+	f"M\tF\t{MOUNTPOINT}/etc/rc.conf",
+	f"+\t@\t{MOUNTPOINT}/etc/rc.conf.link",
+	f"-\tF\t{MOUNTPOINT}/etc/motd",
+	f"+\tF\t{MOUNTPOINT}/usr/local/etc/my\\0040app.conf",
+	f"R\t/\t{MOUNTPOINT}/opt/old\t{MOUNTPOINT}/opt/new",
+	f"+\tF\t{MOUNTPOINT}/bin/sh"
+]) + "\n"
+
+
+def _write(path: str, content: str="") -> None:
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	with open(path, "w") as f:
+		f.write(content)
+
+
+@pytest.fixture
+def zfs(
+	tmp_path: typing.Any,
+	monkeypatch: typing.Any
+) -> str:
+	"""Replace the zfs command with a script that lists changes."""
+	zfs_path = str(tmp_path / "zfs")
+	with open(zfs_path, "w") as f:
+		f.write(ZFS)
+	os.chmod(zfs_path, 0o755)
+	with open(f"{zfs_path}.diff", "w") as f:
+		f.write(DIFF)
+	monkeypatch.setattr(
+		libioc.DatasetDelta.DatasetDelta,
+		"ZFS_COMMAND",
+		zfs_path
+	)
+	return zfs_path
+
+
+class TestDatasetDelta(object):
+	"""Run DatasetDelta unit tests."""
+
+	def test_only_changed_files_are_exported(
+		self,
+		zfs: str,
+		tmp_path: typing.Any
+	) -> None:
+		"""Test that the delta follows the changes listed by zfs diff."""
+		source_root = str(tmp_path / "snapshot")
+		_write(f"{source_root}/etc/rc.conf", "sshd_enable=YES\n")
+		_write(f"{source_root}/etc/hosts", "::1 localhost\n")
+		os.symlink("rc.conf", f"{source_root}/etc/rc.conf.link")
+		_write(f"{source_root}/usr/local/etc/my app.conf", "app\n")
+		_write(f"{source_root}/opt/new/data/file.txt", "renamed\n")
+		_write(f"{source_root}/bin/sh")
+		for i in range(100):
+			_write(f"{source_root}/usr/local/share/unchanged/{i}")
+		os.chmod(f"{source_root}/etc/rc.conf", 0o600)
+
+		destination = str(tmp_path / "root")
+		os.mkdir(destination)
+		manifest_file = str(tmp_path / "root.deleted.json")
+		delta = libioc.DatasetDelta.DatasetDelta(
+			from_snapshot="zroot/iocage/releases/12.0-RELEASE/root@example",
+			to_snapshot="zroot/iocage/jails/example/root@backup",
+			mountpoint=MOUNTPOINT,
+			source_root=source_root,
+			excludes=["bin", "usr/bin"]
+		)
+		copied_count, deleted_count = delta.export(
+			destination=destination,
+			manifest_file=manifest_file
+		)
+
+		with open(f"{zfs}.log", "r") as f:
+			assert f.read().split() == [
+				"diff",
+				"-H",
+				"-F",
+				"zroot/iocage/releases/12.0-RELEASE/root@example",
+				"zroot/iocage/jails/example/root@backup"
+			]
+
+		exported_files = []
+		for root, dirs, files in os.walk(destination):
+			for name in files:
+				path = os.path.join(root, name)
+				exported_files.append(path[(len(destination) + 1):])
+		assert sorted(exported_files) == [
+			"etc/rc.conf",
+			"etc/rc.conf.link",
+			"opt/new/data/file.txt",
+			"usr/local/etc/my app.conf"
+		]
+		assert os.readlink(f"{destination}/etc/rc.conf.link") == "rc.conf"
+		assert (os.stat(f"{destination}/etc/rc.conf").st_mode & 0o777) == \
+			0o600
+
+		with open(manifest_file, "r") as f:
+			assert json.load(f) == dict(deleted=["etc/motd", "opt/old"])
+		assert (copied_count, deleted_count) == (9, 2)
+
+	def test_deleted_files_are_removed_inside_root(
+		self,
+		tmp_path: typing.Any
+	) -> None:
+		"""Test that manifest paths cannot escape the root directory."""
+		root = str(tmp_path / "root")
+		_write(f"{root}/etc/motd", "motd\n")
+		_write(f"{root}/opt/old/file.txt")
+		_write(str(tmp_path / "outside"))
+		os.symlink(str(tmp_path), f"{root}/escape")
+
+		manifest_file = str(tmp_path / "root.deleted.json")
+		with open(manifest_file, "w") as f:
+			json.dump(dict(deleted=[
+				"etc/motd",
+				"opt/old",
+				"etc/missing",
+				"../outside",
+				"escape/outside"
+			]), f)
+
+		assert libioc.DatasetDelta.remove_deleted_files(
+			root=root,
+			manifest_file=manifest_file
+		) == 2
+		assert os.path.exists(f"{root}/etc/motd") is False
+		assert os.path.exists(f"{root}/opt/old") is False
+		assert os.path.isdir(f"{root}/opt") is True
+		assert os.path.exists(str(tmp_path / "outside")) is True
@@ -0,0 +1,177 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for DevfsRules module."""
+import os
+import typing
+
+import pytest
+
+import libioc.DevfsRules
+
+DEVFS = """#!/bin/sh
+echo "$@" >> "$0.log"
+if [ "$5" = "-" ]; then
+	cat >> "$0.stdin"
+fi
+"""
+
+DEFAULT_RULES = """[devfsrules_hide_all=1]
+add hide
+
+[devfsrules_unhide_basic=2]
+add path null unhide
+add path zero unhide
+"""
+
+
+def _read_lines(path: str) -> typing.List[str]:
+	try:
+		with open(path, "r") as f:
+			return f.read().splitlines()
+	except FileNotFoundError:
+		return []
+
+
+@pytest.fixture
+def devfs(
+	tmp_path: typing.Any,
+	monkeypatch: typing.Any
+) -> str:
+	"""Replace the devfs command and default rules and return its path."""
+	devfs_path = str(tmp_path / "devfs")
+	with open(devfs_path, "w") as f:
+		f.write(DEVFS)
+	os.chmod(devfs_path, 0o755)
+
+	default_rules_file = str(tmp_path / "defaults.rules")
+	with open(default_rules_file, "w") as f:
+		f.write(DEFAULT_RULES)
+
+	monkeypatch.setattr(
+		libioc.DevfsRules.DevfsRules,
+		"DEVFS_COMMAND",
+		devfs_path
+	)
+	monkeypatch.setattr(
+		libioc.DevfsRules.DevfsRules,
+		"default_rules_file",
+		default_rules_file
+	)
+	return devfs_path
+
+
+def _new_ruleset(*rules: str) -> libioc.DevfsRules.DevfsRuleset:
+	ruleset = libioc.DevfsRules.DevfsRuleset()
+	for rule in rules:
+		ruleset.append(rule)
+	return ruleset
+
+
+class TestDevfsRules(object):
+	"""Run DevfsRules unit tests."""
+
+	def test_rulesets_are_found_by_their_rules(
+		self,
+		devfs: str,
+		tmp_path: typing.Any
+	) -> None:
+		"""Test that rulesets are looked up by content regardless the name."""
+		devfs_rules = libioc.DevfsRules.DevfsRules(
+			rules_file=str(tmp_path / "devfs.rules")
+		)
+
+		ruleset = _new_ruleset("add path null unhide", "add path zero unhide")
+		assert ruleset in devfs_rules
+		assert devfs_rules.find_by_rules(ruleset).number == 2
+		assert devfs_rules[devfs_rules.index(ruleset)].name == (
+			"devfsrules_unhide_basic"
+		)
+
+		unknown_ruleset = _new_ruleset("add path bpf* unhide")
+		assert unknown_ruleset not in devfs_rules
+		assert devfs_rules.find_by_rules(unknown_ruleset) is None
+		with pytest.raises(ValueError):
+			devfs_rules.index(unknown_ruleset)
+
+		number = devfs_rules.new_ruleset(unknown_ruleset)
+		assert devfs_rules.find_by_rules(
+			_new_ruleset("add path bpf* unhide")
+		).number == number
+
+	def test_batch_writes_the_rules_file_once(
+		self,
+		devfs: str,
+		tmp_path: typing.Any,
+		monkeypatch: typing.Any
+	) -> None:
+		"""Test that saving within a batch is deferred until it ends."""
+		rules_file = str(tmp_path / "devfs.rules")
+		devfs_rules = libioc.DevfsRules.DevfsRules(rules_file=rules_file)
+
+		writes = []
+		_save = devfs_rules._save
+		monkeypatch.setattr(devfs_rules, "_save", lambda: writes.append(_save()))
+
+		with devfs_rules.batch():
+			for i in range(3):
+				devfs_rules.new_ruleset(_new_ruleset(f"add path tap{i} unhide"))
+				with devfs_rules.batch():
+					devfs_rules.save()
+			assert len(writes) == 0
+			assert os.path.exists(rules_file) is False
+
+		assert len(writes) == 1
+		reloaded_rules = libioc.DevfsRules.DevfsRules(rules_file=rules_file)
+		for i in range(3):
+			ruleset = _new_ruleset(f"add path tap{i} unhide")
+			assert ruleset in reloaded_rules
+
+	def test_ruleset_is_loaded_with_a_single_add_command(
+		self,
+		devfs: str,
+		tmp_path: typing.Any
+	) -> None:
+		"""Test that all rules of a new ruleset are passed at once."""
+		devfs_rules = libioc.DevfsRules.DevfsRules(
+			rules_file=str(tmp_path / "devfs.rules")
+		)
+		ruleset = _new_ruleset(
+			"add include $devfsrules_hide_all",
+			"add include $devfsrules_unhide_basic",
+			"add path 'bpf*' unhide",
+			"add path zfs unhide mode 0666"
+		)
+		number = devfs_rules.new_ruleset(ruleset)
+		devfs_rules.load_ruleset(ruleset)
+
+		assert _read_lines(f"{devfs}.log") == [
+			f"rule -s {number} delset",
+			f"rule -s {number} add -"
+		]
+		assert _read_lines(f"{devfs}.stdin") == [
+			"include 1",
+			"include 2",
+			"path bpf* unhide",
+			"path zfs unhide mode 0666"
+		]
@@ -0,0 +1,157 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for EventRecorder module."""
+import json
+import pytest
+import threading
+import typing
+
+import libioc.EventRecorder
+import libioc.events
+
+
+class FakeJail(object):
+	"""Jail that only provides the full_name JailEvents read."""
+
+	def __init__(self, name: str) -> None:
+		self.full_name = f"ioc-{name}"
+
+
+class FakeClock(threading.local):
+	"""Per-thread event timer that only advances when sleeping."""
+
+	now: float = 0.0
+
+	def __call__(self) -> float:
+		return self.now
+
+	def sleep(self, seconds: float) -> None:
+		self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch: typing.Any) -> FakeClock:
+	"""Replace the event timer so that events get fixed start/stop times."""
+	fake_clock = FakeClock()
+	monkeypatch.setattr(libioc.events, "timer", fake_clock)
+	monkeypatch.setattr(libioc.EventRecorder, "timer", fake_clock)
+	return fake_clock
+
+
+def _start(
+	jail: FakeJail,
+	event_scope: libioc.events.Scope,
+	clock: FakeClock,
+	delay: float=0.01,
+	fail: bool=False
+) -> None:
+	jailStartEvent = libioc.events.JailStart(jail=jail, scope=event_scope)
+	jailStartEvent.begin()
+	mountDevfsEvent = libioc.events.MountDevFS(
+		jail=jail,
+		scope=jailStartEvent.scope
+	)
+	mountDevfsEvent.begin()
+	clock.sleep(delay)
+	mountDevfsEvent.end()
+	if fail is True:
+		jailStartEvent.fail(RuntimeError("failed"))
+	else:
+		jailStartEvent.end()
+
+
+class TestEventRecorder(object):
+	"""Run EventRecorder unit tests."""
+
+	def test_records_finished_events_of_attached_scopes(
+		self,
+		clock: FakeClock
+	) -> None:
+		recorder = libioc.EventRecorder.EventRecorder()
+		_start(FakeJail("a"), recorder.new_scope(), clock)
+		other_scope = libioc.events.Scope()
+		recorder.attach(other_scope)
+		_start(FakeJail("b"), other_scope, clock, fail=True)
+		_start(FakeJail("c"), libioc.events.Scope(), clock)
+
+		records = [(x.type, x.identifier, x.state) for x in recorder.records]
+		assert records == [
+			("MountDevFS", "ioc-a", "done"),
+			("JailStart", "ioc-a", "done"),
+			("MountDevFS", "ioc-b", "done"),
+			("JailStart", "ioc-b", "failed")
+		]
+		devfs_record = recorder.records[0]
+		assert devfs_record.depth == 1
+		assert devfs_record.duration == 0.01
+		assert recorder.records[1].duration == devfs_record.duration
+
+	def test_exports_chrome_trace(
+		self,
+		tmp_path: typing.Any,
+		clock: FakeClock
+	) -> None:
+		recorder = libioc.EventRecorder.EventRecorder()
+		threads = [
+			threading.Thread(
+				target=_start,
+				args=(FakeJail(name), recorder.new_scope(), clock)
+			) for name in ["a", "b"]
+		]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+
+		trace_file = str(tmp_path / "trace.json")
+		recorder.write_chrome_trace(trace_file)
+		with open(trace_file, "r", encoding="UTF-8") as f:
+			trace = json.load(f)
+
+		trace_events = trace["traceEvents"]
+		assert len(trace_events) == 4
+		assert all(x["ph"] == "X" for x in trace_events)
+		assert set(x["tid"] for x in trace_events) == set([1, 2])
+		assert trace_events == sorted(trace_events, key=lambda x: x["ts"])
+		jail_start = [x for x in trace_events if x["name"] == "JailStart"][0]
+		assert jail_start["dur"] == 10000
+		assert jail_start["args"]["state"] == "done"
+
+	def test_summarizes_latency_by_event_type(self, clock: FakeClock) -> None:
+		recorder = libioc.EventRecorder.EventRecorder()
+		for i in range(20):
+			_start(FakeJail(str(i)), recorder.new_scope(), clock, delay=0)
+		slow_scope = recorder.new_scope()
+		_start(FakeJail("slow"), slow_scope, clock, delay=0.05)
+
+		summary = recorder.summary()
+		assert sorted(summary.keys()) == ["JailStart", "MountDevFS"]
+		devfs_summary = summary["MountDevFS"]
+		assert devfs_summary["count"] == 21
+		assert devfs_summary["max"] == pytest.approx(0.05)
+		assert devfs_summary["p50"] == 0
+		assert devfs_summary["p95"] < devfs_summary["max"]
+
+		recorder.clear()
+		assert recorder.summary() == {}
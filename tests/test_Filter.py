@@ -0,0 +1,171 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for Filter module."""
+import itertools
+import re
+import time
+import typing
+
+import libioc.Filter
+import libioc.helpers
+
+
+def _legacy_match(value: str, filter_string: str, short: bool) -> bool:
+	"""Match a value like Term did before its values were precompiled."""
+	pattern = filter_string
+	for character in [".", "$", "^", "(", ")", "?"]:
+		pattern = pattern.replace(character, f"\\{character}")
+	pattern = pattern.replace("*", ".*").replace("+", ".+")
+	if re.match(f"^{pattern}$", value) is not None:
+		return True
+	if ("*" in filter_string) or ("+" in filter_string):
+		return False
+	if (len(filter_string) == 8) and (short is True):
+		if libioc.helpers.to_humanreadable_name(value) == filter_string:
+			return True
+	_parse_user_input = libioc.helpers.parse_user_input
+	return (_parse_user_input(value) == _parse_user_input(filter_string))
+
+
+def _legacy_term_matches(term: libioc.Filter.Term, value: str) -> bool:
+	return any([_legacy_match(value, x, term.short) for x in term])
+
+
+class TestQueryPlan(object):
+	"""Run QueryPlan unit tests."""
+
+	def test_terms_are_grouped_by_source(self) -> None:
+		terms = libioc.Filter.Terms([
+			"web*",
+			"running=yes",
+			"tags=www",
+			"release=12.0-RELEASE"
+		])
+		plan = terms.plan(state_keys=("jid", "running",))
+
+		def keys(source: int) -> list:
+			return [term.key for term in plan.stages[source]]
+
+		assert keys(libioc.Filter.SOURCE_NAME) == ["name"]
+		assert keys(libioc.Filter.SOURCE_STATE) == ["running"]
+		assert keys(libioc.Filter.SOURCE_PROPERTIES) == ["tags", "release"]
+		assert keys(libioc.Filter.SOURCE_CONFIG) == []
+
+	def test_unresolved_terms_are_deferred(self) -> None:
+		terms = libioc.Filter.Terms(["tags=www", "release=12.0-RELEASE"])
+		plan = terms.plan()
+		property_terms = plan.stages[libioc.Filter.SOURCE_PROPERTIES]
+
+		unresolved = plan.match_values(property_terms, dict(tags=["www"]))
+		assert [term.key for term in unresolved] == ["release"]
+
+	def test_mismatching_values_reject(self) -> None:
+		terms = libioc.Filter.Terms(["running=yes"])
+		plan = terms.plan(state_keys=("running",))
+		state_terms = plan.stages[libioc.Filter.SOURCE_STATE]
+
+		assert plan.match_values(state_terms, dict(running=False)) is None
+		assert plan.match_values(state_terms, dict(running=True)) == []
+
+	def test_single_name_selection(self) -> None:
+		def selects_single_name(filters: typing.List[str]) -> bool:
+			return libioc.Filter.Terms(filters).selects_single_name()
+
+		assert selects_single_name(["web1"]) is True
+		assert selects_single_name(["web1", "tags=www"]) is True
+		assert selects_single_name(["web*"]) is False
+		assert selects_single_name(["web1,web2"]) is False
+		assert selects_single_name(["tags=www"]) is False
+		assert selects_single_name([]) is False
+
+
+class TestTerm(object):
+	"""Run Term unit tests."""
+
+	values = [
+		"web1",
+		"web10",
+		"db.example",
+		"dbXexample",
+		"yes",
+		"on",
+		"-",
+		"none",
+		"",
+		"a[b]",
+		"ab",
+		"3c8f4e1e-5f3d-4c5b-9a3e-1f2d3c4b5a69",
+		"3c8f4e1e",
+		"12.0-RELEASE"
+	]
+
+	filters = [
+		"web1",
+		"web*",
+		"web+",
+		"*",
+		"db.example",
+		"true",
+		"off",
+		"NONE",
+		"a[b]",
+		"3c8f4e1e",
+		"12.0-RELEASE",
+		"12.?-RELEASE"
+	]
+
+	def test_matches_like_unprecompiled_filters(self) -> None:
+		for key in ["name", "tags"]:
+			for size in [1, 2]:
+				for filters in itertools.combinations(self.filters, size):
+					term = libioc.Filter.Term(key, list(filters))
+					for value in self.values:
+						expected = _legacy_term_matches(term, value)
+						assert term.matches(value, term.short) == expected, \
+							f"{key}={','.join(filters)} vs. {value}"
+
+	def test_matches_list_values(self) -> None:
+		term = libioc.Filter.Term("tags", "www,db*")
+		assert term.matches(["mail", "www"]) is True
+		assert term.matches(["mail", "dbslave"]) is True
+		assert term.matches(["mail"]) is False
+
+	def test_benchmark_precompiled_terms(self) -> None:
+		term = libioc.Filter.Term("name", "web*,db1,mail,3c8f4e1e")
+		values = [f"jail{i}" for i in range(2000)] + self.values
+
+		start = time.process_time()
+		for value in values:
+			_legacy_term_matches(term, value)
+		legacy_duration = time.process_time() - start
+
+		start = time.process_time()
+		for value in values:
+			term.matches(value, term.short)
+		duration = time.process_time() - start
+
+		print(
+			f"{len(values)} values: {legacy_duration:.4f}s legacy, "
+			f"{duration:.4f}s precompiled"
+		)
@@ -0,0 +1,167 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for batched firewall rules."""
+import ipaddress
+import os
+import typing
+
+import pytest
+
+import helper_functions
+import libioc.BridgeInterface
+import libioc.Firewall
+import libioc.Network
+import libioc.NetworkInterface
+import libioc.helpers_ioctl
+
+IPFW = """#!/bin/sh
+echo "$@" >> "$0.log"
+if [ "$2" = "/dev/stdin" ]; then
+	cat >> "$0.stdin"
+fi
+"""
+
+IFCONFIG = """#!/bin/sh
+if [ "$1" = "epair" ]; then
+	echo "epair$$a"
+fi
+while [ $# -gt 0 ]; do
+	if [ "$1" = "name" ]; then
+		echo "$2"
+	fi
+	shift
+done
+"""
+
+
+def _read_lines(path: str) -> typing.List[str]:
+	try:
+		with open(path, "r") as f:
+			return f.read().splitlines()
+	except FileNotFoundError:
+		return []
+
+
+@pytest.fixture
+def ipfw(
+	tmp_path: typing.Any,
+	monkeypatch: typing.Any
+) -> str:
+	"""Replace ipfw and ifconfig with scripts and return the ipfw path."""
+	ipfw_path = str(tmp_path / "ipfw")
+	ifconfig_path = str(tmp_path / "ifconfig")
+	for path, content in [(ipfw_path, IPFW), (ifconfig_path, IFCONFIG)]:
+		with open(path, "w") as f:
+			f.write(content)
+		os.chmod(path, 0o755)
+
+	monkeypatch.setattr(libioc.Firewall.Firewall, "IPFW_COMMAND", ipfw_path)
+	monkeypatch.setattr(
+		libioc.Firewall.Firewall,
+		"_required_sysctl_properties",
+		{}
+	)
+	monkeypatch.setattr(
+		libioc.NetworkInterface.NetworkInterface,
+		"ifconfig_command",
+		ifconfig_path
+	)
+
+	def _create_interface(cloner_name: str) -> str:
+		raise OSError("SIOCIFCREATE2 is not available")
+
+	monkeypatch.setattr(
+		libioc.helpers_ioctl,
+		"create_interface",
+		_create_interface
+	)
+	return ipfw_path
+
+
+def _create_networks(
+	firewall: libioc.Firewall.Firewall
+) -> typing.List[libioc.Network.Network]:
+	bridge = libioc.BridgeInterface.BridgeInterface(":bridge0")
+	return [
+		libioc.Network.Network(
+			jail=helper_functions.FakeVnetJail(),
+			nic=f"vnet{i}",
+			ipv4_addresses=[
+				ipaddress.IPv4Interface(f"10.0.{i}.2/24"),
+				ipaddress.IPv4Interface(f"10.0.{i}.3/24")
+			],
+			ipv6_addresses=[ipaddress.IPv6Interface(f"fd00:{i}::2/64")],
+			mtu=1500,
+			bridge=bridge,
+			firewall=firewall
+		) for i in range(2)
+	]
+
+
+class TestFirewall(object):
+	"""Run Firewall unit tests."""
+
+	def test_rules_are_queued_until_applied(self, ipfw: str) -> None:
+		firewall = libioc.Firewall.Firewall()
+		firewall.add_rule(4, ["allow", "ipv4", "from", "any", "to", "any"])
+		firewall.add_rule(4, ["deny", "log", "ipv4", "from", "any"])
+		assert _read_lines(f"{ipfw}.log") == []
+
+		firewall.apply()
+		assert _read_lines(f"{ipfw}.log") == ["-q /dev/stdin"]
+		assert _read_lines(f"{ipfw}.stdin") == [
+			"add 10004 allow ipv4 from any to any",
+			"add 10004 deny log ipv4 from any"
+		]
+
+		firewall.apply()
+		assert len(_read_lines(f"{ipfw}.log")) == 1
+
+	def test_secure_vnet_networks_use_one_ipfw_call(self, ipfw: str) -> None:
+		firewall = libioc.Firewall.Firewall()
+		networks = _create_networks(firewall)
+		plan = libioc.NetworkInterface.NetworkInterfacePlan()
+		for network in networks:
+			list(network.setup(plan=plan))
+		assert _read_lines(f"{ipfw}.log") == []
+		firewall.apply()
+		plan.apply()
+
+		assert _read_lines(f"{ipfw}.log") == ["-q /dev/stdin"]
+		rules = _read_lines(f"{ipfw}.stdin")
+		# three rules per address and two deny rules per address family
+		assert len(rules) == len(networks) * ((3 * 3) + (2 * 2))
+		assert all(x.startswith("add 10004 ") for x in rules)
+		assert "add 10004 allow ipv4 from any to 10.0.1.3 via vnet1:4 out" in (
+			rules
+		)
+
+	def test_rules_are_deleted_in_one_call(self, ipfw: str) -> None:
+		firewall = libioc.Firewall.Firewall()
+		for network in _create_networks(firewall):
+			list(network.teardown(jid=4, apply_firewall=False))
+		assert _read_lines(f"{ipfw}.log") == []
+
+		firewall.apply()
+		assert _read_lines(f"{ipfw}.log") == ["-q delete 10004"]
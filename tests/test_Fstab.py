@@ -28,11 +28,58 @@ import random
 import sys
 import os.path
 import subprocess
+import re
+import time
+import typing
 
 import libzfs
 
 import libioc.Config.Jail.File.Fstab
 
+
+class _StandInJail(object):
+	"""Provide the jail attributes a JailFstab reads."""
+
+	def __init__(self, root_path: str) -> None:
+		self.root_path = root_path
+		self.storage_backend = None
+		self.running = False
+		self.humanreadable_name = "standin"
+
+	def is_path_relative(self, path: str) -> bool:
+		return path.startswith(self.root_path)
+
+	def require_relative_path(self, path: str) -> None:
+		assert self.is_path_relative(path)
+
+
+def _legacy_parse(input_text: str) -> typing.List[dict]:
+	"""Parse fstab lines with regex passes and a linear existence check."""
+	lines: typing.List[dict] = []
+	for line in input_text.rstrip("\n").splitlines():
+		line = line.split("#", maxsplit=1)[0].strip()
+		line = re.sub(r"\s\s*", " ", line)
+		line = re.sub(r"([^\\\\])\s", r"\g<1>\n", line)
+		line = line.replace("\\ ", " ")
+		fragments = line.splitlines()
+		new_line = dict(source=fragments[0], destination=fragments[1])
+		if any(
+			hash(x["destination"]) == hash(new_line["destination"])
+			for x in lines
+		):
+			continue
+		lines.append(new_line)
+	return lines
+
+
+def _generate_fstab(root_path: str, count: int) -> str:
+	return "\n".join([
+		f"/projects/customer\\ {i}\t{root_path}/projects/{i}\t"
+		"nullfs\tro\t0\t0"
+		for i in range(count)
+	])
+
+
 class TestFstab(object):
 	"""Run Fstab unit tests."""
 
@@ -96,6 +143,96 @@ tmpfs /tmp tmpfs rw,mode=777 0 0 # {AUTO_COMMENT_IDENTIFIER}"""
 		assert type(fstab[2]).__name__ == "FstabCommentLine"
 		assert str(fstab[2]) == "# yet another comment line"
 
+	def test_tokenizes_escaped_whitespace(
+		self
+	) -> None:
+
+		temp_file = tempfile.NamedTemporaryFile()
+		content = "/my\\ source  /mnt/my\\\tdest\tnullfs ro 0 0 # shared"
+		temp_file.write(content.encode("utf-8"))
+		temp_file.seek(0)
+
+		fstab = libioc.Config.Jail.File.Fstab.Fstab(file=temp_file.name)
+
+		assert len(fstab) == 1
+		assert fstab[0]["source"] == "/my source"
+		assert fstab[0]["destination"] == "/mnt/my dest"
+		assert fstab[0]["comment"] == "shared"
+		assert str(fstab[0]) == (
+			"/my\\ source\t/mnt/my\\ dest\tnullfs\tro\t0\t0 # shared"
+		)
+
+	def test_destination_index_follows_changes(
+		self,
+		tmp_path: typing.Any
+	) -> None:
+
+		Fstab = libioc.Config.Jail.File.Fstab
+		fstab = Fstab.Fstab(file=str(tmp_path / "fstab"))
+		first = fstab.new_line(source="/a", destination="/mnt/a")
+		fstab.new_line(source="/b", destination="/mnt/b")
+		assert first in fstab
+		assert fstab.index(Fstab.FstabLine(dict(
+			source="/other",
+			destination="/mnt/b"
+		))) == 1
+
+		fstab.insert(0, Fstab.FstabLine(dict(source="/c", destination="/mnt/c")))
+		assert fstab.index(first) == 1
+
+		fstab[1] = Fstab.FstabLine(dict(source="/d", destination="/mnt/d"))
+		assert first not in fstab
+		assert fstab.index(
+			Fstab.FstabLine(dict(source="/d", destination="/mnt/d"))
+		) == 1
+
+		del fstab[0]
+		assert Fstab.FstabLine(dict(source="/c", destination="/mnt/c")) \
+			not in fstab
+		with pytest.raises(ValueError):
+			fstab.index(Fstab.FstabLine(dict(source="/c", destination="/mnt/c")))
+
+		fstab.replace_path("/mnt", "/media")
+		assert [x["destination"] for x in fstab] == ["/media/d", "/media/b"]
+		assert Fstab.FstabLine(dict(source="/b", destination="/media/b")) \
+			in fstab
+
+	def test_benchmark_jail_fstab_parsing(
+		self,
+		tmp_path: typing.Any
+	) -> None:
+
+		root_path = str(tmp_path / "root")
+		durations: typing.Dict[int, float] = {}
+		for count in [10, 1000, 10000]:
+			content = _generate_fstab(root_path, count)
+			content += "\n" + content  # duplicate destinations are skipped
+
+			fstab = libioc.Config.Jail.File.Fstab.JailFstab(
+				jail=_StandInJail(root_path),
+				file=str(tmp_path / "fstab")
+			)
+			start = time.perf_counter()
+			fstab.parse_lines(content)
+			durations[count] = time.perf_counter() - start
+			assert len(fstab) == count
+			assert fstab[count - 1]["source"] == \
+				f"/projects/customer {count - 1}"
+
+			if count > 1000:
+				# the quadratic legacy parser takes too long with many lines
+				print(f"{count} lines - indexed: {durations[count]:.3f}s")
+				continue
+
+			start = time.perf_counter()
+			legacy_lines = _legacy_parse(content)
+			legacy_duration = time.perf_counter() - start
+			assert len(legacy_lines) == count
+			print(
+				f"{count} lines - legacy: {legacy_duration:.3f}s, "
+				f"indexed: {durations[count]:.3f}s"
+			)
+
 	@pytest.fixture(scope="function")
 	def zfs_volume(
 		self,
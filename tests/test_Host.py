@@ -0,0 +1,72 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for Host module."""
+import typing
+import uuid
+
+import libioc.Host
+
+
+class TestHostFacts(object):
+	"""Run HostFacts unit tests."""
+
+	def test_facts_are_looked_up_once(self, monkeypatch: typing.Any) -> None:
+		lookups: typing.List[str] = []
+		host_uuid = str(uuid.uuid4())
+
+		class Sysctl(object):
+
+			def __init__(self, name: str) -> None:
+				lookups.append(name)
+				self.value = host_uuid
+
+		monkeypatch.setattr(libioc.Host.freebsd_sysctl, "Sysctl", Sysctl)
+		monkeypatch.setattr(
+			libioc.Host.platform,
+			"processor",
+			lambda: lookups.append("processor") or "amd64"
+		)
+
+		facts = libioc.Host.HostFacts()
+		for _ in range(3):
+			assert facts.uuid == uuid.UUID(host_uuid)
+			assert facts.processor == "amd64"
+		assert lookups == ["kern.hostuuid", "processor"]
+
+		facts.invalidate("uuid")
+		assert facts.uuid == uuid.UUID(host_uuid)
+		assert facts.processor == "amd64"
+		assert lookups == ["kern.hostuuid", "processor", "kern.hostuuid"]
+
+		facts.invalidate()
+		assert facts.processor == "amd64"
+		assert lookups[-1] == "processor"
+
+	def test_release_version_of_freebsd(self, monkeypatch: typing.Any) -> None:
+		uname = ("FreeBSD", "host", "12.1-RELEASE-p3", "FreeBSD 12.1", "amd64")
+		monkeypatch.setattr(libioc.Host.os, "uname", lambda: uname)
+
+		facts = libioc.Host.HostFacts()
+		monkeypatch.setattr(facts, "_get_distribution_name", lambda: "FreeBSD")
+		assert facts.release_version == "12.1-RELEASE"
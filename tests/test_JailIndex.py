@@ -0,0 +1,165 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the JailIndex."""
+import json
+import os
+import time
+import typing
+
+import libioc.Config.Data
+import libioc.JailIndex
+
+
+class FakeDataset(object):
+	"""Stand-in for a ZFS dataset with a mountpoint."""
+
+	def __init__(self, mountpoint: str) -> None:
+		self.mountpoint = mountpoint
+
+
+class FakeRootDatasets(object):
+	"""Stand-in for the RootDatasets holding the index file."""
+
+	def __init__(self, mountpoint: str) -> None:
+		self.root = FakeDataset(mountpoint)
+
+
+class FakeConfig(dict):
+	"""Stand-in for a JailConfig with plain data."""
+
+	@property
+	def data(self) -> libioc.Config.Data.Data:
+		return libioc.Config.Data.Data(dict(self))
+
+
+class FakeJail(object):
+	"""Stand-in for a jail with a JSON config file."""
+
+	config_type = "json"
+	config_file = "config.json"
+
+	def __init__(self, mountpoint: str, **config: typing.Any) -> None:
+		self.dataset = FakeDataset(mountpoint)
+		self.config = FakeConfig(config)
+		os.makedirs(mountpoint, exist_ok=True)
+		self.save()
+
+	def save(self) -> None:
+		with open(self.abspath(self.config_file), "w") as f:
+			json.dump(dict(self.config), f)
+
+	def abspath(self, relative_path: str) -> str:
+		return os.path.join(self.dataset.mountpoint, relative_path)
+
+	def get(self, key: str) -> typing.Any:
+		if key == "name":
+			return self.config["id"]
+		return self.config[key]
+
+
+class TestJailIndex(object):
+	"""Run JailIndex unit tests."""
+
+	def test_entries_persist_in_root_dataset(self, tmp_path) -> None:
+		root = FakeRootDatasets(str(tmp_path))
+		jail = FakeJail(
+			str(tmp_path / "jails" / "web"),
+			id="web",
+			release="12.0-RELEASE",
+			tags=["www", "prod"],
+			priority=5
+		)
+
+		index = libioc.JailIndex.JailIndex(root_datasets=root)
+		index.add(jail)
+		index.save()
+		assert os.path.isfile(index.file)
+
+		index = libioc.JailIndex.JailIndex(root_datasets=root)
+		entry = index.lookup("web", jail.dataset)
+		assert entry is not None
+		assert entry["config"]["release"] == "12.0-RELEASE"
+		assert entry["properties"]["tags"] == ["www", "prod"]
+		assert entry["properties"]["priority"] == "5"
+		assert "basejail" not in entry["properties"]
+
+	def test_default_values_are_not_indexed(self, tmp_path) -> None:
+		root = FakeRootDatasets(str(tmp_path))
+		jail = FakeJail(str(tmp_path / "jails" / "web"), id="web", priority=1)
+		jail.get = lambda key: dict(  # type: ignore
+			name="web",
+			priority=1,
+			basejail=True,
+			basejail_type="nullfs"
+		)[key]
+
+		index = libioc.JailIndex.JailIndex(root_datasets=root)
+		index.add(jail)
+		entry = index.lookup("web", jail.dataset)
+		assert entry is not None
+		assert entry["properties"] == dict(name="web", priority="1")
+
+	def test_changed_config_files_are_stale(self, tmp_path) -> None:
+		root = FakeRootDatasets(str(tmp_path))
+		jail = FakeJail(str(tmp_path / "jails" / "web"), id="web", priority=1)
+
+		index = libioc.JailIndex.JailIndex(root_datasets=root)
+		index.add(jail)
+		assert index.lookup("web", jail.dataset) is not None
+
+		jail.config["priority"] = 10
+		jail.save()
+		assert index.lookup("web", jail.dataset) is None
+
+	def test_removed_entries(self, tmp_path) -> None:
+		root = FakeRootDatasets(str(tmp_path))
+		jail = FakeJail(str(tmp_path / "jails" / "web"), id="web")
+
+		index = libioc.JailIndex.JailIndex(root_datasets=root)
+		index.add(jail)
+		index.save()
+		index.remove("web")
+		index.save()
+
+		index = libioc.JailIndex.JailIndex(root_datasets=root)
+		assert index.lookup("web", jail.dataset) is None
+
+	def test_benchmark_lookup(self, tmp_path) -> None:
+		root = FakeRootDatasets(str(tmp_path))
+		jails = [
+			FakeJail(str(tmp_path / "jails" / f"jail{i}"), id=f"jail{i}")
+			for i in range(2000)
+		]
+		index = libioc.JailIndex.JailIndex(root_datasets=root)
+		for jail in jails:
+			index.add(jail)
+		index.save()
+
+		start = time.perf_counter()
+		index = libioc.JailIndex.JailIndex(root_datasets=root)
+		entries = [index.lookup(jail.config["id"], jail.dataset) for jail in jails]
+		duration = time.perf_counter() - start
+
+		print(f"2000 index lookups took {duration:.4f}s")
+		assert None not in entries
@@ -0,0 +1,209 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the JailScheduler."""
+import threading
+import time
+import typing
+
+import pytest
+
+import libioc.EventRecorder
+import libioc.JailScheduler
+import libioc.errors
+import libioc.events
+
+
+class FakeJail(object):
+	"""Jail with the name, depends and priority the scheduler sorts by."""
+
+	def __init__(
+		self,
+		name: str,
+		depends: typing.List[str]=[],
+		priority: int=0
+	) -> None:
+		self.name = name
+		self.full_name = f"ioc-{name}"
+		self.humanreadable_name = name
+		self.depends = depends
+		self.config = dict(depends=depends, priority=priority)
+
+
+class FakeDependencyGraph(libioc.JailScheduler.JailDependencyGraph):
+	"""Resolve dependencies from the FakeJail depends names."""
+
+	def __init__(self, jails: typing.List[FakeJail]) -> None:
+		self.all_jails = dict([(jail.name, jail) for jail in jails])
+		super().__init__(jails=jails, resolve_dependencies=True)
+
+	def _find_dependencies(self, jail: FakeJail) -> typing.List[FakeJail]:
+		return [self.all_jails[name] for name in jail.depends]
+
+
+class Recorder(object):
+	"""Record the execution of the scheduled jail actions."""
+
+	def __init__(self, delay: float=0.05) -> None:
+		self.delay = delay
+		self.lock = threading.Lock()
+		self.started: typing.List[str] = []
+		self.finished: typing.List[str] = []
+		self.running = 0
+		self.max_running = 0
+		self.failing: typing.List[str] = []
+
+	def method(
+		self,
+		jail: FakeJail,
+		event_scope: libioc.events.Scope
+	) -> typing.Generator[libioc.events.IocEvent, None, None]:
+		event = libioc.events.JailStart(jail=jail, scope=event_scope)
+		yield event.begin()
+		with self.lock:
+			self.started.append(jail.name)
+			self.running += 1
+			self.max_running = max(self.max_running, self.running)
+		time.sleep(self.delay)
+		with self.lock:
+			self.running -= 1
+			self.finished.append(jail.name)
+		if jail.name in self.failing:
+			yield event.fail(RuntimeError(jail.name))
+			raise RuntimeError(jail.name)
+		yield event.end()
+
+
+def _run(
+	jails: typing.List[FakeJail],
+	recorder: Recorder,
+	max_workers: int=4,
+	reverse: bool=False,
+	event_scope: typing.Optional[libioc.events.Scope]=None
+) -> typing.List[libioc.events.IocEvent]:
+	scheduler = libioc.JailScheduler.JailScheduler(
+		graph=FakeDependencyGraph(jails),
+		max_workers=max_workers
+	)
+	return list(scheduler.run(
+		method=recorder.method,
+		event_class=libioc.events.JailStart,
+		reverse=reverse,
+		event_scope=event_scope
+	))
+
+
+class TestJailScheduler(object):
+	"""Run JailScheduler unit tests."""
+
+	def test_dependencies_finish_first(self) -> None:
+		jails = [
+			FakeJail("app", depends=["db", "cache"]),
+			FakeJail("db"),
+			FakeJail("cache"),
+			FakeJail("proxy", depends=["app"])
+		]
+		recorder = Recorder()
+		_run(jails, recorder)
+
+		finished = recorder.finished
+		assert recorder.started.index("app") > finished.index("db")
+		assert recorder.started.index("app") > finished.index("cache")
+		assert recorder.started.index("proxy") > finished.index("app")
+		assert recorder.max_running == 2
+
+	def test_reverse_waits_for_dependants(self) -> None:
+		jails = [FakeJail("app", depends=["db"]), FakeJail("db")]
+		recorder = Recorder(delay=0)
+		_run(jails, recorder, reverse=True)
+		assert recorder.finished == ["app", "db"]
+
+	def test_worker_pool_is_bounded(self) -> None:
+		jails = [FakeJail(f"jail{i}") for i in range(8)]
+		recorder = Recorder()
+		_run(jails, recorder, max_workers=3)
+		assert recorder.max_running == 3
+		assert len(recorder.finished) == 8
+
+	def test_priority_orders_ready_jails(self) -> None:
+		jails = [
+			FakeJail("c", priority=3),
+			FakeJail("a", priority=1),
+			FakeJail("b", priority=2)
+		]
+		recorder = Recorder(delay=0)
+		_run(jails, recorder, max_workers=1)
+		assert recorder.started == ["a", "b", "c"]
+
+	def test_events_have_own_scopes(self) -> None:
+		jails = [FakeJail("a"), FakeJail("b")]
+		events = _run(jails, Recorder())
+		scopes = set([id(event.scope) for event in events])
+		assert len(events) == 4
+		assert len(scopes) == 2
+
+	def test_event_recorder_is_passed_to_jail_scopes(self) -> None:
+		jails = [FakeJail("a"), FakeJail("b", depends=["a"])]
+		event_recorder = libioc.EventRecorder.EventRecorder()
+		_run(jails, Recorder(), event_scope=event_recorder.new_scope())
+		assert sorted([x.identifier for x in event_recorder.records]) == [
+			"ioc-a", "ioc-b"
+		]
+		assert event_recorder.summary()["JailStart"]["count"] == 2
+
+	def test_cycles_are_detected_before_start(self) -> None:
+		jails = [
+			FakeJail("a", depends=["b"]),
+			FakeJail("b", depends=["c"]),
+			FakeJail("c", depends=["a"]),
+			FakeJail("d")
+		]
+		recorder = Recorder(delay=0)
+		with pytest.raises(libioc.errors.JailDependencyCycle) as e:
+			_run(jails, recorder)
+		assert [jail.name for jail in e.value.jails] == ["a", "b", "c"]
+		assert recorder.started == []
+
+	def test_dependants_of_failed_jails_are_skipped(self) -> None:
+		jails = [
+			FakeJail("app", depends=["db"]),
+			FakeJail("proxy", depends=["app"]),
+			FakeJail("db"),
+			FakeJail("mail")
+		]
+		recorder = Recorder(delay=0)
+		recorder.failing = ["db"]
+		events: typing.List[libioc.events.IocEvent] = []
+		scheduler = libioc.JailScheduler.JailScheduler(
+			graph=FakeDependencyGraph(jails)
+		)
+		with pytest.raises(RuntimeError):
+			for event in scheduler.run(
+				method=recorder.method,
+				event_class=libioc.events.JailStart
+			):
+				events.append(event)
+
+		assert sorted(recorder.started) == ["db", "mail"]
+		skipped = set([event.jail.name for event in events if event.skipped])
+		assert skipped == set(["app", "proxy"])
@@ -0,0 +1,249 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for LaunchParamPlan module."""
+import typing
+import time
+import uuid
+
+import freebsd_sysctl.types
+
+import libioc.Config.Jail.Defaults
+import libioc.Config.Jail.JailConfig
+import libioc.Host
+import libioc.JailParams
+import libioc.LaunchParamPlan
+
+_NODE = freebsd_sysctl.types.NODE
+_INT = freebsd_sysctl.types.INT
+_STRING = freebsd_sysctl.types.STRING
+
+# a typical set of jail params reported by the kernel
+_PARAMS = [
+	("allow.", _NODE),
+	("allow.chflags", _INT),
+	("allow.mlock", _INT),
+	("allow.mount.", _NODE),
+	("allow.mount.devfs", _INT),
+	("allow.mount.fdescfs", _INT),
+	("allow.mount.nullfs", _INT),
+	("allow.mount.procfs", _INT),
+	("allow.mount.tmpfs", _INT),
+	("allow.mount.zfs", _INT),
+	("allow.quotas", _INT),
+	("allow.raw_sockets", _INT),
+	("allow.set_hostname", _INT),
+	("allow.socket_af", _INT),
+	("allow.sysvipc", _INT),
+	("children.cur", _INT),
+	("children.max", _INT),
+	("cpuset.id", _INT),
+	("devfs_ruleset", _INT),
+	("enforce_statfs", _INT),
+	("host.", _NODE),
+	("host.domainname", _STRING),
+	("host.hostname", _STRING),
+	("host.hostuuid", _STRING),
+	("ip4.", _NODE),
+	("ip4.addr", _STRING),
+	("ip4.saddrsel", _INT),
+	("ip6.", _NODE),
+	("ip6.addr", _STRING),
+	("ip6.saddrsel", _INT),
+	("jid", _INT),
+	("name", _STRING),
+	("osreldate", _INT),
+	("osrelease", _STRING),
+	("parent", _INT),
+	("path", _STRING),
+	("persist", _INT),
+	("securelevel", _INT),
+	("sysvmsg", _NODE),
+	("sysvsem", _NODE),
+	("sysvshm", _NODE),
+	("vnet", _NODE)
+]
+
+
+class _StandInParam(object):
+	"""Jail param with the naming of libioc.JailParams.JailParam."""
+
+	jail_arg_name = libioc.JailParams.JailParam.jail_arg_name
+	iocage_name = libioc.JailParams.JailParam.iocage_name
+
+	def __init__(self, name: str, ctl_type: typing.Any) -> None:
+		self.name = f"security.jail.param.{name}"
+		self.ctl_type = ctl_type
+
+
+class _StandInDefaults(object):
+
+	def __init__(self) -> None:
+		self.config = libioc.Config.Jail.Defaults.JailConfigDefaults()
+
+
+class _StandInHost(libioc.Host.HostGenerator):
+
+	def __init__(self) -> None:
+		self._defaults = _StandInDefaults()
+
+
+class _StandInDataset(object):
+
+	mountpoint = "/iocage/jails/example/root"
+
+
+class _StandInJail(object):
+	"""Jail with the attributes read while planning launch parameters."""
+
+	identifier = "ioc-example"
+	hostuuid = uuid.UUID("00000000-0000-0000-0000-000000000001")
+	root_dataset = _StandInDataset()
+	devfs_ruleset = 5
+	_allow_mount_zfs = 0
+
+	def __init__(self, vnet: bool) -> None:
+		self.config = libioc.Config.Jail.JailConfig.JailConfig(
+			host=_StandInHost()
+		)
+		self.config["vnet"] = vnet
+		self.config["ip4_addr"] = "em0|10.0.0.2/24,em0|10.0.0.3/24"
+		self.config["ip6_addr"] = "em0|fd00::2/64"
+
+
+def _get_jail_params() -> typing.Dict[str, _StandInParam]:
+	params = [_StandInParam(name, ctl_type) for name, ctl_type in _PARAMS]
+	return dict([(x.name.rstrip("."), x) for x in params])
+
+
+def _legacy_launch_params(
+	jail: _StandInJail,
+	jail_params: typing.Dict[str, _StandInParam]
+) -> typing.Dict[str, typing.Any]:
+	config = jail.config
+	vnet = (config["vnet"] is True)
+	value: typing.Any
+	params: typing.Dict[str, typing.Any] = {}
+	for sysctl_name, sysctl in jail_params.items():
+		if sysctl_name == "security.jail.param.devfs_ruleset":
+			value = int(jail.devfs_ruleset)
+		elif sysctl_name == "security.jail.param.path":
+			value = jail.root_dataset.mountpoint
+		elif sysctl_name == "security.jail.param.name":
+			value = jail.identifier
+		elif sysctl_name == "security.jail.param.host.hostuuid":
+			value = str(jail.hostuuid)
+		elif sysctl_name == "security.jail.param.allow.mount.zfs":
+			value = int(jail._allow_mount_zfs)
+		elif sysctl_name == "security.jail.param.vnet":
+			if vnet is False:
+				continue
+			value = 1
+		elif sysctl_name == "security.jail.param.ip4.addr":
+			if vnet is True:
+				continue
+			value = []
+			for _, addresses in config["ip4_addr"].items():
+				value += [x.ip for x in addresses]
+		elif sysctl_name == "security.jail.param.ip6.addr":
+			if vnet is True:
+				continue
+			value = []
+			for _, addresses in config["ip6_addr"].items():
+				value += [x.ip for x in addresses]
+		elif vnet and (sysctl_name.startswith("security.jail.param.ip")):
+			continue
+		else:
+			config_property_name = sysctl.iocage_name
+			if config.is_known_property(
+				config_property_name,
+				explicit=False
+			) is True:
+				value = config[config_property_name]
+				if sysctl.ctl_type in (_NODE, _INT):
+					sysctl_state_names = ["disable", "inherit", "new"]
+					if value in sysctl_state_names:
+						value = sysctl_state_names.index(value)
+			else:
+				continue
+		params[sysctl.jail_arg_name.rstrip(".")] = value
+	params["persist"] = None
+	return params
+
+
+class TestLaunchParamPlan(object):
+	"""Run LaunchParamPlan unit tests."""
+
+	def test_accessors_depend_on_vnet(self) -> None:
+		"""Test that VNET jails get no IP params but the vnet param."""
+		plan = libioc.LaunchParamPlan.LaunchParamPlan(
+			jail_params=_get_jail_params()
+		)
+		vnet_jail = _StandInJail(vnet=True)
+		jail = _StandInJail(vnet=False)
+
+		vnet_params = plan.build(vnet_jail)
+		assert vnet_params["vnet"] == 1
+		assert "ip4.addr" not in vnet_params
+		assert "ip4" not in vnet_params
+
+		params = plan.build(jail)
+		assert "vnet" not in params
+		assert sorted(str(x) for x in params["ip4.addr"]) == [
+			"10.0.0.2",
+			"10.0.0.3"
+		]
+		assert params["ip4"] == 2
+		assert params["devfs_ruleset"] == 5
+		assert params["name"] == "ioc-example"
+		assert params["persist"] is None
+
+		accessors = plan.get_accessors(jail.config, vnet=False)
+		assert accessors is plan.get_accessors(jail.config, vnet=False)
+		assert accessors is not plan.get_accessors(jail.config, vnet=True)
+
+	def test_benchmark_launch_params(self) -> None:
+		"""Compare the compiled plan with the per-param lookups."""
+		jail_params = _get_jail_params()
+		plan = libioc.LaunchParamPlan.LaunchParamPlan(jail_params=jail_params)
+		iterations = 200
+
+		for vnet in [False, True]:
+			jail = _StandInJail(vnet=vnet)
+			expected_params = _legacy_launch_params(jail, jail_params)
+			assert plan.build(jail) == expected_params
+
+			start = time.perf_counter()
+			for _ in range(iterations):
+				_legacy_launch_params(jail, jail_params)
+			legacy_duration = time.perf_counter() - start
+
+			start = time.perf_counter()
+			for _ in range(iterations):
+				plan.build(jail)
+			plan_duration = time.perf_counter() - start
+
+			print(
+				f"vnet={vnet} {iterations} launches - "
+				f"legacy: {legacy_duration:.3f}s, plan: {plan_duration:.3f}s"
+			)
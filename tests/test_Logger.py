@@ -0,0 +1,123 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for Logger module."""
+import json
+import typing
+import pytest
+
+import libioc.errors
+import libioc.Logger
+
+
+class TestLogger(object):
+	"""Run Logger unit tests."""
+
+	def test_print_history_is_bounded_per_instance(
+		self,
+		tmp_path: typing.Any
+	) -> None:
+		logger = libioc.Logger.Logger(
+			log_directory=str(tmp_path),
+			print_history_size=3
+		)
+		other_logger = libioc.Logger.Logger(log_directory=str(tmp_path))
+
+		first_entry = logger.screen("progress")
+		for i in range(10):
+			logger.log(f"line {i}")
+
+		assert len(logger.print_history) == 3
+		assert [x.message for x in logger.print_history] == [
+			"line 7", "line 8", "line 9"
+		]
+		assert len(other_logger.print_history) == 0
+		with pytest.raises(libioc.errors.CannotRedrawLine):
+			first_entry.edit("done")
+
+	def test_redraws_entries_in_history(
+		self,
+		tmp_path: typing.Any,
+		capsys: typing.Any
+	) -> None:
+		logger = libioc.Logger.Logger(log_directory=str(tmp_path))
+		entry = logger.screen("progress 0%")
+		logger.log("first line\nsecond line")
+		capsys.readouterr()
+
+		entry.edit("progress 100%")
+
+		output = capsys.readouterr().out
+		assert output == "\r\033[3F\rprogress 100%\033[K\n\n\n\r"
+
+	def test_print_history_can_be_disabled(
+		self,
+		tmp_path: typing.Any
+	) -> None:
+		logger = libioc.Logger.Logger(
+			log_directory=str(tmp_path),
+			print_history_size=0
+		)
+		entry = logger.screen("progress")
+		logger.log("message")
+
+		assert len(logger.print_history) == 0
+		with pytest.raises(libioc.errors.CannotRedrawLine):
+			entry.edit("done")
+
+	def test_sinks_stream_entries(
+		self,
+		tmp_path: typing.Any
+	) -> None:
+		text_path = str(tmp_path / "ioc.log")
+		json_path = str(tmp_path / "ioc.jsonl")
+		text_sink = libioc.Logger.FileLogSink(text_path, level="info")
+		json_sink = libioc.Logger.JSONLinesLogSink(json_path)
+		logger = libioc.Logger.Logger(
+			print_level="error",
+			log_directory=str(tmp_path),
+			print_history_size=0,
+			sinks=[text_sink]
+		)
+		logger.add_sink(json_sink)
+
+		logger.log("started")
+		logger.debug("details\nacross lines")
+		logger.screen("progress")
+		logger.remove_sink(text_sink)
+		logger.log("stopped")
+		logger.remove_sink(json_sink)
+
+		with open(text_path, "r", encoding="UTF-8") as f:
+			text_lines = f.read().splitlines()
+		assert len(text_lines) == 1
+		assert text_lines[0].endswith(" [info] started")
+
+		with open(json_path, "r", encoding="UTF-8") as f:
+			json_lines = [json.loads(line) for line in f]
+		assert [(x["level"], x["message"]) for x in json_lines] == [
+			("info", "started"),
+			("debug", "details\nacross lines"),
+			("info", "stopped")
+		]
+		assert len(logger.print_history) == 0
@@ -0,0 +1,155 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the MountTable snapshot."""
+import os.path
+import typing
+
+import pytest
+
+import libioc.MountTable
+import libioc.errors
+import libioc.helpers
+
+PROC_MOUNTS = "\n".join([
+	"zroot/ROOT/default / zfs rw,noatime 0 0",
+	"devfs /dev devfs rw,multilabel 0 0",
+	"/iocage/releases/12.0-RELEASE/root/bin /iocage/jails/a/root/bin "
+	"nullfs ro 0 0",
+	"/mnt/my\\040data /iocage/jails/a/root/mnt/my\\040data nullfs rw 0 0",
+	""
+])
+
+
+class FakeLibc(object):
+	"""Record unmount calls instead of unmounting filesystems."""
+
+	def __init__(self) -> None:
+		self.unmounted: typing.List[bytes] = []
+
+	def unmount(self, mountpoint: bytes, flags: typing.Any) -> int:
+		self.unmounted.append(mountpoint)
+		return 0
+
+
+@pytest.fixture
+def mount_table(tmp_path: typing.Any) -> libioc.MountTable.MountTable:
+	"""Return a MountTable read from a /proc/mounts style file."""
+	path = str(tmp_path / "mounts")
+	with open(path, "w") as f:
+		f.write(PROC_MOUNTS)
+	return libioc.MountTable.MountTable(file=path)
+
+
+@pytest.fixture
+def libc(monkeypatch: typing.Any) -> FakeLibc:
+	"""Replace libc and fail when the filesystem is asked for mounts."""
+	fake_libc = FakeLibc()
+	monkeypatch.setattr(libioc.helpers.libjail, "dll", fake_libc)
+
+	def _ismount(path: str) -> bool:
+		raise AssertionError(f"os.path.ismount({path}) was called")
+
+	monkeypatch.setattr(os.path, "ismount", _ismount)
+	return fake_libc
+
+
+class TestMountTable(object):
+	"""Run MountTable unit tests."""
+
+	def test_reads_mounts_indexed_by_mountpoint(
+		self,
+		mount_table: libioc.MountTable.MountTable
+	) -> None:
+		assert mount_table.loaded is False
+		assert mount_table.is_mounted("/iocage/jails/a/root/bin/") is True
+		assert mount_table.is_mounted("/iocage/jails/a/root/sbin") is False
+		assert mount_table.loaded is True
+		assert len(mount_table) == 4
+
+		mount = mount_table["/iocage/jails/a/root/mnt/my data"]
+		assert mount.source == "/mnt/my data"
+		assert mount.fstype == "nullfs"
+		assert mount.options == ["rw"]
+		assert mount_table["/dev"].options == ["rw", "multilabel"]
+
+	def test_updates_incrementally(
+		self,
+		mount_table: libioc.MountTable.MountTable
+	) -> None:
+		mount_table.add(
+			mountpoint="/iocage/jails/a/root/sbin",
+			source="/iocage/releases/12.0-RELEASE/root/sbin",
+			fstype="nullfs",
+			options=["ro"]
+		)
+		mount_table.remove("/iocage/jails/a/root/bin")
+		assert mount_table.is_mounted("/iocage/jails/a/root/sbin") is True
+		assert mount_table.is_mounted("/iocage/jails/a/root/bin") is False
+
+		mount_table.refresh()
+		assert mount_table.is_mounted("/iocage/jails/a/root/sbin") is False
+		assert mount_table.is_mounted("/iocage/jails/a/root/bin") is True
+
+	def test_umount_uses_the_mount_table(
+		self,
+		mount_table: libioc.MountTable.MountTable,
+		libc: FakeLibc
+	) -> None:
+		libioc.helpers.umount(
+			libioc.Types.AbsolutePath("/iocage/jails/a/root/bin"),
+			mount_table=mount_table
+		)
+		assert libc.unmounted == [b"/iocage/jails/a/root/bin"]
+		assert mount_table.is_mounted("/iocage/jails/a/root/bin") is False
+
+		with pytest.raises(libioc.errors.InvalidMountpoint):
+			libioc.helpers.umount(
+				libioc.Types.AbsolutePath("/iocage/jails/a/root/bin"),
+				mount_table=mount_table
+			)
+		assert len(libc.unmounted) == 1
+
+	def test_umount_many_mountpoints_without_stat(
+		self,
+		mount_table: libioc.MountTable.MountTable,
+		libc: FakeLibc
+	) -> None:
+		mountpoints = [
+			libioc.Types.AbsolutePath(f"/iocage/jails/j{i}/root/bin")
+			for i in range(500)
+		]
+		for mountpoint in mountpoints[::2]:
+			mount_table.add(mountpoint, source="/iocage/releases/bin")
+
+		for mountpoint in mountpoints:
+			if mount_table.is_mounted(mountpoint) is False:
+				continue
+			libioc.helpers.umount(
+				mountpoint,
+				force=True,
+				mount_table=mount_table
+			)
+
+		assert len(libc.unmounted) == 250
+		assert len(mount_table) == 4
@@ -0,0 +1,218 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for planned NetworkInterface commands."""
+import ipaddress
+import os
+import typing
+
+import pytest
+
+import helper_functions
+import libioc.BridgeInterface
+import libioc.Firewall
+import libioc.Network
+import libioc.NetworkInterface
+import libioc.helpers_ioctl
+
+IFCONFIG = """#!/bin/sh
+echo "$@" >> "$0.log"
+if [ "$2" = "create" ] && [ "$1" = "epair" ]; then
+	echo "epair$(wc -l < "$0.log" | tr -d ' ')a"
+	exit 0
+fi
+while [ $# -gt 0 ]; do
+	if [ "$1" = "name" ]; then
+		echo "$2"
+	fi
+	shift
+done
+"""
+
+
+class ImmediatePlan(libioc.NetworkInterface.NetworkInterfacePlan):
+	"""Apply every NetworkInterface on its own like before planning."""
+
+	def add(self, nic: libioc.NetworkInterface.NetworkInterface) -> str:
+		nic.apply()
+		return str(nic.name)
+
+
+@pytest.fixture
+def ifconfig(
+	tmp_path: typing.Any,
+	monkeypatch: typing.Any
+) -> typing.Callable[[], typing.List[str]]:
+	"""Replace ifconfig with a script and return a reader of its calls."""
+	path = str(tmp_path / "ifconfig")
+	with open(path, "w") as f:
+		f.write(IFCONFIG)
+	os.chmod(path, 0o755)
+	monkeypatch.setattr(
+		libioc.NetworkInterface.NetworkInterface,
+		"ifconfig_command",
+		path
+	)
+
+	def _create_interface(cloner_name: str) -> str:
+		raise OSError("SIOCIFCREATE2 is not available")
+
+	monkeypatch.setattr(
+		libioc.helpers_ioctl,
+		"create_interface",
+		_create_interface
+	)
+
+	def _read_calls() -> typing.List[str]:
+		try:
+			with open(f"{path}.log", "r") as f:
+				return f.read().splitlines()
+		except FileNotFoundError:
+			return []
+
+	return _read_calls
+
+
+def _setup_networks(
+	plan: libioc.NetworkInterface.NetworkInterfacePlan,
+	jail: helper_functions.FakeVnetJail,
+	nics: typing.List[str]
+) -> None:
+	bridge = libioc.BridgeInterface.BridgeInterface("bridge0")
+	for i, nic in enumerate(nics):
+		network = libioc.Network.Network(
+			jail=jail,
+			nic=nic,
+			ipv4_addresses=[ipaddress.IPv4Interface(f"10.0.{i}.2/24")],
+			mtu=1500,
+			bridge=bridge
+		)
+		list(network.setup(plan=plan))
+	plan.apply()
+
+
+class TestNetworkInterfacePlan(object):
+	"""Run NetworkInterfacePlan unit tests."""
+
+	def test_merges_operations_of_renamed_interfaces(
+		self,
+		ifconfig: typing.Callable[[], typing.List[str]]
+	) -> None:
+		plan = libioc.NetworkInterface.NetworkInterfacePlan()
+		name = plan.add(libioc.NetworkInterface.NetworkInterface(
+			name="epair1b",
+			rename="vnet0:4:j",
+			mtu=1500,
+			auto_apply=False
+		))
+		assert name == "vnet0:4:j"
+		plan.add(libioc.NetworkInterface.NetworkInterface(
+			name="bridge0",
+			addm="vnet0:4",
+			auto_apply=False
+		))
+		plan.add(libioc.NetworkInterface.NetworkInterface(
+			name="vnet0:4:j",
+			vnet="ioc-example",
+			extra_settings=[],
+			auto_apply=False
+		))
+		plan.add(libioc.NetworkInterface.NetworkInterface(
+			name="bridge0",
+			addm="vnet1:4",
+			auto_apply=False
+		))
+		plan.apply()
+
+		assert ifconfig() == [
+			"epair1b mtu 1500 name vnet0:4:j up vnet ioc-example",
+			"bridge0 addm vnet0:4 addm vnet1:4 up"
+		]
+
+	def test_vnet_setup_process_count(
+		self,
+		ifconfig: typing.Callable[[], typing.List[str]]
+	) -> None:
+		nics = ["vnet0", "vnet1", "vnet2"]
+		_setup_networks(
+			ImmediatePlan(),
+			helper_functions.FakeVnetJail("before", 3),
+			nics
+		)
+		calls_before = len(ifconfig())
+
+		_setup_networks(
+			libioc.NetworkInterface.NetworkInterfacePlan(),
+			helper_functions.FakeVnetJail("after", 4),
+			nics
+		)
+		calls_after = len(ifconfig()) - calls_before
+
+		# per NIC: create epair, configure both sides, jail side and address
+		assert calls_after == (len(nics) * 5) + 1
+		assert calls_before == len(nics) * 8
+
+		calls = ifconfig()[calls_before:]
+		bridge_calls = [x for x in calls if x.startswith("bridge0 ")]
+		assert bridge_calls == [
+			"bridge0 addm vnet0:4 addm vnet1:4 addm vnet2:4 up"
+		]
+		# bridge members and jail interfaces are configured after the epairs
+		assert calls.index(bridge_calls[0]) == (len(nics) * 3)
+		assert calls[-2].startswith("vnet2:4:j link ")
+		assert calls[-2].endswith(" mtu 1500 name vnet2 up")
+		assert calls[-1] == "vnet2 inet 10.0.2.2/24"
+
+	def test_secure_bridges_of_many_nics_are_not_merged(
+		self,
+		ifconfig: typing.Callable[[], typing.List[str]],
+		monkeypatch: typing.Any
+	) -> None:
+		monkeypatch.setattr(
+			libioc.Firewall.Firewall,
+			"_required_sysctl_properties",
+			{}
+		)
+		firewall = libioc.Firewall.Firewall()
+		bridge = libioc.BridgeInterface.BridgeInterface(":bridge0")
+		plan = libioc.NetworkInterface.NetworkInterfacePlan()
+		jail = helper_functions.FakeVnetJail("secure", 5)
+		for i in range(2):
+			network = libioc.Network.Network(
+				jail=jail,
+				nic=f"vnet{i}",
+				ipv4_addresses=[ipaddress.IPv4Interface(f"10.0.{i}.2/24")],
+				mtu=1500,
+				bridge=bridge,
+				firewall=firewall
+			)
+			list(network.setup(plan=plan))
+		plan.apply()
+
+		secure_bridge_calls = [
+			x for x in ifconfig() if x.startswith("bridge create ")
+		]
+		assert secure_bridge_calls == [
+			"bridge create name vnet0:5:net addm vnet0:5 addm vnet0:5:b up",
+			"bridge create name vnet1:5:net addm vnet1:5 addm vnet1:5:b up"
+		]
@@ -30,6 +30,7 @@ import subprocess
 
 import libzfs
 
+import libioc.events
 import libioc.Pkg
 
 
@@ -92,3 +93,28 @@ class TestPkg(object):
             [f"/sbin/mount"]
         ).decode("utf-8")
         assert str(pkg_mountpoint) not in stdout
+
+    def test_can_provision_many_package_sets_at_once(
+        self,
+        pkg: libioc.Pkg.Pkg,
+        existing_jail: 'libioc.Jail.Jail'
+    ) -> None:
+        events = list(pkg.provision([
+            (existing_jail, ["sl"]),
+            (existing_jail, ["git-lite"])
+        ]))
+
+        fetch_events = [
+            x for x in events
+            if isinstance(x, libioc.events.PackageFetch) and (x.done is True)
+        ]
+        assert len(fetch_events) == 1
+        assert sorted(fetch_events[0].packages) == ["git-lite", "pkg", "sl"]
+
+        install_events = [
+            x for x in events
+            if isinstance(x, libioc.events.PackageInstall)
+        ]
+        assert all(x.packages == ["sl", "git-lite"] for x in install_events)
+        assert os.path.exists(f"{existing_jail.root_path}/usr/local/bin/sl")
+        assert os.path.exists(f"{existing_jail.root_path}/usr/local/bin/git")
@@ -23,11 +23,15 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """Unit tests for Jail Resource Limits."""
 import typing
+import os
 import pytest
 import subprocess
 
 import freebsd_sysctl
 
+import libioc.Config.Jail.Properties.ResourceLimit
+import libioc.ResourceLimit
+
 try:
     rctl_supported = (freebsd_sysctl.Sysctl("kern.features.rctl").value == 1)
     rctl_enabled = (freebsd_sysctl.Sysctl("kern.racct.enable").value == 1)
@@ -100,3 +104,140 @@ class TestResourceLimits(object):
         ).decode("utf-8").strip()
 
         assert len(stdout) == 0
+
+
+RCTL = """#!/bin/sh
+echo "$@" >> "$0.log"
+if [ "$1" = "-u" ]; then
+    shift
+    for filter in "$@"; do
+        if [ "$filter" = "jail:ioc-gone" ]; then
+            echo "rctl: failed to show resource consumption for '$filter'" >&2
+            continue
+        fi
+        echo "cputime=${#filter}"
+        echo "memoryuse=1048576"
+        echo "pcpu=7"
+    done
+fi
+if [ "$1" = "-r" ]; then
+    shift
+    for filter in "$@"; do
+        echo "rctl: failed to remove rule '$filter': No such process" >&2
+    done
+    exit 1
+fi
+"""
+
+
+def _limit(
+    value: str
+) -> libioc.Config.Jail.Properties.ResourceLimit.ResourceLimitValue:
+    return libioc.Config.Jail.Properties.ResourceLimit.ResourceLimitValue(
+        value
+    )
+
+
+class FakeJail(object):
+    """Jail with a pcpu and memoryuse resource limit configured."""
+
+    def __init__(self, name: str, rlimits: bool=True) -> None:
+        self.identifier = f"ioc-{name}"
+        self.config = {
+            "rlimits": rlimits,
+            "pcpu": _limit("20"),
+            "memoryuse": _limit("deny=512M/jail")
+        }
+
+
+def _read_lines(path: str) -> typing.List[str]:
+    try:
+        with open(path, "r") as f:
+            return f.read().splitlines()
+    except FileNotFoundError:
+        return []
+
+
+@pytest.fixture
+def rctl(
+    tmp_path: typing.Any,
+    monkeypatch: typing.Any
+) -> str:
+    """Replace the rctl command with a script and return its path."""
+    rctl_path = str(tmp_path / "rctl")
+    with open(rctl_path, "w") as f:
+        f.write(RCTL)
+    os.chmod(rctl_path, 0o755)
+    for cls in [
+        libioc.ResourceLimit.ResourceLimit,
+        libioc.ResourceLimit.ResourceUsage
+    ]:
+        monkeypatch.setattr(cls, "RCTL_COMMAND", rctl_path)
+    return rctl_path
+
+
+class TestResourceLimitEngine(object):
+    """Run ResourceLimit engine unit tests."""
+
+    def test_rules_of_many_jails_are_applied_at_once(
+        self,
+        rctl: str
+    ) -> None:
+        """Test that all rules are added with a single rctl call."""
+        resource_limit = libioc.ResourceLimit.ResourceLimit()
+        jails = [FakeJail("one"), FakeJail("two"), FakeJail("off", False)]
+
+        with resource_limit.batch():
+            resource_limit.apply(jails)
+            # jails apply their own limits again when they start
+            for jail in jails:
+                resource_limit.apply([jail])
+
+        assert _read_lines(f"{rctl}.log") == [" ".join([
+            "-a",
+            "jail:ioc-one:memoryuse:deny=512M/jail",
+            "jail:ioc-one:pcpu:deny=20/jail",
+            "jail:ioc-two:memoryuse:deny=512M/jail",
+            "jail:ioc-two:pcpu:deny=20/jail"
+        ])]
+
+    def test_clearing_is_deferred_until_the_batch_ends(
+        self,
+        rctl: str
+    ) -> None:
+        """Test that the limits of many jails are removed at once."""
+        resource_limit = libioc.ResourceLimit.ResourceLimit()
+
+        with resource_limit.batch():
+            for name in ["one", "two", "three"]:
+                resource_limit.clear([FakeJail(name)])
+            assert _read_lines(f"{rctl}.log") == []
+
+        assert _read_lines(f"{rctl}.log") == [
+            "-r jail:ioc-one jail:ioc-two jail:ioc-three"
+        ]
+
+
+class TestResourceUsage(object):
+    """Run ResourceUsage unit tests."""
+
+    def test_usage_of_many_jails_is_sampled_at_once(
+        self,
+        rctl: str
+    ) -> None:
+        """Test that one rctl call is assigned to the jails in order."""
+        resource_usage = libioc.ResourceLimit.ResourceUsage()
+        resource_usage.refresh(names=["ioc-a", "ioc-gone", "ioc-bcd"])
+
+        assert _read_lines(f"{rctl}.log") == [
+            "-u jail:ioc-a jail:ioc-gone jail:ioc-bcd"
+        ]
+        assert sorted(resource_usage.keys()) == ["ioc-a", "ioc-bcd"]
+        assert resource_usage.get_value("ioc-a", "cputime") == 10
+        assert resource_usage.get_value("ioc-bcd", "cputime") == 12
+        assert resource_usage.get_value("ioc-bcd", "memoryuse") == 1048576
+        assert resource_usage.get_value("ioc-bcd", "pcpu") == 7
+        assert resource_usage.get_value("ioc-bcd", "nthr") == 0
+        assert len(resource_usage["ioc-a"]) == len(
+            libioc.ResourceLimit.ResourceUsage.RESOURCES
+        )
@@ -0,0 +1,118 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the RunningJails snapshot."""
+import os
+import typing
+
+import libioc.RunningJails
+
+JLS_OUTPUT = "\n".join([
+	(
+		"devfs_ruleset=4 jid=1 name=ioc-webserver "
+		"path=/iocage/jails/webserver/root persist "
+		"ip4.addr=10.0.0.2,10.0.0.3 ip6.addr="
+	),
+	(
+		"jid=7 name=ioc-db*local \"path=/iocage/jails/db.local/my root\" "
+		"nopersist ip4.addr= ip6.addr=fe80::2"
+	)
+])
+
+
+def _create_jls(path: str) -> None:
+	with open(f"{path}.out", "w") as f:
+		f.write(JLS_OUTPUT)
+	with open(path, "w") as f:
+		f.write(f"#!/bin/sh\necho 1 >> {path}.calls\ncat {path}.out\n")
+	os.chmod(path, 0o755)
+
+
+def _count_calls(path: str) -> int:
+	try:
+		with open(f"{path}.calls", "r") as f:
+			return len(f.read().splitlines())
+	except FileNotFoundError:
+		return 0
+
+
+class TestRunningJails(object):
+	"""Run RunningJails unit tests."""
+
+	def test_enumerates_jails_once(
+		self,
+		tmp_path: typing.Any,
+		monkeypatch: typing.Any
+	) -> None:
+		jls = str(tmp_path / "jls")
+		_create_jls(jls)
+		monkeypatch.setattr(
+			libioc.RunningJails.RunningJails,
+			"JLS_COMMAND",
+			[jls]
+		)
+
+		running_jails = libioc.RunningJails.RunningJails()
+		assert _count_calls(jls) == 0
+		assert running_jails.get_jid("ioc-webserver") == 1
+		assert running_jails.get_jid("ioc-db*local") == 7
+		assert running_jails.get_jid("ioc-stopped") is None
+		assert running_jails.jids == {"ioc-webserver": 1, "ioc-db*local": 7}
+		assert _count_calls(jls) == 1
+
+		webserver = running_jails["ioc-webserver"]
+		assert webserver.path == "/iocage/jails/webserver/root"
+		assert webserver.ip4_addresses == ["10.0.0.2", "10.0.0.3"]
+		assert webserver.ip6_addresses == []
+		db = running_jails["ioc-db*local"]
+		assert db.path == "/iocage/jails/db.local/my root"
+		assert db.ip6_addresses == ["fe80::2"]
+
+	def test_refresh_discards_local_changes(
+		self,
+		tmp_path: typing.Any,
+		monkeypatch: typing.Any
+	) -> None:
+		jls = str(tmp_path / "jls")
+		_create_jls(jls)
+		monkeypatch.setattr(
+			libioc.RunningJails.RunningJails,
+			"JLS_COMMAND",
+			[jls]
+		)
+
+		running_jails = libioc.RunningJails.RunningJails()
+		running_jails.load()
+		running_jails.remove("ioc-webserver")
+		running_jails.add(libioc.RunningJails.RunningJail(
+			jid=12,
+			name="ioc-new"
+		))
+		assert running_jails.get_jid("ioc-webserver") is None
+		assert running_jails.get_jid("ioc-new") == 12
+		assert _count_calls(jls) == 1
+
+		running_jails.refresh()
+		assert running_jails.get_jid("ioc-webserver") == 1
+		assert running_jails.get_jid("ioc-new") is None
+		assert _count_calls(jls) == 2
@@ -0,0 +1,216 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the SecureTarfile module."""
+import io
+import os
+import random
+import stat
+import subprocess
+import tarfile
+import time
+import tracemalloc
+import typing
+
+import pytest
+
+import libioc.SecureTarfile
+import libioc.errors
+
+
+def _add_file(tar: tarfile.TarFile, name: str, content: bytes) -> None:
+	tar_info = tarfile.TarInfo(name)
+	tar_info.size = len(content)
+	tar_info.mode = 0o644
+	tar.addfile(tar_info, io.BytesIO(content))
+
+
+def _add_directory(tar: tarfile.TarFile, name: str, mode: int=0o755) -> None:
+	tar_info = tarfile.TarInfo(name)
+	tar_info.type = tarfile.DIRTYPE
+	tar_info.mode = mode
+	tar_info.mtime = 1000000000
+	tar.addfile(tar_info)
+
+
+def _create_archive(
+	path: str,
+	member_names: typing.List[str]
+) -> None:
+	with tarfile.open(path, "w:xz") as tar:
+		for name in member_names:
+			_add_file(tar, name, b"content")
+
+
+def _legacy_extract(file: str, destination: str) -> None:
+	"""Extract an archive like SecureTarfile did before streaming."""
+	secure_tarfile = libioc.SecureTarfile.SecureTarfile(file)
+	with tarfile.open(file, "r:xz") as tar:
+		secure_tarfile._check_tar_members(tar.getmembers())
+		tar.extractall(destination)
+
+
+class TestSecureTarfile(object):
+	"""Run SecureTarfile unit tests."""
+
+	def test_extracts_files_directories_and_links(
+		self,
+		tmp_path: typing.Any
+	) -> None:
+		archive = str(tmp_path / "base.txz")
+		with tarfile.open(archive, "w:xz") as tar:
+			_add_directory(tar, ".")
+			_add_directory(tar, "./bin", mode=0o555)
+			_add_file(tar, "./bin/test", b"#!/bin/sh\n")
+			link = tarfile.TarInfo("./bin/[")
+			link.type = tarfile.LNKTYPE
+			link.linkname = "./bin/test"
+			tar.addfile(link)
+			symlink = tarfile.TarInfo("./sbin")
+			symlink.type = tarfile.SYMTYPE
+			symlink.linkname = "bin"
+			tar.addfile(symlink)
+
+		destination = str(tmp_path / "root")
+		os.mkdir(destination)
+		libioc.SecureTarfile.extract(
+			file=archive,
+			compression_format="xz",
+			destination=destination
+		)
+
+		bin_stat = os.stat(f"{destination}/bin")
+		assert stat.S_IMODE(bin_stat.st_mode) == 0o555
+		assert bin_stat.st_mtime == 1000000000
+		assert os.path.samefile(
+			f"{destination}/bin/test",
+			f"{destination}/bin/["
+		)
+		assert os.readlink(f"{destination}/sbin") == "bin"
+		os.chmod(f"{destination}/bin", 0o755)
+
+	@pytest.mark.parametrize("name", [
+		"/etc/passwd",
+		"etc/passwd",
+		"./etc/../../passwd"
+	])
+	def test_refuses_illegal_member_names(
+		self,
+		tmp_path: typing.Any,
+		name: str
+	) -> None:
+		archive = str(tmp_path / "illegal.txz")
+		_create_archive(archive, ["./etc/rc.conf", name])
+
+		destination = str(tmp_path / "root")
+		os.mkdir(destination)
+		with pytest.raises(libioc.errors.IllegalArchiveContent):
+			libioc.SecureTarfile.extract(
+				file=archive,
+				compression_format="xz",
+				destination=destination
+			)
+		assert os.path.exists(str(tmp_path / "passwd")) is False
+		assert os.path.exists(str(tmp_path / "etc")) is False
+
+	def test_decompressor_is_stopped_on_illegal_members(
+		self,
+		tmp_path: typing.Any,
+		monkeypatch: typing.Any
+	) -> None:
+		archive = str(tmp_path / "illegal.tar")
+		with tarfile.open(archive, "w") as tar:
+			_add_file(tar, "./etc/rc.conf", b"content")
+			_add_file(tar, "/etc/passwd", b"content")
+		monkeypatch.setattr(
+			libioc.SecureTarfile.SecureTarfile,
+			"DECOMPRESSION_COMMANDS",
+			dict(zst=["cat"])
+		)
+		processes = []
+		_popen = subprocess.Popen
+
+		def _record_popen(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+			process = _popen(*args, **kwargs)
+			processes.append(process)
+			return process
+
+		monkeypatch.setattr(subprocess, "Popen", _record_popen)
+
+		destination = str(tmp_path / "root")
+		os.mkdir(destination)
+		with pytest.raises(libioc.errors.IllegalArchiveContent):
+			libioc.SecureTarfile.extract(
+				file=archive,
+				compression_format="zst",
+				destination=destination
+			)
+		assert len(processes) == 1
+		assert processes[0].stdout.closed is True
+		assert processes[0].returncode is not None
+
+	def test_benchmark_single_pass_extraction(
+		self,
+		tmp_path: typing.Any
+	) -> None:
+		archive = str(tmp_path / "base.txz")
+		random_generator = random.Random(42)
+		with tarfile.open(archive, "w:xz", preset=0) as tar:
+			for i in range(50):
+				_add_directory(tar, f"./dir{i}")
+				for j in range(50):
+					size = random_generator.randint(1024, 8192)
+					content = random_generator.getrandbits(size * 8).to_bytes(
+						size,
+						"little"
+					)
+					_add_file(tar, f"./dir{i}/file{j}", content)
+
+		legacy_destination = str(tmp_path / "legacy")
+		os.mkdir(legacy_destination)
+		tracemalloc.start()
+		start = time.perf_counter()
+		_legacy_extract(archive, legacy_destination)
+		legacy_duration = time.perf_counter() - start
+		legacy_memory = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+
+		destination = str(tmp_path / "streaming")
+		os.mkdir(destination)
+		tracemalloc.start()
+		start = time.perf_counter()
+		libioc.SecureTarfile.extract(
+			file=archive,
+			compression_format="xz",
+			destination=destination
+		)
+		duration = time.perf_counter() - start
+		memory = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+
+		print(
+			f"legacy: {legacy_duration:.2f}s {legacy_memory >> 10}KiB, "
+			f"streaming: {duration:.2f}s {memory >> 10}KiB"
+		)
+		assert os.listdir(destination) == os.listdir(legacy_destination)
+		assert memory < legacy_memory
@@ -0,0 +1,93 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for ZFS module."""
+import random
+import typing
+
+import libzfs
+
+import libioc.ZFS
+
+
+class TestDatasetCache(object):
+	"""Run DatasetCache unit tests."""
+
+	def test_counts_hits_and_misses(self) -> None:
+		lookups: typing.List[str] = []
+
+		def _lookup(name: str) -> typing.Any:
+			lookups.append(name)
+			return object()
+
+		cache = libioc.ZFS.DatasetCache()
+		first = cache.get("pool/iocage/jails/a", _lookup)
+		assert cache.get("pool/iocage/jails/a", _lookup) is first
+		cache.get("pool/iocage/jails/b", _lookup)
+
+		assert lookups == ["pool/iocage/jails/a", "pool/iocage/jails/b"]
+		assert (cache.hits, cache.misses, cache.lookups) == (1, 2, 3)
+
+	def test_invalidates_children_and_snapshots(self) -> None:
+		cache = libioc.ZFS.DatasetCache()
+		names = [
+			"pool/jails/a",
+			"pool/jails/a/root",
+			"pool/jails/a@snapshot",
+			"pool/jails/ab",
+			"pool/jails/b"
+		]
+		for name in names:
+			cache.get(name, lambda x: object())
+
+		cache.invalidate("pool/jails/a")
+		assert len(cache) == 2
+		cache.get("pool/jails/ab", lambda x: object())
+		assert cache.hits == 1
+
+		cache.invalidate()
+		assert len(cache) == 0
+
+
+class TestZFS(object):
+	"""Run ZFS unit tests."""
+
+	def test_caches_lookups_within_context(
+		self,
+		root_dataset: libzfs.ZFSDataset,
+		zfs: 'libioc.ZFS.ZFS'
+	) -> None:
+		name = f"{root_dataset.name}/cached-" + str(random.randint(1, 32768))
+		zfs.create_dataset(name)
+
+		lookup_count = zfs.lookup_count
+		with zfs.cached() as cache:
+			for _ in range(3):
+				assert zfs.get_dataset(name).name == name
+			assert zfs.lookup_count == lookup_count + 1
+			assert cache.hits == 2
+
+			zfs.delete_dataset_recursive(zfs.get_dataset(name))
+			assert len(cache) == 0
+
+		assert zfs.dataset_cache is None
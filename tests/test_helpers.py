@@ -0,0 +1,127 @@
+# Copyright (c) 2017-2019, Stefan Grönke
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted providing that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING
+# IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for helpers module."""
+import os
+import selectors
+import typing
+import time
+
+import libioc.helpers
+
+
+def _consume(
+	events: typing.Generator[bytes, None, 'libioc.helpers.CommandOutput']
+) -> typing.Tuple[typing.List[bytes], 'libioc.helpers.CommandOutput']:
+	chunks = []
+	try:
+		while True:
+			chunks.append(next(events))
+	except StopIteration as return_statement:
+		return chunks, return_statement.value
+
+
+class TestExecGenerator(object):
+	"""Run exec_generator unit tests."""
+
+	def test_yields_buffered_lines(self) -> None:
+		lines, output = _consume(libioc.helpers.exec_generator(
+			["/bin/sh", "-c", "echo foo; printf 'bar\nbaz'; exit 3"]
+		))
+		stdout, _, returncode = output
+
+		assert [line.rstrip(b"\r") for line in lines] == [
+			b"foo", b"bar", b"baz"
+		]
+		assert stdout.replace("\r\n", "\n") == "foo\nbar\nbaz"
+		assert returncode == 3
+
+	def test_yields_unbuffered_chunks(self) -> None:
+		chunks, output = _consume(libioc.helpers.exec_generator(
+			["/bin/sh", "-c", "printf 'foo\nbar'"],
+			buffer_lines=False
+		))
+
+		assert b"".join(chunks).replace(b"\r\n", b"\n") == b"foo\nbar"
+		assert output[0].replace("\r\n", "\n") == "foo\nbar"
+
+	def test_does_not_busy_wait(self, monkeypatch: typing.Any) -> None:
+		timeouts: typing.List[float] = []
+		_DefaultSelector = selectors.DefaultSelector
+
+		class RecordingSelector(_DefaultSelector):  # type: ignore
+
+			def select(
+				self,
+				timeout: typing.Optional[float]=None
+			) -> typing.Any:
+				timeouts.append(timeout)
+				return _DefaultSelector.select(self, timeout)
+
+		monkeypatch.setattr(selectors, "DefaultSelector", RecordingSelector)
+		_consume(libioc.helpers.exec_generator(["/bin/sleep", "1"]))
+
+		# only the output left after the child exited is polled
+		assert timeouts.count(0) <= 1
+		assert len(timeouts) < 10
+
+	def test_cpu_time_per_megabyte(self) -> None:
+		megabytes = 16
+		command = (
+			f"head -c {megabytes * 1024 * 1024} /dev/zero"
+			" | tr '\\0' 'x' | fold -w 79"
+		)
+		cpu_time = time.process_time()
+		lines, (stdout, _, _) = _consume(libioc.helpers.exec_generator(
+			["/bin/sh", "-c", command]
+		))
+		cpu_time = time.process_time() - cpu_time
+		print(f"exec_generator: {cpu_time / megabytes:.4f}s CPU time per MB")
+
+		assert len(stdout) >= (megabytes * 1024 * 1024)
+
+
+class TestGetOsVersion(object):
+	"""Run get_os_version unit tests."""
+
+	def test_caches_version_until_file_changes(
+		self,
+		tmp_path: typing.Any
+	) -> None:
+		version_file = str(tmp_path / "freebsd-version")
+		with open(version_file, "w", encoding="utf-8") as f:
+			f.write('#!/bin/sh\nUSERLAND_VERSION="12.1-RELEASE-p3"\n')
+
+		version = libioc.helpers.get_os_version(version_file)
+		assert version == dict(userland=12.1, name="RELEASE", patch=3)
+		version["patch"] = 0
+		assert libioc.helpers.get_os_version(version_file)["patch"] == 3
+
+		with open(version_file, "w", encoding="utf-8") as f:
+			f.write('#!/bin/sh\nUSERLAND_VERSION="12.2-RELEASE"\n')
+		os.utime(version_file, ns=(0, 10**9))
+		assert libioc.helpers.get_os_version(version_file) == dict(
+			userland=12.2,
+			name="RELEASE",
+			patch=0
+		)